@@ -9,6 +9,57 @@ The main part of the script can use it as needed to report errors or results
 without having to worry about the e-mail details.
 
 ============ Change Log ============
+2026-Oct-18 = Added an optional pool of persistent, logged-in SMTP connections
+              that is reused across calls to send_email. EmailSender can be
+              used as a context manager to close the pool.
+              Added an opt-in single transaction mode that sends one message
+              to many envelope recipients at a time.
+              Added AsyncEmailSender. Moved the address validation into
+              _validation so that both senders share it.
+              Added parallel delivery across several connections, with an
+              optional per-server cap on concurrent connections.
+              Added enqueue_email and flush, which hand e-mails to a
+              background thread instead of waiting for the smtp server.
+              Added a durable on-disk spool, with spool_email and
+              drain_spool.
+              The message is now rendered once per call to send_email, and
+              only the To header changes between recipients. Rendered
+              messages are kept in an LRU cache across calls.
+              Added send_streamed_email, which streams bodies and attachments
+              from files or iterables instead of holding them in memory.
+              Added compress_threshold, which gzips large bodies and
+              attachments, and a check of the message size against the limit
+              the smtp server advertises, with oversize_policy to either
+              raise MessageTooLargeError or split the body into parts.
+              Added send_many, which sends many different e-mails over one
+              session, or over pooled sessions, and lazily yields a result
+              for each.
+              MAIL FROM, RCPT TO, and DATA are pipelined (RFC 2920) when the
+              server supports it.
+              Added rate limits per server and per sender, which slow down
+              when the server defers messages, and automatic retries of
+              deferred (4xx) recipients.
+              send_email and send_streamed_email return a SendResult, with
+              the status, code, latency, and retries of each recipient.
+              Added continue_on_error.
+              Added relays, for load balancing and failover across several
+              smtp relays, with circuit breakers and health checks, and
+              connect_timeout.
+              Added command_timeout, send_timeout, and the deadline argument
+              to send_email, which raise SendTimeoutError when they run out.
+              Added observer, for instrumentation of each phase of sending.
+              Added tls, for STARTTLS or implicit TLS, with a shared
+              SSLContext and resumption of TLS sessions.
+              Added preprocess_recipients, which validates and normalizes the
+              recipients, drops duplicates, and groups them by domain.
+              Added coalesce_window, which sends repeats of an e-mail only as
+              a periodic digest of how often they happened.
+              Importing wmul_emailer no longer imports smtplib, email, or the
+              rest of the package. Each name is imported the first time it is
+              used, and EmailSender has moved to wmul_emailer.sender.
+              Added transports, which deliver with sendmail, to a Maildir, or
+              into memory, instead of over smtp.
+
 2023-Jan-17 = Changed License from GPLv2 to GPLv3. 
 
 2023-Jan-13 = Added documentation. Allow caller to defer providing 
@@ -47,62 +98,59 @@ A PARTICULAR PURPOSE. See the GNU General Public License for more details.
 You should have received a copy of the GNU General Public License along with 
 wmul_emailer. If not, see <https://www.gnu.org/licenses/>. 
 """
-from email.mime.text import MIMEText
-from smtplib import SMTP
+import importlib
+import sys
 
 __version__ = "0.6.0"
 
 
-__all__ = ["EmailSender"]
-
-
-class EmailSender:
-
-    def __init__(self, server_host, port, user_name=None, password=None, from_email_address=None, destination_email_addresses=None):
-        if destination_email_addresses:
-            if not _destination_emails_correct_type(destination_email_addresses):
-                raise TypeError("destination_email_addresses must be a list, tuple, or str.")
-            if isinstance(destination_email_addresses, str):
-                destination_email_addresses = [destination_email_addresses]
-
-        self.server_host = server_host
-        self.port = port
-        self.user_name = user_name
-        self.password = password
-        self.from_email_address = from_email_address
-        self.destination_email_addresses = destination_email_addresses
-
-    def send_email(self, email_body, email_subject, from_email_address=None, destination_email_addresses=None):
-        if destination_email_addresses:
-            if not _destination_emails_correct_type(destination_email_addresses):
-                raise TypeError("destination_email_addresses must be a list, tuple, or str.")
-            if isinstance(destination_email_addresses, str):
-                destination_email_addresses = [destination_email_addresses]
-        elif not self.destination_email_addresses:
-            raise ValueError("destination_email_addresses must be provided to either the constructor or to the send_email function")
-        else:
-            destination_email_addresses = self.destination_email_addresses
-
-        if not from_email_address:
-            if not self.from_email_address:
-                raise ValueError("from_email_address must be provided to either the constructor or to the send_email function.")
-            else:
-                from_email_address = self.from_email_address
-
-        with SMTP(self.server_host, port=self.port) as server:
-            if self.user_name:
-                server.login(user=self.user_name, password=self.password)
-            for email_address in destination_email_addresses:
-                msg = MIMEText(email_body)
-                msg['Subject'] = email_subject
-                msg['From'] = from_email_address
-                msg['To'] = email_address
-                server.send_message(msg)
-
-
-def _destination_emails_correct_type(destination_email_addresses):
-    return (
-        isinstance(destination_email_addresses, list) or 
-        isinstance(destination_email_addresses, tuple) or
-        isinstance(destination_email_addresses, str)
-    )
+__all__ = ["AsyncEmailSender", "Attachment", "BatchEmail", "BatchResult", "EmailSender", "LocalTransport",
+           "MaildirTransport", "MemoryTransport", "MessageTooLargeError", "Metrics", "NoRelayAvailableError", "Observer",
+           "RecipientResult", "Relay", "SMTPConnectionPool", "SendResult", "SendTimeoutError", "SendmailTransport",
+           "Spool", "SpoolLockedError"]
+
+# The module that each name is imported from, the first time it is used.
+_LAZY_NAMES = {
+    "AsyncEmailSender": "wmul_emailer.async_sender",
+    "Attachment": "wmul_emailer.streaming",
+    "BatchEmail": "wmul_emailer.sender",
+    "BatchResult": "wmul_emailer.sender",
+    "EmailSender": "wmul_emailer.sender",
+    "LocalTransport": "wmul_emailer.transports",
+    "MaildirTransport": "wmul_emailer.transports",
+    "MemoryTransport": "wmul_emailer.transports",
+    "MessageTooLargeError": "wmul_emailer.errors",
+    "Metrics": "wmul_emailer.instrumentation",
+    "NoRelayAvailableError": "wmul_emailer.errors",
+    "OVERSIZE_POLICIES": "wmul_emailer.sender",
+    "Observer": "wmul_emailer.instrumentation",
+    "RecipientResult": "wmul_emailer.results",
+    "Relay": "wmul_emailer.relays",
+    "SMTP": "smtplib",
+    "SMTPConnectionPool": "wmul_emailer.pool",
+    "SendResult": "wmul_emailer.results",
+    "SendTimeoutError": "wmul_emailer.errors",
+    "SendmailTransport": "wmul_emailer.transports",
+    "Spool": "wmul_emailer.spool",
+    "SpoolLockedError": "wmul_emailer.spool",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    # Later lookups find it directly, and patching it replaces it.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ is new in Python 3.7, so everything is imported now.
+    for _name in _LAZY_NAMES:
+        __getattr__(_name)
@@ -0,0 +1,59 @@
+"""
+@Author = 'Mike Stanley'
+
+Argument validation shared by EmailSender and AsyncEmailSender.
+
+============ Change Log ============
+2026-Oct-18 = Created. Moved _destination_emails_correct_type here from
+              __init__ so that it can be shared with AsyncEmailSender.
+
+============ License ============
+Copyright (c) 2017-2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+def _normalize_destination_email_addresses(destination_email_addresses):
+    if not _destination_emails_correct_type(destination_email_addresses):
+        raise TypeError("destination_email_addresses must be a list, tuple, or str.")
+    if isinstance(destination_email_addresses, str):
+        destination_email_addresses = [destination_email_addresses]
+    return destination_email_addresses
+
+
+def _resolve_addresses(sender, from_email_address, destination_email_addresses):
+    if destination_email_addresses:
+        destination_email_addresses = _normalize_destination_email_addresses(destination_email_addresses)
+    elif not sender.destination_email_addresses:
+        raise ValueError("destination_email_addresses must be provided to either the constructor or to the send_email function")
+    else:
+        destination_email_addresses = sender.destination_email_addresses
+
+    if not from_email_address:
+        if not sender.from_email_address:
+            raise ValueError("from_email_address must be provided to either the constructor or to the send_email function.")
+        else:
+            from_email_address = sender.from_email_address
+
+    return from_email_address, destination_email_addresses
+
+
+def _destination_emails_correct_type(destination_email_addresses):
+    return (
+        isinstance(destination_email_addresses, list) or
+        isinstance(destination_email_addresses, tuple) or
+        isinstance(destination_email_addresses, str)
+    )
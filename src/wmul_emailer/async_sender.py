@@ -0,0 +1,368 @@
+"""
+@Author = 'Mike Stanley'
+
+An asyncio version of EmailSender for applications that cannot block their
+event loop for the length of an SMTP conversation. It takes the same
+constructor arguments and send_email arguments as EmailSender, but
+send_email is a coroutine. SMTP is spoken over asyncio streams, the
+recipients of a call to send_email are delivered to concurrently (at most
+max_concurrency at a time), and the connections are kept in a pool that is
+shared across calls.
+
+    async with AsyncEmailSender(server_host="smtp.example.com", port=25, ...) as emailer:
+        await emailer.send_email(email_body, email_subject)
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              login raises SMTPNotSupportedError if the server does not
+              advertise AUTH, and only accepts 235.
+              The message is rendered once per call to send_email and reused
+              for every recipient.
+              The envelope is pipelined when the server supports it.
+              Added quit_timeout, so that a server that stops replying cannot
+              hang close.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import base64
+import re
+import socket
+import time
+from smtplib import SMTPAuthenticationError, SMTPConnectError, SMTPDataError, SMTPException, SMTPHeloError, \
+    SMTPNotSupportedError, SMTPRecipientsRefused, SMTPSenderRefused, SMTPServerDisconnected
+from wmul_emailer._validation import _normalize_destination_email_addresses, _resolve_addresses
+from wmul_emailer.templates import RenderedMessageCache
+
+
+class AsyncEmailSender:
+
+    def __init__(self, server_host, port, user_name=None, password=None, from_email_address=None, destination_email_addresses=None,
+                 max_concurrency=10, pool_size=None, pool_idle_timeout=60.0, pool_max_messages_per_connection=100,
+                 template_cache_size=32, quit_timeout=5.0):
+        if destination_email_addresses:
+            destination_email_addresses = _normalize_destination_email_addresses(destination_email_addresses)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+
+        self.server_host = server_host
+        self.port = port
+        self.user_name = user_name
+        self.password = password
+        self.from_email_address = from_email_address
+        self.destination_email_addresses = destination_email_addresses
+        self.max_concurrency = max_concurrency
+
+        self._templates = RenderedMessageCache(max_entries=template_cache_size)
+        self._pool = _AsyncConnectionPool(
+            self._connect,
+            max_size=pool_size or max_concurrency,
+            idle_timeout=pool_idle_timeout,
+            max_messages_per_connection=pool_max_messages_per_connection,
+            quit_timeout=quit_timeout
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        await self._pool.close()
+
+    async def send_email(self, email_body, email_subject, from_email_address=None, destination_email_addresses=None):
+        from_email_address, destination_email_addresses = \
+            _resolve_addresses(self, from_email_address, destination_email_addresses)
+
+        rendered_message = self._templates.get(email_body, email_subject, from_email_address)
+        concurrency = asyncio.Semaphore(self.max_concurrency)
+
+        async def deliver(email_address):
+            msg_bytes = rendered_message.for_recipient(email_address)
+            async with concurrency:
+                await self._pool.sendmail(from_email_address, [email_address], msg_bytes)
+
+        results = await asyncio.gather(
+            *(deliver(email_address) for email_address in destination_email_addresses),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _connect(self):
+        connection = await _AsyncSMTPConnection.open(self.server_host, self.port)
+        try:
+            if self.user_name:
+                await connection.login(self.user_name, self.password)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+
+class _AsyncConnectionPool:
+
+    def __init__(self, connect, max_size, idle_timeout, max_messages_per_connection, health_check_after=5.0,
+                 quit_timeout=None):
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.health_check_after = health_check_after
+        self.quit_timeout = quit_timeout
+        self._idle = []
+        self._slots = None
+        self._closed = False
+
+    async def sendmail(self, from_addr, to_addrs, msg_bytes):
+        connection = await self.acquire()
+        try:
+            try:
+                refused = await connection.sendmail(from_addr, to_addrs, msg_bytes)
+            except SMTPServerDisconnected:
+                connection.close()
+                connection = await self._connect()
+                refused = await connection.sendmail(from_addr, to_addrs, msg_bytes)
+        except BaseException:
+            self.release(connection, discard=True)
+            raise
+        connection.messages_sent += 1
+        self.release(connection, discard=connection.messages_sent >= self.max_messages_per_connection)
+        return refused
+
+    async def acquire(self):
+        if self._closed:
+            raise RuntimeError("The connection pool has been closed.")
+        if self._slots is None:
+            # Created here rather than in __init__ so that it is bound to the
+            # running event loop on older versions of Python.
+            self._slots = asyncio.Semaphore(self.max_size)
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                idle_for = time.monotonic() - connection.last_used
+                if idle_for > self.idle_timeout:
+                    await connection.quit(self.quit_timeout)
+                elif idle_for > self.health_check_after and not await connection.is_alive():
+                    connection.close()
+                else:
+                    return connection
+            return await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        if discard or self._closed:
+            connection.close()
+        else:
+            connection.last_used = time.monotonic()
+            self._idle.append(connection)
+        self._slots.release()
+
+    async def close(self):
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.quit(self.quit_timeout)
+
+
+class _AsyncSMTPConnection:
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self.esmtp_features = {}
+        self.last_used = time.monotonic()
+        self.messages_sent = 0
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        connection = cls(reader, writer)
+        try:
+            code, message = await connection._read_reply()
+            if code != 220:
+                raise SMTPConnectError(code, message)
+            await connection.ehlo()
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    async def command(self, line):
+        self._writer.write(line.encode("utf-8") + b"\r\n")
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def ehlo(self):
+        code, message = await self.command("EHLO " + _local_hostname())
+        if code != 250:
+            code, message = await self.command("HELO " + _local_hostname())
+            if code != 250:
+                raise SMTPHeloError(code, message)
+            return
+        for line in message.decode("utf-8", "replace").split("\n")[1:]:
+            keyword, _, parameters = line.partition(" ")
+            self.esmtp_features[keyword.lower()] = parameters.strip()
+
+    async def login(self, user_name, password):
+        if "auth" not in self.esmtp_features:
+            # As smtplib.SMTP.login does, rather than sending the
+            # credentials to a server that did not offer to take them.
+            raise SMTPNotSupportedError("SMTP AUTH extension not supported by server.")
+        mechanisms = self.esmtp_features["auth"].upper().split()
+        if "PLAIN" in mechanisms or not mechanisms:
+            token = _b64encode("\0{}\0{}".format(user_name, password))
+            code, message = await self.command("AUTH PLAIN " + token)
+        else:
+            code, message = await self.command("AUTH LOGIN " + _b64encode(user_name))
+            if code == 334:
+                code, message = await self.command(_b64encode(password))
+        if code != 235:
+            raise SMTPAuthenticationError(code, message)
+
+    async def sendmail(self, from_addr, to_addrs, msg_bytes):
+        if "pipelining" in self.esmtp_features:
+            refused = await self._start_data_pipelined(from_addr, to_addrs)
+        else:
+            refused = await self._start_data_in_turn(from_addr, to_addrs)
+        self._writer.write(_quote_periods(msg_bytes) + b".\r\n")
+        await self._writer.drain()
+        code, message = await self._read_reply()
+        if code != 250:
+            await self._rset()
+            raise SMTPDataError(code, message)
+        return refused
+
+    async def _start_data_in_turn(self, from_addr, to_addrs):
+        code, message = await self.command("MAIL FROM:<{}>".format(from_addr))
+        if code != 250:
+            await self._rset()
+            raise SMTPSenderRefused(code, message, from_addr)
+        refused = {}
+        for to_addr in to_addrs:
+            code, message = await self.command("RCPT TO:<{}>".format(to_addr))
+            if code not in (250, 251):
+                refused[to_addr] = (code, message)
+        if len(refused) == len(to_addrs):
+            await self._rset()
+            raise SMTPRecipientsRefused(refused)
+        code, message = await self.command("DATA")
+        if code != 354:
+            await self._rset()
+            raise SMTPDataError(code, message)
+        return refused
+
+    async def _start_data_pipelined(self, from_addr, to_addrs):
+        commands = ["MAIL FROM:<{}>".format(from_addr)]
+        commands.extend("RCPT TO:<{}>".format(to_addr) for to_addr in to_addrs)
+        commands.append("DATA")
+        self._writer.write("".join(command + "\r\n" for command in commands).encode("utf-8"))
+        await self._writer.drain()
+        mail_code, mail_message = await self._read_reply()
+        refused = {}
+        for to_addr in to_addrs:
+            code, message = await self._read_reply()
+            if code not in (250, 251):
+                refused[to_addr] = (code, message)
+        data_code, data_message = await self._read_reply()
+        if mail_code != 250 or len(refused) == len(to_addrs) or data_code != 354:
+            if data_code == 354:
+                self._writer.write(b".\r\n")
+                await self._writer.drain()
+                await self._read_reply()
+            await self._rset()
+            if mail_code != 250:
+                raise SMTPSenderRefused(mail_code, mail_message, from_addr)
+            if len(refused) == len(to_addrs):
+                raise SMTPRecipientsRefused(refused)
+            raise SMTPDataError(data_code, data_message)
+        return refused
+
+    async def is_alive(self):
+        try:
+            code, _ = await self.command("NOOP")
+        except (SMTPException, OSError):
+            return False
+        return code == 250
+
+    async def quit(self, timeout=None):
+        """
+        Sends QUIT, and closes the connection once the server replies, or
+        after timeout seconds if it does not.
+        """
+        try:
+            await asyncio.wait_for(self.command("QUIT"), timeout)
+        except (SMTPException, OSError, asyncio.TimeoutError):
+            pass
+        self.close()
+
+    def close(self):
+        self._writer.close()
+
+    async def _rset(self):
+        try:
+            await self.command("RSET")
+        except SMTPServerDisconnected:
+            pass
+
+    async def _read_reply(self):
+        code = None
+        lines = []
+        while True:
+            try:
+                line = await self._reader.readline()
+            except OSError as ose:
+                self.close()
+                raise SMTPServerDisconnected("Connection unexpectedly closed: " + str(ose))
+            if not line:
+                self.close()
+                raise SMTPServerDisconnected("Connection unexpectedly closed")
+            try:
+                code = int(line[:3])
+            except ValueError:
+                code = -1
+            lines.append(line[4:].strip(b" \t\r\n"))
+            if line[3:4] != b"-":
+                break
+        return code, b"\n".join(lines)
+
+
+def _quote_periods(msg_bytes):
+    msg_bytes = re.sub(br"(?m)^\.", b"..", msg_bytes)
+    if not msg_bytes.endswith(b"\r\n"):
+        msg_bytes += b"\r\n"
+    return msg_bytes
+
+
+def _b64encode(text):
+    return base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+
+_hostname = None
+
+
+def _local_hostname():
+    global _hostname
+    if _hostname is None:
+        _hostname = socket.getfqdn()
+    return _hostname
@@ -0,0 +1,309 @@
+"""
+@Author = 'Mike Stanley'
+
+Delivery of large mailing jobs, read from a CSV or JSON Lines file, by a pool
+of processes.
+
+Each record of the input is one e-mail, with the fields email_subject,
+email_body, destination_email_addresses, and, optionally, from_email_address.
+In JSON Lines, destination_email_addresses is a list or a str. In CSV, the
+first row names the columns, and destination_email_addresses is separated by
+commas or semicolons. The input is read as it is sent, so it can be of any
+length.
+
+run_job hands the records, chunk_size at a time, to a pool of processes, no
+more than a few chunks ahead of the ones being sent. Each process has its own
+EmailSender, made from sender_options, and sends its chunks with send_many
+over its own pooled connections. As each chunk finishes, one JSON line per
+e-mail is appended to the output file, with the e-mail's index in the input
+and the outcome for each recipient, and progress is called with the totals so
+far.
+
+The output file is also the checkpoint. With resume, the e-mails that it
+already has a line for are skipped, so a job that was interrupted picks up
+where it left off. Only the chunks that were being sent when it was
+interrupted are sent again.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import re
+import time
+from collections import namedtuple
+from multiprocessing.util import Finalize
+import wmul_emailer
+
+FORMATS = ("csv", "jsonl")
+
+_FIELDS = ("email_subject", "email_body", "destination_email_addresses", "from_email_address")
+
+JobProgress = namedtuple("JobProgress", ["emails", "skipped", "delivered", "failed", "seconds"])
+
+# The sender of this worker process.
+_worker_sender = None
+
+
+def run_job(input_path, output_path, sender_options, processes=4, chunk_size=100, resume=False, input_format=None,
+            progress=None):
+    """
+    Sends every e-mail in input_path, and records the outcomes in
+    output_path. sender_options are the keyword arguments of the EmailSender
+    in each process. Returns the final JobProgress: the e-mails sent and
+    skipped, and the recipients delivered to and not.
+    """
+    if processes < 1:
+        raise ValueError("processes must be at least 1.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    # Bad options are found here, rather than by every worker, over and over,
+    # as the pool replaces each one that fails to start.
+    wmul_emailer.EmailSender(**sender_options).close()
+    if resume:
+        done = completed_indices(output_path)
+    elif os.path.exists(output_path):
+        raise FileExistsError("{} already exists. Resume the job, or choose another output file.".format(output_path))
+    else:
+        done = set()
+
+    totals = _Totals(len(done))
+    start = time.perf_counter()
+    finished = queue.Queue()
+    # Enough chunks in hand that no process waits for the next one.
+    window = 2 * processes
+    with open(output_path, "a", encoding="utf-8") as output_file, \
+            _open_input(input_path, input_format) as records:
+        with multiprocessing.Pool(processes, initializer=_start_worker, initargs=(sender_options,)) as pool:
+            in_flight = 0
+            failure = None
+            for chunk in _chunks(records, done, chunk_size):
+                while in_flight >= window:
+                    failure = _record(finished.get(), output_file, totals) or failure
+                    in_flight -= 1
+                    if progress is not None:
+                        progress(totals.progress(start))
+                if failure is not None:
+                    break
+                pool.apply_async(_send_chunk, (chunk,), callback=finished.put, error_callback=finished.put)
+                in_flight += 1
+            while in_flight:
+                failure = _record(finished.get(), output_file, totals) or failure
+                in_flight -= 1
+                if progress is not None:
+                    progress(totals.progress(start))
+            pool.close()
+            pool.join()
+    if failure is not None:
+        raise failure
+    return totals.progress(start)
+
+
+def read_emails(records_file, input_format):
+    """
+    Yields (index, BatchEmail) for each record of records_file, an open text
+    file, or (index, error) for a record that is not a valid e-mail.
+    """
+    if input_format == "csv":
+        rows = csv.DictReader(records_file)
+    elif input_format == "jsonl":
+        rows = _json_lines(records_file)
+    else:
+        raise ValueError("input_format must be one of {}.".format(", ".join(FORMATS)))
+    for index, row in enumerate(rows):
+        if isinstance(row, ValueError):
+            yield index, row
+            continue
+        try:
+            yield index, _batch_email(row)
+        except (TypeError, ValueError) as error:
+            yield index, error
+
+
+def completed_indices(output_path):
+    """
+    Returns the indices of the e-mails that output_path has results for. A
+    last line that was only partly written, when the job was interrupted, is
+    removed.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r+b") as output_file:
+        good_length = 0
+        for line in output_file:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line.decode("utf-8"))["index"])
+            except (ValueError, KeyError, TypeError):
+                break
+            good_length += len(line)
+        output_file.truncate(good_length)
+    return done
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError("The format of {} cannot be told from its extension. Give it explicitly.".format(path))
+
+
+class _Totals:
+
+    def __init__(self, skipped):
+        self.emails = 0
+        self.skipped = skipped
+        self.delivered = 0
+        self.failed = 0
+
+    def add(self, result):
+        self.emails += 1
+        for recipient in result["recipients"]:
+            if recipient["status"] == "delivered":
+                self.delivered += 1
+            else:
+                self.failed += 1
+
+    def progress(self, start):
+        return JobProgress(self.emails, self.skipped, self.delivered, self.failed, time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def _open_input(input_path, input_format):
+    input_format = input_format or detect_format(input_path)
+    if input_format not in FORMATS:
+        raise ValueError("input_format must be one of {}.".format(", ".join(FORMATS)))
+    with open(input_path, newline="", encoding="utf-8") as records_file:
+        yield read_emails(records_file, input_format)
+
+
+def _record(finished, output_file, totals):
+    """
+    Writes the results of one finished chunk, or returns the exception that
+    the chunk raised instead.
+    """
+    if isinstance(finished, BaseException):
+        return finished
+    for result in finished:
+        output_file.write(json.dumps(result, sort_keys=True) + "\n")
+        totals.add(result)
+    output_file.flush()
+    return None
+
+
+def _chunks(records, done, chunk_size):
+    chunk = []
+    for index, record in records:
+        if index in done:
+            continue
+        chunk.append((index, record))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _start_worker(sender_options):
+    global _worker_sender
+    _worker_sender = wmul_emailer.EmailSender(**sender_options)
+    # Let go of the pooled connections politely when the pool is closed.
+    Finalize(_worker_sender, _worker_sender.close, exitpriority=10)
+
+
+def _send_chunk(chunk):
+    results = []
+    emails = [(index, record) for index, record in chunk if isinstance(record, wmul_emailer.BatchEmail)]
+    batch_results = iter(_worker_sender.send_many(record for _, record in emails))
+    for index, record in chunk:
+        if isinstance(record, wmul_emailer.BatchEmail):
+            results.append(_result(index, next(batch_results)))
+        else:
+            results.append({"index": index, "error": str(record), "recipients": []})
+    return results
+
+
+def _result(index, batch_result):
+    if batch_result.error is not None:
+        addresses = batch_result.email.destination_email_addresses or []
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        error = "{}: {}".format(type(batch_result.error).__name__, batch_result.error)
+        return {
+            "index": index,
+            "error": error,
+            "recipients": [
+                {"address": address, "status": "failed", "code": getattr(batch_result.error, "smtp_code", None),
+                 "error": error}
+                for address in addresses
+            ],
+        }
+    return {
+        "index": index,
+        "error": None,
+        "recipients": [
+            {
+                "address": recipient.address,
+                "status": recipient.status,
+                "code": recipient.code,
+                "error": None if recipient.error is None else "{}: {}".format(
+                    type(recipient.error).__name__, recipient.error
+                ),
+            }
+            for recipient in batch_result.refused.recipients.values()
+        ],
+    }
+
+
+def _batch_email(row):
+    if not isinstance(row, dict):
+        raise TypeError("Each record must be an object with the fields {}.".format(", ".join(_FIELDS)))
+    missing = [field for field in _FIELDS[:3] if not row.get(field)]
+    if missing:
+        raise ValueError("The record is missing {}.".format(", ".join(missing)))
+    destination_email_addresses = row["destination_email_addresses"]
+    if isinstance(destination_email_addresses, str):
+        destination_email_addresses = [
+            address.strip() for address in re.split(r"[,;]", destination_email_addresses) if address.strip()
+        ]
+    return wmul_emailer.BatchEmail(
+        row["email_subject"],
+        row["email_body"],
+        destination_email_addresses,
+        row.get("from_email_address") or None
+    )
+
+
+def _json_lines(records_file):
+    for line in records_file:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield error
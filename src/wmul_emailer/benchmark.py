@@ -0,0 +1,383 @@
+"""
+@Author = 'Mike Stanley'
+
+Benchmarks of EmailSender.send_email against the in-process stand-in server
+(wmul_emailer.testing.LocalSMTPServer), so that releases can be compared.
+
+Each Scenario sends messages e-mails of body_size bytes, each to recipients
+recipients, with parallel_connections connections (pooled, if there is more
+than one), to a server that adds latency seconds to every round trip and
+fails failure_rate (with 451) or disconnect_rate (by dropping the connection)
+of the messages it receives. If tls is "starttls" or "implicit", the
+connections use TLS, resuming the previous session if tls_session_resumption
+is True. If pooled is False, every e-mail opens a new connection, so the cost
+of the handshakes shows. If transport is "memory", the e-mails go to a
+MemoryTransport instead of the server, which measures the cost of
+EmailSender itself. run_scenario measures the e-mails and recipients
+sent per second, the percentiles of the time each send_email call took, and
+the peak memory allocated by one call, traced in a separate run so that
+tracing does not slow the timed one. With TLS, it also counts the handshakes
+the server did, and how many of them resumed a session.
+
+import_time measures how long importing wmul_emailer takes in a new Python
+process, and which modules it imports, for the scripts that only import it in
+case they have to report a failure. Given a statement, it also times running
+it after the import, such as CONSTRUCT_STATEMENT, which constructs an
+EmailSender, as those scripts do at startup. Only the fastest of several runs
+counts, since the others are slowed by whatever else the machine was doing.
+
+run returns the results of several scenarios, with the versions of
+wmul_emailer and Python that produced them, as a dict that save writes as
+JSON. compare lists the ways in which one set of results is worse than
+another, such as a baseline saved from the previous release.
+
+    results = run(QUICK_SCENARIOS)
+    save(results, "results.json")
+    for regression in compare(load("baseline.json"), results):
+        print(regression)
+
+The same is available from the command line as wmul_emailer_benchmark.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Added the TLS scenarios.
+              Added import_time.
+              Added the memory transport scenarios.
+              import_time can time a statement after the import, and run
+              times constructing an EmailSender.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import contextlib
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+import wmul_emailer
+from wmul_emailer.testing import LocalSMTPServer, client_tls_context, server_tls_context
+from wmul_emailer.transports import MemoryTransport
+
+RESULTS_FORMAT = 1
+
+Scenario = namedtuple(
+    "Scenario",
+    ["name", "messages", "recipients", "body_size", "parallel_connections", "latency", "failure_rate",
+     "disconnect_rate", "tls", "tls_session_resumption", "pooled", "transport"]
+)
+# Set this way, rather than with namedtuple's defaults, for Python 3.6.
+Scenario.__new__.__defaults__ = (1, 0.0, 0.0, 0.0, None, True, True, None)
+
+
+def _grid(messages, recipient_counts, body_sizes, concurrencies, latency):
+    return [
+        Scenario(
+            "r{}-b{}-c{}-l{}".format(recipients, body_size, parallel_connections, latency),
+            messages, recipients, body_size, parallel_connections, latency
+        )
+        for recipients in recipient_counts
+        for body_size in body_sizes
+        for parallel_connections in concurrencies
+    ]
+
+
+def _tls_scenarios(messages):
+    """
+    A new connection for every e-mail, with a full handshake each time, then
+    with resumed sessions, and with implicit TLS, and then pooled
+    connections, which only do the handshake once.
+    """
+    return [
+        Scenario("tls-starttls-full", messages, 1, 1024, pooled=False, tls="starttls", tls_session_resumption=False),
+        Scenario("tls-starttls-resumed", messages, 1, 1024, pooled=False, tls="starttls"),
+        Scenario("tls-implicit-resumed", messages, 1, 1024, pooled=False, tls="implicit"),
+        Scenario("tls-starttls-pooled", messages, 1, 1024, tls="starttls"),
+    ]
+
+
+DEFAULT_SCENARIOS = _grid(50, (1, 10, 100), (1024, 100 * 1024, 1024 * 1024), (1, 4), 0.0) + \
+    _grid(20, (10,), (1024,), (1, 4), 0.005) + [
+        Scenario("r10-b1024-c4-failures", 50, 10, 1024, 4, 0.0, failure_rate=0.05, disconnect_rate=0.02),
+    ] + _tls_scenarios(100) + [
+        Scenario("memory-r1-b1024", 10000, 1, 1024, transport="memory"),
+        Scenario("memory-r100-b1024", 1000, 100, 1024, transport="memory"),
+    ]
+
+QUICK_SCENARIOS = _grid(10, (1, 10), (1024, 100 * 1024), (1, 4), 0.0) + [
+    Scenario("r10-b1024-c4-failures", 10, 10, 1024, 4, 0.0, failure_rate=0.05, disconnect_rate=0.02),
+] + _tls_scenarios(10) + [
+    Scenario("memory-r1-b1024", 1000, 1, 1024, transport="memory"),
+]
+
+# How much worse a measurement may be than the baseline before compare
+# reports it.
+DEFAULT_TOLERANCE = 0.2
+
+_PERCENTILES = (50, 90, 99)
+
+# Constructs an EmailSender, without connecting, for import_time to time.
+CONSTRUCT_STATEMENT = 'wmul_emailer.EmailSender("localhost")'
+
+# Run in a new process by import_time. It prints the seconds the import and
+# statement took, then the modules they imported.
+_IMPORT_TIME_SCRIPT = """
+import sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+{statement}
+seconds = time.perf_counter() - start
+print(seconds)
+print("\\n".join(sorted(set(sys.modules) - before)))
+"""
+
+
+def run(scenarios=DEFAULT_SCENARIOS, progress=None):
+    """
+    Runs each of scenarios, and returns the results. progress, if provided,
+    is called with the result of each scenario as it finishes.
+    """
+    results = []
+    for scenario in scenarios:
+        result = run_scenario(scenario)
+        if progress is not None:
+            progress(result)
+        results.append(result)
+    return {
+        "format": RESULTS_FORMAT,
+        "wmul_emailer": wmul_emailer.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "results": results,
+        "import_time": import_time(),
+        "construct_time": import_time(statement=CONSTRUCT_STATEMENT),
+    }
+
+
+def run_scenario(scenario):
+    body = _body(scenario.body_size)
+    addresses = ["recipient{}@example.com".format(index) for index in range(scenario.recipients)]
+    with contextlib.ExitStack() as stack:
+        server = None
+        if scenario.transport is None:
+            server = stack.enter_context(LocalSMTPServer(
+                latency=scenario.latency, keep_data=False, failure_rate=scenario.failure_rate,
+                disconnect_rate=scenario.disconnect_rate, seed=0,
+                tls_context=server_tls_context() if scenario.tls else None,
+                implicit_tls=scenario.tls == "implicit"
+            ))
+        emailer = stack.enter_context(_sender(server, scenario))
+        # Once untimed, so that the timed calls use a warm pool and cache.
+        emailer.send_email(body, "Benchmark", destination_email_addresses=addresses)
+        handshakes_before, resumed_before = _handshakes(server)
+        latencies = []
+        delivered = 0
+        start = time.perf_counter()
+        for _ in range(scenario.messages):
+            call_start = time.perf_counter()
+            send_result = emailer.send_email(body, "Benchmark", destination_email_addresses=addresses)
+            latencies.append(time.perf_counter() - call_start)
+            delivered += len(send_result.delivered)
+        elapsed = time.perf_counter() - start
+        handshakes_after, resumed_after = _handshakes(server)
+        tls_handshakes = handshakes_after - handshakes_before
+        tls_resumed = resumed_after - resumed_before
+        peak_memory = _peak_memory(lambda: emailer.send_email(
+            body, "Benchmark", destination_email_addresses=addresses
+        ))
+    attempted = scenario.messages * scenario.recipients
+    latencies.sort()
+    return {
+        "scenario": scenario._asdict(),
+        "seconds": elapsed,
+        "emails_per_second": scenario.messages / elapsed,
+        "recipients_per_second": delivered / elapsed,
+        "latency": dict(
+            [("p{}".format(percent), _percentile(latencies, percent)) for percent in _PERCENTILES] +
+            [("max", latencies[-1])]
+        ),
+        "peak_memory_bytes": peak_memory,
+        "tls_handshakes": tls_handshakes,
+        "tls_resumed": tls_resumed,
+        "delivered": delivered,
+        "failed": attempted - delivered,
+    }
+
+
+def import_time(module="wmul_emailer", runs=5, statement=None):
+    """
+    Imports module, and then runs statement, if provided, in runs new Python
+    processes, and returns the fewest seconds it took, and the modules that
+    it imported.
+    """
+    seconds = None
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_TIME_SCRIPT.format(module=module, statement=statement or "")],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True
+        ).stdout.split()
+        seconds = float(output[0]) if seconds is None else min(seconds, float(output[0]))
+        modules = output[1:]
+    return {"module": module, "statement": statement, "seconds": seconds, "modules": modules}
+
+
+def save(results, path):
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as results_file:
+        return json.load(results_file)
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns a description of each measurement in current that is more than
+    tolerance (a fraction) worse than the same measurement of the same
+    scenario in baseline. Scenarios that are not in both are skipped.
+    """
+    baseline_results = {result["scenario"]["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        name = result["scenario"]["name"]
+        previous = baseline_results.get(name)
+        if previous is None:
+            continue
+        checks = [("e-mails per second", previous["emails_per_second"], result["emails_per_second"], False)]
+        checks += [
+            ("{} latency".format(key), previous["latency"][key], result["latency"][key], True)
+            for key in ("p50", "p99")
+        ]
+        checks.append(("peak memory", previous["peak_memory_bytes"], result["peak_memory_bytes"], True))
+        for measurement, before, after, lower_is_better in checks:
+            if not before:
+                continue
+            change = (after - before) / before
+            if (change if lower_is_better else -change) > tolerance:
+                regressions.append("{}: {} went from {:.6g} to {:.6g} ({:+.0%}).".format(
+                    name, measurement, before, after, change
+                ))
+    for key in ("import_time", "construct_time"):
+        previous, measured = baseline.get(key), current.get(key)
+        if not (previous and measured):
+            continue
+        checks = [
+            ("import time", previous["seconds"], measured["seconds"]),
+            ("modules imported", len(previous["modules"]), len(measured["modules"])),
+        ]
+        for measurement, before, after in checks:
+            if before and (after - before) / before > tolerance:
+                regressions.append("{}: {} went from {:.6g} to {:.6g} ({:+.0%}).".format(
+                    _import_label(measured), measurement, before, after, (after - before) / before
+                ))
+    return regressions
+
+
+def format_import_time(measured):
+    return "{:<30} {:>10.2f} ms  {} modules".format(
+        _import_label(measured), measured["seconds"] * 1000, len(measured["modules"])
+    )
+
+
+def _import_label(measured):
+    label = "import {}".format(measured["module"])
+    if measured.get("statement"):
+        label += "; {}".format(measured["statement"])
+    return label
+
+
+def format_result(result):
+    scenario = result["scenario"]
+    return "{:<30} {:>10.1f} e-mails/s {:>10.1f} recipients/s  p50 {:>8.2f} ms  p99 {:>8.2f} ms  " \
+           "peak {:>8.1f} KiB  failed {}".format(
+               scenario["name"],
+               result["emails_per_second"],
+               result["recipients_per_second"],
+               result["latency"]["p50"] * 1000,
+               result["latency"]["p99"] * 1000,
+               result["peak_memory_bytes"] / 1024,
+               result["failed"]
+           )
+
+
+def _sender(server, scenario):
+    parallel_connections = scenario.parallel_connections
+    if scenario.transport == "memory":
+        return wmul_emailer.EmailSender(
+            from_email_address="benchmark@example.com",
+            pool_size=parallel_connections if scenario.pooled else None,
+            parallel_connections=parallel_connections,
+            continue_on_error=True,
+            # Keeps none of the messages, so that memory does not grow.
+            transport=MemoryTransport(max_messages=0)
+        )
+    return wmul_emailer.EmailSender(
+        server.host,
+        port=server.port,
+        from_email_address="benchmark@example.com",
+        pool_size=parallel_connections if scenario.pooled else None,
+        parallel_connections=parallel_connections,
+        continue_on_error=True,
+        deferral_retry_delay=0.001,
+        tls=scenario.tls,
+        ssl_context=client_tls_context() if scenario.tls else None,
+        tls_session_resumption=scenario.tls_session_resumption
+    )
+
+
+def _handshakes(server):
+    if server is None:
+        return 0, 0
+    return server.tls_handshake_count, server.tls_resumed_count
+
+
+def _body(size):
+    line = "The quick brown fox jumps over the lazy dog. 0123456789 abcdefghijklmnopqrst\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def _peak_memory(function):
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.clear_traces()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return max(peak - baseline, 0)
+
+
+def _percentile(ordered, percent):
+    """
+    The nearest-rank percentile of ordered, a sorted list.
+    """
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
@@ -4,7 +4,28 @@
 A cli is provided to test that the credentials are functional and that the 
 system can send e-mails.
 
+The spool command inspects or delivers the e-mails waiting in a spool 
+directory. (See wmul_emailer.spool.)
+
+The benchmark command measures send_email against the in-process stand-in
+server, saves the results, and compares them with a baseline. (See
+wmul_emailer.benchmark.)
+
+The batch command sends every e-mail in a CSV or JSON Lines file, with a pool
+of processes, and records the outcome for each recipient. (See
+wmul_emailer.batchjob.)
+
 ============ Change Log ============
+10/18/2026 = Added the benchmark command.
+             Added the batch command.
+             The benchmark and batch commands import their modules when they
+             run, so that the other commands, and --help, start faster.
+             The benchmark command also prints how long constructing an
+             EmailSender takes.
+
+10/18/2026 = Added the spool command, with the inspect and flush subcommands,
+             to look at and deliver the e-mails in an on-disk spool.
+
 01/17/2023 = Changed License from GPLv2 to GPLv3.
 
 01/13/2023 = Added documentation.
@@ -76,3 +97,153 @@ def send_test_email(email, server, port, username, password, from_address,
                     "If you are reading this, the software is configured correctly.",
             email_subject="Test e-mail from wmul_emailer"
         )
+
+
+@click.group()
+@click.version_option()
+def spool():
+    pass
+
+
+@spool.command()
+@click.argument("spool_directory", type=click.Path(file_okay=False))
+def inspect(spool_directory):
+    """List the e-mails waiting in SPOOL_DIRECTORY."""
+    with wmul_emailer.Spool(spool_directory) as email_spool:
+        count = 0
+        for spooled_email in email_spool.pending():
+            count += 1
+            print("{}\t{}\t{}\t{}\tattempts={}".format(
+                spooled_email.email_id,
+                spooled_email.from_email_address,
+                ",".join(spooled_email.destination_email_addresses),
+                spooled_email.email_subject,
+                spooled_email.attempts
+            ))
+        print("{} e-mail(s) in the spool.".format(count))
+
+
+@spool.command()
+@click.argument("spool_directory", type=click.Path(file_okay=False))
+@click.option("--server", type=str, required=True,
+              help="The hostname or ip address of the smtp server.")
+@click.option("--port", type=int, default=25,
+              help="The port number on which the smtp server resides.")
+@click.option("--username", type=str,
+              help="The username to authenticate with the smtp server.")
+@click.option("--password", type=str,
+              help="The password to authenticate with the smtp server.")
+def flush(spool_directory, server, port, username, password):
+    """Deliver the e-mails in SPOOL_DIRECTORY that are due."""
+    with wmul_emailer.EmailSender(
+        server_host=server,
+        port=port,
+        user_name=username,
+        password=password,
+        spool_directory=spool_directory
+    ) as emailer:
+        result = emailer.drain_spool()
+    print("Delivered: {}, Deferred: {}, Failed: {}".format(
+        result.delivered, result.deferred, result.failed
+    ))
+
+
+@click.command()
+@click.version_option()
+@click.option("--output", type=click.Path(dir_okay=False),
+              help="The JSON file to save the results in.")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False),
+              help="The JSON file of earlier results to compare these with.")
+@click.option("--tolerance", type=float, default=0.2,
+              help="How much worse than the baseline, as a fraction, a measurement may be.")
+@click.option("--quick", is_flag=True,
+              help="Run a few small scenarios instead of the full set.")
+def benchmark(output, baseline, tolerance, quick):
+    """Benchmark send_email. Exits with 1 if it is slower than the baseline."""
+    from wmul_emailer import benchmark as benchmark_module
+
+    scenarios = benchmark_module.QUICK_SCENARIOS if quick else benchmark_module.DEFAULT_SCENARIOS
+    results = benchmark_module.run(
+        scenarios,
+        progress=lambda result: print(benchmark_module.format_result(result), flush=True)
+    )
+    print(benchmark_module.format_import_time(results["import_time"]))
+    print(benchmark_module.format_import_time(results["construct_time"]))
+    if output:
+        benchmark_module.save(results, output)
+    if baseline:
+        regressions = benchmark_module.compare(benchmark_module.load(baseline), results, tolerance)
+        for regression in regressions:
+            print(regression)
+        if regressions:
+            raise SystemExit(1)
+        print("No regressions.")
+
+
+@click.command()
+@click.version_option()
+@click.argument("input_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_file", type=click.Path(dir_okay=False))
+@click.option("--format", "input_format", type=click.Choice(["csv", "jsonl"]),
+              help="The format of INPUT_FILE. By default, it is told from the extension.")
+@click.option("--server", type=str, required=True,
+              help="The hostname or ip address of the smtp server.")
+@click.option("--port", type=int, default=25,
+              help="The port number on which the smtp server resides.")
+@click.option("--username", type=str,
+              help="The username to authenticate with the smtp server.")
+@click.option("--password", type=str,
+              help="The password to authenticate with the smtp server.")
+@click.option("--from_address", type=str,
+              help="The 'from' e-mail address of the e-mails that do not have their own.")
+@click.option("--tls", type=click.Choice(["starttls", "implicit"]),
+              help="Use TLS, by STARTTLS or implicitly (SMTPS).")
+@click.option("--processes", type=int, default=4,
+              help="The number of processes to send with.")
+@click.option("--connections", type=int, default=2,
+              help="The number of smtp connections in each process.")
+@click.option("--chunk_size", type=int, default=100,
+              help="The number of e-mails handed to a process at a time.")
+@click.option("--resume", is_flag=True,
+              help="Skip the e-mails that OUTPUT_FILE already has results for.")
+def batch(input_file, output_file, input_format, server, port, username, password, from_address, tls, processes,
+          connections, chunk_size, resume):
+    """Send every e-mail in INPUT_FILE and write the outcomes to OUTPUT_FILE."""
+    from wmul_emailer import batchjob
+
+    sender_options = {
+        "server_host": server,
+        "port": port,
+        "user_name": username,
+        "password": password,
+        "from_email_address": from_address,
+        "pool_size": connections,
+        "parallel_connections": connections,
+        "tls": tls,
+        "continue_on_error": True,
+    }
+    last_report = [0.0]
+
+    def report(progress):
+        if progress.seconds - last_report[0] >= 1.0:
+            last_report[0] = progress.seconds
+            print(_describe_progress(progress), flush=True)
+
+    try:
+        progress = batchjob.run_job(input_file, output_file, sender_options, processes=processes,
+                                    chunk_size=chunk_size, resume=resume, input_format=input_format,
+                                    progress=report)
+    except (FileExistsError, ValueError) as error:
+        raise click.ClickException(str(error))
+    print(_describe_progress(progress))
+
+
+def _describe_progress(progress):
+    return "Sent {} e-mail(s), skipped {} already sent. Recipients delivered: {}, not delivered: {}. " \
+           "{:.1f} e-mails/s.".format(
+               progress.emails,
+               progress.skipped,
+               progress.delivered,
+               progress.failed,
+               progress.emails / progress.seconds if progress.seconds else 0.0
+           )
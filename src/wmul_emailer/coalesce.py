@@ -0,0 +1,205 @@
+"""
+@Author = 'Mike Stanley'
+
+Coalescing of repeated e-mails, such as the same alert sent on every pass of
+a failing loop.
+
+Coalescer.offer is told about each e-mail before it is sent, and returns
+whether to send it. The first e-mail with a given subject, body, from
+address, and recipients is sent. Repeats of it within window seconds are not,
+and are only counted. Only a hash of each e-mail, its subject, and the start
+of its body are kept, for at most max_entries different e-mails, the least
+recently repeated of which are forgotten first, so memory stays bounded, and a
+repeat costs one hash and one dictionary lookup. If the e-mail that offer let
+through could not be sent, Coalescer.forget is told, so that the next repeat
+is sent instead of being counted.
+
+take_digests returns, and forgets, the counts of the repeats since the last
+time it was called, as one Digest e-mail for each from address and set of
+recipients, so that they still hear how often each e-mail happened.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Added forget.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+Digest = namedtuple("Digest", ["email_body", "email_subject", "from_email_address", "destination_email_addresses"])
+
+# How much of each body is kept, to quote in the digest.
+_EXCERPT_LENGTH = 200
+
+
+class _Entry:
+    __slots__ = ("expires_at", "email_subject", "excerpt", "from_email_address", "destination_email_addresses",
+                 "repeats", "first_repeat", "last_repeat")
+
+    def __init__(self, expires_at, email_subject, excerpt, from_email_address, destination_email_addresses):
+        self.expires_at = expires_at
+        self.email_subject = email_subject
+        self.excerpt = excerpt
+        self.from_email_address = from_email_address
+        self.destination_email_addresses = destination_email_addresses
+        self.repeats = 0
+        self.first_repeat = None
+        self.last_repeat = None
+
+
+class Coalescer:
+
+    def __init__(self, window, max_entries=1024, clock=time.monotonic, wall_clock=time.time):
+        if window <= 0:
+            raise ValueError("window must be greater than 0.")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.window = window
+        self.max_entries = max_entries
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._entries = OrderedDict()
+        # Forgotten entries whose repeats are not in a digest yet.
+        self._retired = []
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def offer(self, email_body, email_subject, from_email_address, destination_email_addresses):
+        """
+        Returns True if the e-mail should be sent, or False if it repeats one
+        sent less than window seconds ago.
+        """
+        key = _key(email_body, email_subject, from_email_address, destination_email_addresses)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    wall_time = self._wall_clock()
+                    if entry.first_repeat is None:
+                        entry.first_repeat = wall_time
+                    entry.last_repeat = wall_time
+                    entry.repeats += 1
+                    self.suppressed += 1
+                    self._entries.move_to_end(key)
+                    return False
+                del self._entries[key]
+                self._retire(entry)
+            self._entries[key] = _Entry(
+                now + self.window,
+                email_subject,
+                email_body[:_EXCERPT_LENGTH],
+                from_email_address,
+                tuple(destination_email_addresses)
+            )
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._retire(evicted)
+            return True
+
+    def forget(self, email_body, email_subject, from_email_address, destination_email_addresses):
+        """
+        Forgets the e-mail, which offer returned True for but which was not
+        delivered, so that the next repeat of it is sent. The repeats already
+        counted are kept for the digest.
+        """
+        key = _key(email_body, email_subject, from_email_address, destination_email_addresses)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._retire(entry)
+
+    def take_digests(self):
+        """
+        Returns a Digest for each from address and set of recipients that
+        have had repeats since the last call, and starts counting again.
+        """
+        with self._lock:
+            repeated = self._retired
+            self._retired = []
+            for entry in self._entries.values():
+                if entry.repeats:
+                    repeated.append(_copy_repeats(entry))
+                    entry.repeats = 0
+                    entry.first_repeat = entry.last_repeat = None
+        by_audience = OrderedDict()
+        for entry in repeated:
+            by_audience.setdefault((entry.from_email_address, entry.destination_email_addresses), []).append(entry)
+        return [
+            Digest(_digest_body(entries, self.window), _digest_subject(entries), from_email_address,
+                   list(destination_email_addresses))
+            for (from_email_address, destination_email_addresses), entries in by_audience.items()
+        ]
+
+    def _retire(self, entry):
+        if not entry.repeats:
+            return
+        self._retired.append(entry)
+        if len(self._retired) > self.max_entries:
+            # Keep memory bounded even if no digests are taken.
+            del self._retired[0]
+
+
+def _key(email_body, email_subject, from_email_address, destination_email_addresses):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (email_subject, email_body, from_email_address, *destination_email_addresses):
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.digest()
+
+
+def _copy_repeats(entry):
+    copy = _Entry(entry.expires_at, entry.email_subject, entry.excerpt, entry.from_email_address,
+                  entry.destination_email_addresses)
+    copy.repeats = entry.repeats
+    copy.first_repeat = entry.first_repeat
+    copy.last_repeat = entry.last_repeat
+    return copy
+
+
+def _digest_subject(entries):
+    total = sum(entry.repeats for entry in entries)
+    if len(entries) == 1:
+        return "Repeated {} more time(s): {}".format(total, entries[0].email_subject)
+    return "{} repeats of {} e-mails were not sent".format(total, len(entries))
+
+
+def _digest_body(entries, window):
+    lines = [
+        "These e-mails were sent, and then repeated within {} seconds of being sent. "
+        "The repeats were not sent.".format(window),
+        "",
+    ]
+    for entry in sorted(entries, key=lambda entry: -entry.repeats):
+        lines.append("{} more time(s): {}".format(entry.repeats, entry.email_subject))
+        lines.append("    Between {} and {}".format(_format_time(entry.first_repeat), _format_time(entry.last_repeat)))
+        excerpt = entry.excerpt.strip().splitlines()
+        if excerpt:
+            lines.append("    " + excerpt[0])
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _format_time(wall_time):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall_time))
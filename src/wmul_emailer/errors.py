@@ -0,0 +1,70 @@
+"""
+@Author = 'Mike Stanley'
+
+Exceptions raised by wmul_emailer, other than the TypeError and ValueError
+raised for bad arguments and the smtplib exceptions that are passed through
+from the smtp server.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Added NoRelayAvailableError and SendTimeoutError.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import socket
+from smtplib import SMTPException
+
+
+class MessageTooLargeError(SMTPException):
+    """
+    Raised, before the message is uploaded, when a message is larger than the
+    limit that the smtp server advertises with the SIZE extension.
+    """
+
+    def __init__(self, size, limit):
+        super().__init__("The message is {} bytes, but the server only accepts {} bytes.".format(size, limit))
+        self.size = size
+        self.limit = limit
+
+
+class NoRelayAvailableError(SMTPException):
+    """
+    Raised when every relay has failed, or is being skipped by its circuit
+    breaker.
+    """
+
+
+class SendTimeoutError(SMTPException, TimeoutError):
+    """
+    Raised when sending takes longer than one of the timeouts allows. phase is
+    "connect", "command", "send", "pool", or "deadline", for the timeout that
+    ran out, and timeout is its length in seconds.
+    """
+
+    def __init__(self, phase, timeout):
+        super().__init__("The {} timed out after {} seconds.".format(phase, timeout))
+        self.phase = phase
+        self.timeout = timeout
+
+
+def _caused_by_timeout(error):
+    while error is not None:
+        if isinstance(error, (TimeoutError, socket.timeout)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
@@ -0,0 +1,236 @@
+"""
+@Author = 'Mike Stanley'
+
+Instrumentation of EmailSender, to show where the time goes when sending.
+
+An EmailSender that is given an observer tells it about each phase of sending
+as it finishes, with how long it took, and about the connections it opens and
+reuses, the messages it sends, and the outcome for each recipient. Observer
+does nothing with any of these; subclass it and override the methods of
+interest. Metrics is an Observer that keeps counters and latency histograms,
+and exports them as a dict or in the Prometheus text format.
+
+The phases are:
+    "connect"   Opening a connection, up to the server's greeting.
+    "tls"       The TLS handshake, for STARTTLS or implicit TLS.
+    "login"     Logging in, if there are credentials.
+    "pool_wait" Waiting for a pooled connection, and opening it if it is new.
+    "render"    Building the message.
+    "throttle"  Waiting for the rate limits.
+    "send"      One transaction, from MAIL FROM to the reply to the data.
+
+The observer is called from whichever thread is sending, so it must be
+thread-safe, and it is called between the commands of a send, so it should be
+quick.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Added the tls phase and tls_handshake.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import threading
+from collections import defaultdict
+
+# The default buckets of the Prometheus client libraries, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Observer:
+    """
+    server, where it is passed, is the "host:port" of the smtp server.
+    """
+
+    def phase(self, name, seconds, server=None):
+        pass
+
+    def connection_opened(self, server):
+        pass
+
+    def connection_reused(self, server):
+        pass
+
+    def message_sent(self, size, server):
+        pass
+
+    def tls_handshake(self, server, resumed):
+        """
+        resumed is whether the handshake resumed an earlier TLS session.
+        """
+
+    def recipient(self, result):
+        """
+        result is the RecipientResult of one recipient of a send_email or
+        send_streamed_email call, once the call is finished.
+        """
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self):
+        """
+        Returns (upper bound, count of the values at most that bound) for each
+        bucket, ending with (float("inf"), count).
+        """
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative.append((bound, total))
+        cumulative.append((float("inf"), self.count))
+        return cumulative
+
+
+class Metrics(Observer):
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._phases = {}
+        self._connections_opened = defaultdict(int)
+        self._connections_reused = defaultdict(int)
+        self._messages_sent = defaultdict(int)
+        self._bytes_sent = defaultdict(int)
+        self._tls_handshakes = defaultdict(int)
+        self._tls_resumed = defaultdict(int)
+        self._recipients = defaultdict(int)
+
+    def phase(self, name, seconds, server=None):
+        key = (name, server)
+        with self._lock:
+            histogram = self._phases.get(key)
+            if histogram is None:
+                histogram = self._phases[key] = Histogram(self._buckets)
+            histogram.observe(seconds)
+
+    def connection_opened(self, server):
+        with self._lock:
+            self._connections_opened[server] += 1
+
+    def connection_reused(self, server):
+        with self._lock:
+            self._connections_reused[server] += 1
+
+    def message_sent(self, size, server):
+        with self._lock:
+            self._messages_sent[server] += 1
+            self._bytes_sent[server] += size
+
+    def tls_handshake(self, server, resumed):
+        with self._lock:
+            self._tls_handshakes[server] += 1
+            if resumed:
+                self._tls_resumed[server] += 1
+
+    def recipient(self, result):
+        with self._lock:
+            self._recipients[result.status] += 1
+
+    def reset(self):
+        with self._lock:
+            self._phases.clear()
+            for counter in self._counters().values():
+                counter.clear()
+
+    def snapshot(self):
+        """
+        Returns the metrics so far as a dict that can be serialized as JSON.
+        Each counter maps its servers (or recipient statuses) to its count.
+        "phases" is a list with the histogram of each phase, on each server.
+        """
+        with self._lock:
+            snapshot = {name: dict(counter) for name, counter in self._counters().items()}
+            snapshot["phases"] = [
+                {
+                    "phase": name,
+                    "server": server,
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": [[_format_bound(bound), count] for bound, count in histogram.cumulative_counts()],
+                }
+                for (name, server), histogram in sorted(self._phases.items(), key=_phase_order)
+            ]
+        return snapshot
+
+    def prometheus(self, prefix="wmul_emailer"):
+        """
+        Returns the metrics so far in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for name, counter in self._counters().items():
+                metric = "{}_{}_total".format(prefix, name)
+                label = "status" if name == "recipients" else "server"
+                lines.append("# TYPE {} counter".format(metric))
+                for key, value in sorted(counter.items(), key=lambda item: str(item[0])):
+                    lines.append("{}{} {}".format(metric, _labels([(label, key)]), value))
+            metric = "{}_phase_seconds".format(prefix)
+            lines.append("# TYPE {} histogram".format(metric))
+            for (name, server), histogram in sorted(self._phases.items(), key=_phase_order):
+                labels = [("phase", name), ("server", server)]
+                for bound, count in histogram.cumulative_counts():
+                    lines.append("{}_bucket{} {}".format(metric, _labels(labels + [("le", _format_bound(bound))]), count))
+                lines.append("{}_sum{} {}".format(metric, _labels(labels), histogram.sum))
+                lines.append("{}_count{} {}".format(metric, _labels(labels), histogram.count))
+        return "\n".join(lines) + "\n"
+
+    def _counters(self):
+        return {
+            "connections_opened": self._connections_opened,
+            "connections_reused": self._connections_reused,
+            "messages_sent": self._messages_sent,
+            "bytes_sent": self._bytes_sent,
+            "tls_handshakes": self._tls_handshakes,
+            "tls_resumed": self._tls_resumed,
+            "recipients": self._recipients,
+        }
+
+
+def _labels(pairs):
+    pairs = [(name, value) for name, value in pairs if value is not None]
+    if not pairs:
+        return ""
+    return "{" + ",".join("{}=\"{}\"".format(name, _escape(value)) for name, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _phase_order(item):
+    (name, server), _ = item
+    return name, server or ""
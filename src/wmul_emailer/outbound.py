@@ -0,0 +1,139 @@
+"""
+@Author = 'Mike Stanley'
+
+A bounded in-process queue of outbound e-mails, drained by a background
+thread, so that EmailSender.enqueue_email can return without waiting for the
+smtp server.
+
+full_policy decides what happens when the queue is full:
+    "block"       put waits for room in the queue.
+    "drop_oldest" The oldest queued e-mail is discarded to make room.
+    "raise"       put raises queue.Full.
+
+The queue is drained when it is closed, and when the process exits, so that
+queued e-mails are not lost.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+_logger = logging.getLogger(__name__)
+
+FULL_POLICIES = ("block", "drop_oldest", "raise")
+
+_STOP = object()
+
+
+class OutboundQueue:
+    """
+    deliver is called on the background thread with the items that are put
+    into the queue, one at a time.
+    """
+
+    def __init__(self, deliver, max_size=1000, full_policy="block"):
+        if full_policy not in FULL_POLICIES:
+            raise ValueError("full_policy must be one of {}.".format(", ".join(FULL_POLICIES)))
+        self._deliver = deliver
+        self.full_policy = full_policy
+        self._queue = queue.Queue(max_size)
+        self._condition = threading.Condition()
+        self._unfinished = 0
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.dropped = 0
+        self.failed = 0
+
+    def put(self, item):
+        if self._closed:
+            raise RuntimeError("The outbound queue has been closed.")
+        self._ensure_started()
+        with self._condition:
+            self._unfinished += 1
+        try:
+            if self.full_policy == "block":
+                self._queue.put(item)
+            elif self.full_policy == "raise":
+                self._queue.put_nowait(item)
+            else:
+                self._put_dropping_oldest(item)
+        except BaseException:
+            self._task_done()
+            raise
+
+    def flush(self, timeout=None):
+        with self._condition:
+            return self._condition.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def close(self, timeout=None):
+        with self._start_lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            atexit.unregister(self.close)
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="wmul_emailer outbound queue", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _put_dropping_oldest(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self.dropped += 1
+                self._task_done()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            try:
+                self._deliver(item)
+            except Exception:
+                self.failed += 1
+                _logger.exception("Failed to send a queued e-mail.")
+            finally:
+                self._task_done()
+
+    def _task_done(self):
+        with self._condition:
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._condition.notify_all()
@@ -0,0 +1,146 @@
+"""
+@Author = 'Mike Stanley'
+
+SMTP command pipelining (RFC 2920). When the server advertises the PIPELINING
+extension, MAIL FROM, every RCPT TO, and DATA are written to the server at
+once and their replies are read afterwards, so that the envelope of a message
+costs one round trip instead of one per command. When it does not, the
+commands are sent one at a time, the same as smtplib.SMTP.sendmail.
+
+start_data sends the envelope and leaves the connection ready for the body of
+the message. sendmail sends the whole message, and takes the same arguments
+and raises the same exceptions as smtplib.SMTP.sendmail.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import re
+from smtplib import SMTPDataError, SMTPNotSupportedError, SMTPRecipientsRefused, SMTPSenderRefused, quoteaddr
+
+_CRLF = b"\r\n"
+
+
+def supports_pipelining(server):
+    server.ehlo_or_helo_if_needed()
+    return "pipelining" in server.esmtp_features
+
+
+def sendmail(server, from_addr, to_addrs, msg_bytes, mail_options=(), pipelining=True):
+    """
+    Sends msg_bytes, which must already use CRLF line endings, from from_addr
+    to to_addrs over an smtplib.SMTP connection. Returns the refused
+    recipients, the same as SMTP.sendmail.
+    """
+    server.ehlo_or_helo_if_needed()
+    mail_options = list(mail_options)
+    if server.does_esmtp and server.has_extn("size"):
+        mail_options.append("size={}".format(len(msg_bytes)))
+    refused = start_data(server, from_addr, to_addrs, mail_options, pipelining)
+    quoted = re.sub(br"(?m)^\.", b"..", msg_bytes)
+    if not quoted.endswith(_CRLF):
+        quoted += _CRLF
+    server.send(quoted + b"." + _CRLF)
+    code, response = server.getreply()
+    if code != 250:
+        _abort(server, code)
+        raise SMTPDataError(code, response)
+    return refused
+
+
+def start_data(server, from_addr, to_addrs, mail_options=(), pipelining=True):
+    """
+    Sends MAIL FROM, RCPT TO for each of to_addrs, and DATA, pipelined if the
+    server supports it. Returns the refused recipients once the server is
+    ready for the body of the message.
+    """
+    if isinstance(to_addrs, str):
+        to_addrs = [to_addrs]
+    if not pipelining or not supports_pipelining(server):
+        return _start_data_in_turn(server, from_addr, to_addrs, mail_options)
+
+    option_list = _option_list(server, mail_options)
+    commands = ["mail FROM:{}{}".format(quoteaddr(from_addr), option_list)]
+    commands.extend("rcpt TO:{}".format(quoteaddr(to_addr)) for to_addr in to_addrs)
+    commands.append("data")
+    server.send("".join(command + "\r\n" for command in commands))
+
+    mail_code, mail_response = server.getreply()
+    refused = {}
+    for to_addr in to_addrs:
+        code, response = server.getreply()
+        if code not in (250, 251):
+            refused[to_addr] = (code, response)
+    data_code, data_response = server.getreply()
+
+    if mail_code != 250 or len(refused) == len(to_addrs) or data_code != 354:
+        if data_code == 354:
+            # The server accepted DATA even though the envelope failed, so an
+            # empty message has to be ended before the connection is reset.
+            server.send(b"." + _CRLF)
+            server.getreply()
+        if mail_code != 250:
+            _abort(server, mail_code)
+            raise SMTPSenderRefused(mail_code, mail_response, from_addr)
+        _abort(server, data_code)
+        if len(refused) == len(to_addrs):
+            raise SMTPRecipientsRefused(refused)
+        raise SMTPDataError(data_code, data_response)
+    return refused
+
+
+def _start_data_in_turn(server, from_addr, to_addrs, mail_options):
+    code, response = server.mail(from_addr, list(mail_options))
+    if code != 250:
+        _abort(server, code)
+        raise SMTPSenderRefused(code, response, from_addr)
+    refused = {}
+    for to_addr in to_addrs:
+        code, response = server.rcpt(to_addr)
+        if code not in (250, 251):
+            refused[to_addr] = (code, response)
+    if len(refused) == len(to_addrs):
+        _abort(server, code)
+        raise SMTPRecipientsRefused(refused)
+    server.putcmd("data")
+    code, response = server.getreply()
+    if code != 354:
+        _abort(server, code)
+        raise SMTPDataError(code, response)
+    return refused
+
+
+def _option_list(server, mail_options):
+    if not mail_options:
+        return ""
+    if any(option.lower() == "smtputf8" for option in mail_options):
+        if not server.has_extn("smtputf8"):
+            raise SMTPNotSupportedError("SMTPUTF8 not supported by server")
+        server.command_encoding = "utf-8"
+    return " " + " ".join(mail_options)
+
+
+def _abort(server, code):
+    if code == 421:
+        server.close()
+        return
+    try:
+        server.rset()
+    except Exception:
+        pass
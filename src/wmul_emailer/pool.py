@@ -0,0 +1,194 @@
+"""
+@Author = 'Mike Stanley'
+
+A bounded pool of logged-in SMTP sessions that EmailSender can reuse across
+calls to send_email instead of paying for the TCP connect, EHLO, and AUTH
+exchange every time.
+
+Connections are handed out with SMTPConnectionPool.connection(). Idle
+connections older than idle_timeout are closed rather than reused, connections
+that have been idle for a while are checked with NOOP before being handed out,
+and connections are recycled after max_messages_per_connection messages. If
+the server drops a session while a message is being sent, the connection is
+re-established and the message is sent again.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              acquire and connection take a timeout. A connection that timed
+              out is not reconnected and retried.
+              Pooled connections record whether they were reused.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import contextlib
+import threading
+import time
+from smtplib import SMTPException, SMTPServerDisconnected
+from wmul_emailer.errors import SendTimeoutError, _caused_by_timeout
+
+
+class SMTPConnectionPool:
+    """
+    connect is a callable that returns a new, logged-in smtplib.SMTP object.
+    """
+
+    def __init__(self, connect, max_size=4, idle_timeout=60.0,
+                 max_messages_per_connection=100, health_check_after=5.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.health_check_after = health_check_after
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        pooled_connection = self.acquire(timeout)
+        try:
+            yield pooled_connection
+        except BaseException:
+            self.release(pooled_connection, discard=True)
+            raise
+        else:
+            self.release(pooled_connection)
+
+    def acquire(self, timeout=None):
+        if self._closed:
+            raise RuntimeError("The connection pool has been closed.")
+        if not self._slots.acquire(timeout=timeout):
+            raise SendTimeoutError("pool", timeout)
+        try:
+            pooled_connection = self._take_idle()
+            if pooled_connection is None:
+                pooled_connection = _PooledConnection(self)
+            return pooled_connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, pooled_connection, discard=False):
+        try:
+            if discard or self._closed or pooled_connection.server is None:
+                pooled_connection.close()
+            else:
+                pooled_connection.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(pooled_connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for pooled_connection in idle:
+            pooled_connection.close()
+
+    @property
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+    def _take_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                # Most recently used first, so that surplus connections age
+                # out instead of being kept warm by round-robin reuse.
+                pooled_connection = self._idle.pop()
+            idle_for = time.monotonic() - pooled_connection.last_used
+            if idle_for > self.idle_timeout:
+                pooled_connection.close()
+            elif idle_for > self.health_check_after and \
+                    not pooled_connection.is_alive():
+                pooled_connection.close()
+            else:
+                pooled_connection.reused = True
+                return pooled_connection
+
+
+class _PooledConnection:
+    __slots__ = ("_pool", "server", "last_used", "messages_sent", "reused")
+
+    def __init__(self, pool):
+        self._pool = pool
+        self.server = pool._connect()
+        self.last_used = time.monotonic()
+        self.messages_sent = 0
+        self.reused = False
+
+    def call(self, function):
+        if self.server is None:
+            self._reconnect()
+        try:
+            result = function(self.server)
+        except SMTPServerDisconnected as error:
+            if _caused_by_timeout(error):
+                # Sending again would only take as long again.
+                self.close()
+                raise
+            self._reconnect()
+            result = function(self.server)
+        self.messages_sent += 1
+        if self.messages_sent >= self._pool.max_messages_per_connection:
+            self.close()
+        return result
+
+    def ensure_server(self):
+        if self.server is None:
+            self._reconnect()
+        return self.server
+
+    def is_alive(self):
+        try:
+            code, _ = self.server.noop()
+        except (SMTPException, OSError):
+            return False
+        return code == 250
+
+    def close(self):
+        server, self.server = self.server, None
+        if server is not None:
+            _close_quietly(server)
+
+    def _reconnect(self):
+        self.close()
+        self.server = self._pool._connect()
+        self.messages_sent = 0
+
+
+def _close_quietly(server):
+    try:
+        server.quit()
+    except (SMTPException, OSError):
+        try:
+            server.close()
+        except OSError:
+            pass
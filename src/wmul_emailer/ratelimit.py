@@ -0,0 +1,161 @@
+"""
+@Author = 'Mike Stanley'
+
+Rate limiting for outbound mail, so that a relay's per-minute quotas are kept
+to instead of being run into.
+
+A Throttle holds a TokenBucket for a server and one for each sender address
+that sends through it. Throttles are shared by every EmailSender in the
+process that sends to the same server, so the limits hold across them. The
+rates are scaled by an adaptive factor: each transient (4xx) reply halves it,
+down to min_factor, and each message that is accepted raises it again by
+recovery, up to 1.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Throttle.wait takes a timeout.
+              A wait that times out gives its tokens back.
+              server_throttle refuses limits that differ from the ones the
+              server's Throttle already has.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allows rate events per second on average, and bursts of up to burst
+    events at once.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0.")
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, factor=1.0):
+        """
+        Takes a token, and returns how many seconds to wait before using it.
+        The bucket refills at rate * factor tokens per second.
+        """
+        rate = self.rate * factor
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / rate
+
+    def give_back(self):
+        """
+        Returns a token taken by reserve that will not be used.
+        """
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+class Throttle:
+
+    def __init__(self, server_rate=None, sender_rate=None, burst=None, min_factor=0.1, recovery=0.1,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.server_rate = server_rate
+        self.sender_rate = sender_rate
+        self.burst = burst
+        self.min_factor = min_factor
+        self.recovery = recovery
+        self.factor = 1.0
+        self._clock = clock
+        self._sleep = sleep
+        self._server_bucket = TokenBucket(server_rate, burst, clock) if server_rate else None
+        self._sender_buckets = {}
+        self._lock = threading.Lock()
+
+    def wait(self, from_email_address, timeout=None):
+        """
+        Blocks until another message from from_email_address may be sent.
+        Returns the number of seconds waited, or None, at once, if that would
+        be longer than timeout.
+        """
+        factor = self.factor
+        buckets = []
+        if self._server_bucket is not None:
+            buckets.append(self._server_bucket)
+        if self.sender_rate:
+            buckets.append(self._sender_bucket(from_email_address))
+        delay = max([0.0] + [bucket.reserve(factor) for bucket in buckets])
+        if timeout is not None and delay > timeout:
+            # Otherwise each send that gives up would push back the ones
+            # after it.
+            for bucket in buckets:
+                bucket.give_back()
+            return None
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    def slow_down(self):
+        with self._lock:
+            self.factor = max(self.min_factor, self.factor / 2)
+
+    def speed_up(self):
+        with self._lock:
+            self.factor = min(1.0, self.factor + self.recovery)
+
+    def _sender_bucket(self, from_email_address):
+        with self._lock:
+            bucket = self._sender_buckets.get(from_email_address)
+            if bucket is None:
+                bucket = self._sender_buckets[from_email_address] = \
+                    TokenBucket(self.sender_rate, self.burst, self._clock)
+            return bucket
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def server_throttle(server_key, server_rate=None, sender_rate=None, burst=None):
+    """
+    Returns the Throttle shared by everything in the process that sends to
+    server_key. Raises ValueError if it already has different limits, since
+    they could not both be kept to.
+    """
+    with _throttles_lock:
+        throttle = _throttles.get(server_key)
+        if throttle is None:
+            throttle = _throttles[server_key] = Throttle(server_rate, sender_rate, burst)
+        elif (throttle.server_rate, throttle.sender_rate, throttle.burst) != (server_rate, sender_rate, burst):
+            raise ValueError(
+                "{!r} is already rate limited to server_rate={!r}, sender_rate={!r}, burst={!r}.".format(
+                    server_key, throttle.server_rate, throttle.sender_rate, throttle.burst
+                )
+            )
+        return throttle
+
+
+def is_transient(code):
+    return 400 <= code < 500
@@ -0,0 +1,144 @@
+"""
+@Author = 'Mike Stanley'
+
+Preparation of recipient lists: validation, normalization, removal of
+duplicates, and grouping by domain.
+
+parse_address checks one address and splits it into its local part and
+domain. It accepts a bare address, or one with a display name
+("Jane Doe <jane@example.com>"), and returns the bare address with
+surrounding white space removed and its domain in lower case. The results are
+cached, since the same addresses tend to be sent to again and again, so a
+list is prepared in time linear in its length, and an address that has been
+seen before costs one dictionary lookup.
+
+prepare_recipients normalizes a list, drops the addresses that are the same
+as one earlier in the list, ignoring case, and groups the rest by domain, so
+that consecutive transactions, and the recipients within each, go to the same
+domain, which the relay can deliver together.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              An unquoted local part may not contain @.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import functools
+import re
+from collections import OrderedDict, namedtuple
+from email.utils import parseaddr
+
+ParsedAddress = namedtuple("ParsedAddress", ["address", "local_part", "domain", "key"])
+
+# Enough for most mailing lists to be parsed once.
+PARSE_CACHE_SIZE = 65536
+
+# RFC 5321 limits.
+_MAX_LOCAL_PART = 64
+_MAX_ADDRESS = 254
+
+_DOMAIN_LABEL = re.compile(r"(?!-)[A-Za-z0-9-]{1,63}(?<!-)\Z")
+_ADDRESS_LITERAL = re.compile(r"\[[^\[\]\\\s]+\]\Z")
+# An unquoted local part may not hold another @, or the address would be
+# split at the last one.
+_FORBIDDEN = re.compile(r"[\s<>()\[\],;:@\\\"\x00-\x1f\x7f]")
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_address(address):
+    """
+    Returns the ParsedAddress of address, or raises ValueError if it is not a
+    valid e-mail address. key is the same for addresses that differ only in
+    case.
+    """
+    if not isinstance(address, str):
+        raise TypeError("E-mail addresses must be str.")
+    stripped = address.strip()
+    if "<" in stripped:
+        _, stripped = parseaddr(stripped)
+    local_part, at, domain = stripped.rpartition("@")
+    if not at or not local_part or not domain:
+        raise ValueError("{!r} is not a valid e-mail address.".format(address))
+    if len(local_part) > _MAX_LOCAL_PART or len(stripped) > _MAX_ADDRESS:
+        raise ValueError("{!r} is too long to be an e-mail address.".format(address))
+    if not (local_part.startswith("\"") and local_part.endswith("\"") and len(local_part) > 1):
+        if _FORBIDDEN.search(local_part) or local_part.startswith(".") or local_part.endswith(".") or \
+                ".." in local_part:
+            raise ValueError("{!r} is not a valid e-mail address.".format(address))
+    domain = domain.lower()
+    if not _valid_domain(domain):
+        raise ValueError("{!r} does not have a valid domain.".format(address))
+    return ParsedAddress(local_part + "@" + domain, local_part, domain, (local_part.lower(), domain))
+
+
+def prepare_recipients(addresses):
+    """
+    Returns addresses normalized, without duplicates, and grouped by domain,
+    with the domains in the order that each first appears. Raises ValueError,
+    listing every invalid address, if any are invalid.
+    """
+    by_domain = OrderedDict()
+    seen = set()
+    invalid = []
+    for address in addresses:
+        try:
+            parsed = parse_address(address)
+        except ValueError:
+            invalid.append(address)
+            continue
+        if parsed.key in seen:
+            continue
+        seen.add(parsed.key)
+        domain_addresses = by_domain.get(parsed.domain)
+        if domain_addresses is None:
+            domain_addresses = by_domain[parsed.domain] = []
+        domain_addresses.append(parsed.address)
+    if invalid:
+        raise ValueError("These are not valid e-mail addresses: {}".format(", ".join(repr(item) for item in invalid)))
+    return [address for domain_addresses in by_domain.values() for address in domain_addresses]
+
+
+def domain_batches(addresses, size):
+    """
+    Splits addresses into lists of at most size addresses, each with only
+    one domain. Addresses with the same domain are expected to be together,
+    as prepare_recipients leaves them.
+    """
+    batch = []
+    batch_domain = None
+    for address in addresses:
+        domain = address.rpartition("@")[2].lower()
+        if batch and (domain != batch_domain or len(batch) >= size):
+            yield batch
+            batch = []
+        batch_domain = domain
+        batch.append(address)
+    if batch:
+        yield batch
+
+
+@functools.lru_cache(maxsize=4096)
+def _valid_domain(domain):
+    if _ADDRESS_LITERAL.match(domain):
+        return True
+    try:
+        ascii_domain = domain.encode("idna").decode("ascii")
+    except UnicodeError:
+        return False
+    labels = ascii_domain.rstrip(".").split(".")
+    return len(ascii_domain) <= 253 and all(_DOMAIN_LABEL.match(label) for label in labels)
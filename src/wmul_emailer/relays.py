@@ -0,0 +1,187 @@
+"""
+@Author = 'Mike Stanley'
+
+Several smtp relays behind one EmailSender, for load balancing and failover.
+
+A RelaySet chooses the relay for each new connection. With the default
+"least_loaded" strategy it chooses the relay with the lowest measured latency,
+multiplied by the work outstanding on it and divided by its weight, so that a
+relay that slows down is given less work. With "round_robin" it takes turns,
+in proportion to the weights (smooth weighted round-robin).
+
+Each relay has a circuit breaker. After failure_threshold failures in a row,
+the relay is skipped for reset_timeout seconds. After that, one connection is
+let through to test it: if it succeeds, the relay is back in use, and if it
+fails, the relay is skipped for another reset_timeout seconds.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Added abandon_probe.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import contextlib
+import threading
+import time
+
+STRATEGIES = ("least_loaded", "round_robin")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Weight given to each new latency sample in the moving average.
+_LATENCY_SMOOTHING = 0.3
+
+
+class Relay:
+    __slots__ = ("host", "port", "weight", "latency", "outstanding", "failures", "opened_at", "probing",
+                 "_current_weight")
+
+    def __init__(self, host, port, weight=1):
+        if weight <= 0:
+            raise ValueError("weight must be greater than 0.")
+        self.host = host
+        self.port = port
+        self.weight = weight
+        self.latency = None
+        self.outstanding = 0
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._current_weight = 0
+
+    def __repr__(self):
+        return "Relay({!r}, {!r}, weight={!r})".format(self.host, self.port, self.weight)
+
+
+class RelaySet:
+
+    def __init__(self, relays, strategy="least_loaded", failure_threshold=3, reset_timeout=30.0,
+                 clock=time.monotonic):
+        if strategy not in STRATEGIES:
+            raise ValueError("strategy must be one of {}.".format(", ".join(STRATEGIES)))
+        self.relays = [relay if isinstance(relay, Relay) else Relay(*relay) for relay in relays]
+        if not self.relays:
+            raise ValueError("At least one relay must be provided.")
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(self.relays)
+
+    def __len__(self):
+        return len(self.relays)
+
+    def state(self, relay):
+        if relay.opened_at is None:
+            return CLOSED
+        if self._clock() - relay.opened_at < self.reset_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def choose(self, exclude=()):
+        """
+        Returns the relay to connect to next, or None if every relay that is
+        not in exclude is open.
+        """
+        with self._lock:
+            candidates = []
+            for relay in self.relays:
+                if relay in exclude:
+                    continue
+                state = self.state(relay)
+                if state == CLOSED or (state == HALF_OPEN and not relay.probing):
+                    candidates.append(relay)
+            if not candidates:
+                return None
+            if self.strategy == "round_robin":
+                relay = self._next_in_turn(candidates)
+            else:
+                relay = min(candidates, key=_load)
+            if self.state(relay) == HALF_OPEN:
+                relay.probing = True
+            return relay
+
+    def record_success(self, relay, latency=None):
+        with self._lock:
+            relay.failures = 0
+            relay.opened_at = None
+            relay.probing = False
+            if latency is not None:
+                self._record_latency(relay, latency)
+
+    def record_latency(self, relay, latency):
+        with self._lock:
+            self._record_latency(relay, latency)
+
+    def record_failure(self, relay):
+        with self._lock:
+            relay.failures += 1
+            if relay.probing or relay.failures >= self.failure_threshold:
+                relay.opened_at = self._clock()
+            relay.probing = False
+
+    def abandon_probe(self, relay):
+        """
+        Lets another connection test relay, if it is half open, when the
+        connection testing it was given up on for a reason that says nothing
+        about the relay, such as the deadline of the send running out.
+        """
+        with self._lock:
+            relay.probing = False
+
+    @contextlib.contextmanager
+    def track(self, relay):
+        """
+        Counts the work done in the with block as outstanding on relay.
+        """
+        with self._lock:
+            relay.outstanding += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                relay.outstanding -= 1
+
+    def _record_latency(self, relay, latency):
+        if relay.latency is None:
+            relay.latency = latency
+        else:
+            relay.latency += _LATENCY_SMOOTHING * (latency - relay.latency)
+
+    def _next_in_turn(self, candidates):
+        total = 0
+        chosen = None
+        for relay in candidates:
+            relay._current_weight += relay.weight
+            total += relay.weight
+            if chosen is None or relay._current_weight > chosen._current_weight:
+                chosen = relay
+        chosen._current_weight -= total
+        return chosen
+
+
+def _load(relay):
+    # Relays that have not been measured yet are tried first, so that they
+    # are measured.
+    latency = relay.latency if relay.latency is not None else 0.0
+    return (relay.outstanding + 1) * latency / relay.weight, relay.outstanding / relay.weight
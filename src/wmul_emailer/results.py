@@ -0,0 +1,119 @@
+"""
+@Author = 'Mike Stanley'
+
+The results of a call to send_email.
+
+SendResult is a dict of the recipients that could not be delivered to, the
+same dict that send_email has always returned in single transaction and
+parallel modes: each is mapped to the server's (code, message) reply, or to
+the exception that stopped delivery. Its recipients attribute has a
+RecipientResult for every recipient, in the order they were given, with the
+status, smtp code, latency, and retry count of each. The recipients of an
+e-mail that was not sent because it repeated a recent one are "suppressed".
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Added the suppressed status.
+              A suppressed result is not ok.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+PENDING = "pending"
+DELIVERED = "delivered"
+REFUSED = "refused"
+FAILED = "failed"
+SUPPRESSED = "suppressed"
+
+
+class RecipientResult:
+    __slots__ = ("address", "status", "code", "latency", "retries", "error")
+
+    def __init__(self, address, status=PENDING, code=None, latency=None, retries=0, error=None):
+        self.address = address
+        self.status = status
+        self.code = code
+        self.latency = latency
+        self.retries = retries
+        self.error = error
+
+    def __repr__(self):
+        return "RecipientResult(address={!r}, status={!r}, code={!r}, latency={!r}, retries={!r})".format(
+            self.address, self.status, self.code, self.latency, self.retries
+        )
+
+
+class SendResult(dict):
+
+    def __init__(self, addresses=()):
+        super().__init__()
+        self.recipients = {address: RecipientResult(address) for address in addresses}
+
+    @property
+    def delivered(self):
+        return [address for address, result in self.recipients.items() if result.status == DELIVERED]
+
+    @property
+    def pending(self):
+        return [address for address, result in self.recipients.items() if result.status == PENDING]
+
+    @property
+    def suppressed(self):
+        return [address for address, result in self.recipients.items() if result.status == SUPPRESSED]
+
+    @property
+    def ok(self):
+        return not self and not self.pending and not self.suppressed
+
+    def record(self, addresses, refused, latency, retries):
+        """
+        Records the outcome of one transaction to addresses, where refused is
+        the server's replies to the recipients that it refused.
+        """
+        for address in addresses:
+            result = self._result(address)
+            result.latency = latency
+            result.retries = retries
+            result.error = None
+            if address in refused:
+                result.status = REFUSED
+                result.code = refused[address][0]
+                self[address] = refused[address]
+            else:
+                result.status = DELIVERED
+                result.code = 250
+                self.pop(address, None)
+
+    def fail(self, addresses, error, latency=None):
+        for address in addresses:
+            result = self._result(address)
+            result.status = FAILED
+            result.code = getattr(error, "smtp_code", None)
+            result.latency = latency
+            result.error = error
+            self[address] = error
+
+    def suppress(self):
+        for result in self.recipients.values():
+            result.status = SUPPRESSED
+
+    def _result(self, address):
+        result = self.recipients.get(address)
+        if result is None:
+            result = self.recipients[address] = RecipientResult(address)
+        return result
@@ -0,0 +1,1133 @@
+"""
+@Author = 'Mike Stanley'
+
+EmailSender, and the helpers it uses to talk to the smtp server.
+
+EmailSender is imported from here into the wmul_emailer package when it is
+first used, rather than when the package is imported, so that a script that
+only imports wmul_emailer in order to send mail on a rare failure path does
+not pay for smtplib, email, and the rest at startup. The smtplib.SMTP class
+is looked up on the package each time a connection is opened, so patching
+wmul_emailer.SMTP still replaces it.
+
+============ Change Log ============
+2026-Oct-18 = Moved from wmul_emailer/__init__.py.
+              Added transport, to deliver without an smtp server.
+              What only sending needs is imported on first use, so that
+              constructing an EmailSender stays cheap.
+              Conflicting max_connections_per_server values for a server
+              raise ValueError.
+
+============ License ============
+Copyright (c) 2017-2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import contextlib
+import importlib
+import logging
+import wmul_emailer
+import threading
+import time
+import weakref
+from collections import deque, namedtuple
+from wmul_emailer._validation import _normalize_destination_email_addresses, _resolve_addresses
+from wmul_emailer.outbound import FULL_POLICIES, OutboundQueue
+from wmul_emailer.ratelimit import is_transient, server_throttle
+from wmul_emailer.relays import RelaySet
+from wmul_emailer.results import SendResult
+from wmul_emailer.templates import RenderedMessageCache, render_message, render_split_messages
+
+
+class _Deferred:
+    """
+    Stands in for a module, which is imported when one of its names is first
+    looked up, so that constructing an EmailSender does not import what only
+    sending needs. Each name is kept once it has been looked up.
+    """
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+
+    def __getattr__(self, name):
+        value = getattr(importlib.import_module(self._module_name), name)
+        setattr(self, name, value)
+        return value
+
+
+_errors = _Deferred("wmul_emailer.errors")
+_pipelining = _Deferred("wmul_emailer.pipelining")
+_recipients = _Deferred("wmul_emailer.recipients")
+_smtplib = _Deferred("smtplib")
+_timeouts = _Deferred("wmul_emailer.timeouts")
+_tls = _Deferred("wmul_emailer.tls")
+_transports = _Deferred("wmul_emailer.transports")
+
+OVERSIZE_POLICIES = ("raise", "split")
+
+BatchEmail = namedtuple(
+    "BatchEmail",
+    ["email_subject", "email_body", "destination_email_addresses", "from_email_address"]
+)
+# Set this way, rather than with namedtuple's defaults, for Python 3.6.
+BatchEmail.__new__.__defaults__ = (None, None)
+
+BatchResult = namedtuple("BatchResult", ["email", "refused", "error"])
+
+_logger = logging.getLogger(__name__)
+
+
+class EmailSender:
+
+    _server_slots = {}
+    _server_slots_lock = threading.Lock()
+
+    def __init__(self, server_host=None, port=None, user_name=None, password=None, from_email_address=None, destination_email_addresses=None,
+                 pool_size=None, pool_idle_timeout=60.0, pool_max_messages_per_connection=100,
+                 single_transaction=False, max_recipients_per_transaction=100,
+                 parallel_connections=1, max_connections_per_server=None,
+                 queue_max_size=1000, queue_full_policy="block", spool_directory=None, template_cache_size=32,
+                 compress_threshold=None, oversize_policy="raise", pipelining=True,
+                 server_rate_limit=None, sender_rate_limit=None, rate_limit_burst=None,
+                 deferral_retries=2, deferral_retry_delay=1.0, continue_on_error=False,
+                 relays=None, relay_strategy="least_loaded", relay_failure_threshold=3, relay_reset_timeout=30.0,
+                 relay_health_check_interval=None, connect_timeout=None, command_timeout=None, send_timeout=None,
+                 observer=None, tls=None, ssl_context=None, tls_session_resumption=True,
+                 preprocess_recipients=False, coalesce_window=None, coalesce_max_entries=1024,
+                 coalesce_digest_interval=None, transport=None):
+        if destination_email_addresses:
+            destination_email_addresses = _normalize_destination_email_addresses(destination_email_addresses)
+
+        self.server_host = server_host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.send_timeout = send_timeout
+        self._deadlines = threading.local()
+        self.observer = observer
+
+        if transport is not None and (relays or tls is not None):
+            raise ValueError("A transport cannot be used with relays or tls.")
+        if transport is None and server_host is None and not relays:
+            raise ValueError("server_host must be provided, unless relays or a transport are.")
+        self.transport = transport
+
+        if tls is not None and tls not in _tls.MODES:
+            raise ValueError("tls must be None or one of {}.".format(", ".join(_tls.MODES)))
+        self.tls = tls
+        self.ssl_context = ssl_context
+        self._tls_sessions = None
+        if tls is not None:
+            if ssl_context is None:
+                self.ssl_context = _tls.default_context()
+            if tls_session_resumption:
+                self._tls_sessions = _tls.session_cache(self.ssl_context)
+
+        self._relays = None
+        self._relay_of = weakref.WeakKeyDictionary()
+        self._server_key = (server_host, port)
+        if relays:
+            self._relays = RelaySet(
+                relays,
+                strategy=relay_strategy,
+                failure_threshold=relay_failure_threshold,
+                reset_timeout=relay_reset_timeout
+            )
+            self._server_key = tuple((relay.host, relay.port) for relay in self._relays)
+        self.user_name = user_name
+        self.password = password
+        self.from_email_address = from_email_address
+        self.destination_email_addresses = destination_email_addresses
+
+        self.preprocess_recipients = preprocess_recipients
+        if max_recipients_per_transaction < 1:
+            raise ValueError("max_recipients_per_transaction must be at least 1.")
+        self.single_transaction = single_transaction
+        self.max_recipients_per_transaction = max_recipients_per_transaction
+
+        if parallel_connections < 1:
+            raise ValueError("parallel_connections must be at least 1.")
+        self.parallel_connections = parallel_connections
+        self.max_connections_per_server = max_connections_per_server
+        self._slots = None
+        if max_connections_per_server is not None:
+            self._slots = self._server_slots_for(self._server_key, max_connections_per_server)
+
+        if queue_full_policy not in FULL_POLICIES:
+            raise ValueError("queue_full_policy must be one of {}.".format(", ".join(FULL_POLICIES)))
+        self.queue_max_size = queue_max_size
+        self.queue_full_policy = queue_full_policy
+        self._outbound_queue = None
+        self._outbound_pool = None
+        self._outbound_lock = threading.Lock()
+
+        if oversize_policy not in OVERSIZE_POLICIES:
+            raise ValueError("oversize_policy must be one of {}.".format(", ".join(OVERSIZE_POLICIES)))
+        self.compress_threshold = compress_threshold
+        self.pipelining = pipelining
+
+        self.continue_on_error = continue_on_error
+        self.deferral_retries = deferral_retries
+        self.deferral_retry_delay = deferral_retry_delay
+        self._throttle = None
+        if server_rate_limit or sender_rate_limit:
+            self._throttle = server_throttle(
+                self._server_key, server_rate_limit, sender_rate_limit, rate_limit_burst
+            )
+        self.oversize_policy = oversize_policy
+        self._templates = RenderedMessageCache(max_entries=template_cache_size, compress_threshold=compress_threshold)
+
+        self._spool = None
+        if spool_directory:
+            from wmul_emailer.spool import Spool
+            self._spool = Spool(spool_directory)
+
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool_max_messages_per_connection = pool_max_messages_per_connection
+        self._pool = None
+        if pool_size:
+            self._pool = self._make_pool(pool_size)
+
+        self._health_checks_stopped = threading.Event()
+        self._health_check_thread = None
+        if self._relays is not None and relay_health_check_interval:
+            self._health_check_thread = threading.Thread(
+                target=self._run_health_checks,
+                args=(relay_health_check_interval,),
+                name="wmul_emailer relay health checks",
+                daemon=True
+            )
+            self._health_check_thread.start()
+
+        self._coalescer = None
+        self._digests_stopped = threading.Event()
+        self._digest_thread = None
+        if coalesce_window:
+            from wmul_emailer.coalesce import Coalescer
+            self._coalescer = Coalescer(coalesce_window, max_entries=coalesce_max_entries)
+            self._digest_thread = threading.Thread(
+                target=self._run_digests,
+                args=(coalesce_digest_interval or coalesce_window,),
+                name="wmul_emailer digests",
+                daemon=True
+            )
+            self._digest_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def relays(self):
+        return list(self._relays) if self._relays is not None else []
+
+    def check_relays(self):
+        """
+        Connects to each relay and sends NOOP. Returns a dict of each relay
+        to whether it is healthy, and updates its circuit breaker.
+        """
+        from wmul_emailer.pool import _close_quietly
+        healthy = {}
+        for relay in self.relays:
+            start = time.perf_counter()
+            try:
+                server = self._open(relay.host, relay.port)
+                try:
+                    code, _ = server.noop()
+                finally:
+                    _close_quietly(server)
+            except (_smtplib.SMTPException, OSError):
+                code = None
+            healthy[relay] = code == 250
+            if healthy[relay]:
+                self._relays.record_success(relay, time.perf_counter() - start)
+            else:
+                self._relays.record_failure(relay)
+        return healthy
+
+    def send_digests(self):
+        """
+        Sends a digest of the e-mails that were not sent because they repeated
+        a recent one, to each set of recipients that had any, and returns how
+        many were sent. The digests are also sent every
+        coalesce_digest_interval seconds, and on close.
+        """
+        if self._coalescer is None:
+            return 0
+        sent = 0
+        for digest in self._coalescer.take_digests():
+            try:
+                self._send(digest.email_body, digest.email_subject, digest.from_email_address,
+                           digest.destination_email_addresses, self._pool)
+            except Exception:
+                _logger.exception("Failed to send a digest of repeated e-mails.")
+            else:
+                sent += 1
+        return sent
+
+    def close(self):
+        self._health_checks_stopped.set()
+        if self._digest_thread is not None:
+            self._digests_stopped.set()
+            self._digest_thread.join()
+            self._digest_thread = None
+            self.send_digests()
+        if self._outbound_queue is not None:
+            self._outbound_queue.close()
+        if self._outbound_pool is not None:
+            self._outbound_pool.close()
+        if self._pool is not None:
+            self._pool.close()
+        if self._spool is not None:
+            self._spool.close()
+
+    def send_email(self, email_body, email_subject, from_email_address=None, destination_email_addresses=None,
+                   deadline=None):
+        from_email_address, destination_email_addresses = \
+            self._resolve(from_email_address, destination_email_addresses)
+        if self._is_repeat(email_body, email_subject, from_email_address, destination_email_addresses):
+            send_result = SendResult(destination_email_addresses)
+            send_result.suppress()
+            self._observe_result(send_result)
+            return send_result
+
+        with self._coalesced(email_body, email_subject, from_email_address, destination_email_addresses) as sent, \
+                self._deadline_scope(deadline):
+            if self.parallel_connections > 1 and len(destination_email_addresses) > 1:
+                send_result = self._send_parallel(
+                    email_body, email_subject, from_email_address, destination_email_addresses
+                )
+            else:
+                send_result = self._send(
+                    email_body, email_subject, from_email_address, destination_email_addresses, self._pool
+                )
+            sent.append(send_result)
+            return send_result
+
+    def enqueue_email(self, email_body, email_subject, from_email_address=None, destination_email_addresses=None):
+        from_email_address, destination_email_addresses = \
+            self._resolve(from_email_address, destination_email_addresses)
+        if self._is_repeat(email_body, email_subject, from_email_address, destination_email_addresses):
+            return
+
+        with self._outbound_lock:
+            if self._outbound_queue is None:
+                if self._pool is None:
+                    # The background thread keeps its own connection open
+                    # between queued e-mails.
+                    self._outbound_pool = self._make_pool(1)
+                self._outbound_queue = OutboundQueue(
+                    self._send_queued,
+                    max_size=self.queue_max_size,
+                    full_policy=self.queue_full_policy
+                )
+        self._outbound_queue.put((email_body, email_subject, from_email_address, destination_email_addresses))
+
+    def flush(self, timeout=None):
+        if self._outbound_queue is None:
+            return True
+        return self._outbound_queue.flush(timeout)
+
+    def send_streamed_email(self, email_subject, email_body=None, body_source=None, attachments=(),
+                            from_email_address=None, destination_email_addresses=None):
+        from_email_address, destination_email_addresses = \
+            self._resolve(from_email_address, destination_email_addresses)
+        from wmul_emailer.streaming import StreamedMessage
+        with StreamedMessage(email_subject, from_email_address, email_body, body_source, attachments,
+                             self.compress_threshold) as message:
+            send_result = SendResult(destination_email_addresses)
+            try:
+                return self._send_streamed(message, from_email_address, destination_email_addresses, send_result)
+            finally:
+                self._observe_result(send_result)
+
+    def _send_streamed(self, message, from_email_address, destination_email_addresses, send_result):
+        if self.single_transaction:
+            transactions = [
+                (_UNDISCLOSED_RECIPIENTS, recipients)
+                for recipients in self._transactions(destination_email_addresses)
+            ]
+        else:
+            transactions = [(email_address, [email_address]) for email_address in destination_email_addresses]
+        if len(transactions) > 1 and not message.reusable:
+            raise ValueError("An iterable body_source or attachment can only be sent once. Send it to one recipient, "
+                             "or to one transaction's worth of recipients in single transaction mode.")
+
+        sizes = [message.size(to_header) for to_header, _ in transactions]
+        with self._session(self._pool) as connection:
+            with self._in_time(connection):
+                limit = _server_size_limit(connection.ensure_server())
+            largest = max(sizes, default=None) if None not in sizes else None
+            if limit and largest is not None and largest > limit:
+                # Only an e-mail_body passed to send_email can be split.
+                raise _errors.MessageTooLargeError(largest, limit)
+            for (to_header, recipients), size in zip(transactions, sizes):
+                self._wait_turn(from_email_address)
+                start = time.perf_counter()
+                counter = _ByteCounter()
+                try:
+                    refused = self._call(
+                        connection,
+                        lambda server: _send_streamed_to(
+                            server,
+                            from_email_address,
+                            recipients,
+                            counter.count(message.iter_message(to_header)),
+                            size,
+                            self.pipelining
+                        ),
+                        counter
+                    )
+                except _smtplib.SMTPRecipientsRefused as srr:
+                    if not self.single_transaction and not self.continue_on_error:
+                        raise
+                    refused = srr.recipients
+                except (_smtplib.SMTPException, OSError) as error:
+                    if not self.continue_on_error:
+                        raise
+                    send_result.fail(recipients, error, time.perf_counter() - start)
+                    continue
+                send_result.record(recipients, refused, time.perf_counter() - start, 0)
+        return send_result
+
+    def send_many(self, emails):
+        """
+        Sends each of emails, an iterable of BatchEmail (or of tuples in the
+        same order), and yields a BatchResult for each, in order. The emails
+        are read from the iterable only as they are sent, so a generator of
+        any length can be passed.
+        """
+        pool = self._pool or self._make_pool(self.parallel_connections)
+        try:
+            if self.parallel_connections > 1:
+                yield from self._send_many_parallel(emails, pool)
+            else:
+                with self._session(pool) as connection:
+                    for batch_email in emails:
+                        yield self._send_batch_email(connection, batch_email)
+        finally:
+            if pool is not self._pool:
+                pool.close()
+
+    def spool_email(self, email_body, email_subject, from_email_address=None, destination_email_addresses=None):
+        if self._spool is None:
+            raise ValueError("spool_directory must be provided to the constructor to use spool_email.")
+        from_email_address, destination_email_addresses = \
+            self._resolve(from_email_address, destination_email_addresses)
+        return self._spool.put(email_body, email_subject, from_email_address, destination_email_addresses)
+
+    def drain_spool(self):
+        if self._spool is None:
+            raise ValueError("spool_directory must be provided to the constructor to use drain_spool.")
+        pool = self._pool or self._make_pool(1)
+        try:
+            # Every recipient is tried, so that the spool gets the outcome for
+            # each, and only spools again the ones that can be retried.
+            return self._spool.drain(
+                lambda spooled_email: self._send(
+                    spooled_email.email_body,
+                    spooled_email.email_subject,
+                    spooled_email.from_email_address,
+                    spooled_email.destination_email_addresses,
+                    pool,
+                    continue_on_error=True
+                )
+            )
+        finally:
+            if pool is not self._pool:
+                pool.close()
+
+    def _send_queued(self, item):
+        email_body, email_subject, from_email_address, destination_email_addresses = item
+        with self._coalesced(email_body, email_subject, from_email_address, destination_email_addresses) as sent:
+            sent.append(self._send(email_body, email_subject, from_email_address, destination_email_addresses,
+                                   self._pool or self._outbound_pool))
+
+    def _send(self, email_body, email_subject, from_email_address, destination_email_addresses, pool,
+              continue_on_error=None):
+        with self._phase("render"):
+            rendered_message = self._templates.get(email_body, email_subject, from_email_address)
+        send_result = SendResult(destination_email_addresses)
+        try:
+            with self._session(pool) as connection:
+                return self._deliver(
+                    connection, rendered_message, email_body, email_subject, from_email_address,
+                    destination_email_addresses, send_result, continue_on_error
+                )
+        finally:
+            self._observe_result(send_result)
+
+    def _deliver(self, connection, rendered_message, email_body, email_subject, from_email_address,
+                 destination_email_addresses, send_result, continue_on_error=None):
+        """
+        continue_on_error, if provided, is used instead of the attribute.
+        """
+        if continue_on_error is None:
+            continue_on_error = self.continue_on_error
+        if self.single_transaction:
+            rendered_messages = self._fit_to_server(
+                connection, rendered_message, email_body, email_subject, from_email_address, [_UNDISCLOSED_RECIPIENTS]
+            )
+            for part in rendered_messages:
+                msg_bytes = part.for_recipient(_UNDISCLOSED_RECIPIENTS)
+                for recipients in self._transactions(destination_email_addresses):
+                    self._send_unit(connection, msg_bytes, from_email_address, recipients, send_result,
+                                    continue_on_error)
+            return send_result
+
+        rendered_messages = self._fit_to_server(
+            connection, rendered_message, email_body, email_subject, from_email_address, destination_email_addresses
+        )
+        for email_address in destination_email_addresses:
+            for part in rendered_messages:
+                refused = self._send_unit(
+                    connection, part.for_recipient(email_address), from_email_address, [email_address], send_result,
+                    continue_on_error
+                )
+                if refused:
+                    if not continue_on_error:
+                        raise _smtplib.SMTPRecipientsRefused(refused)
+                    break
+        return send_result
+
+    def _send_unit(self, connection, msg_bytes, from_email_address, recipients, send_result, continue_on_error):
+        """
+        Sends one transaction, and records its outcome in send_result. With
+        continue_on_error, errors are recorded instead of raised.
+        """
+        start = time.perf_counter()
+        try:
+            return self._send_transaction(connection, msg_bytes, from_email_address, recipients, send_result)
+        except (_smtplib.SMTPException, OSError) as error:
+            if not continue_on_error:
+                raise
+            send_result.fail(recipients, error, time.perf_counter() - start)
+            return {email_address: error for email_address in recipients}
+
+    def _send_many_parallel(self, emails, pool):
+        from concurrent.futures import ThreadPoolExecutor
+        # At most this many e-mails are read ahead of the one being yielded.
+        window = 2 * self.parallel_connections
+        with ThreadPoolExecutor(max_workers=self.parallel_connections) as executor:
+            pending = deque()
+            for batch_email in emails:
+                pending.append(executor.submit(self._send_pooled_batch_email, pool, batch_email))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _send_pooled_batch_email(self, pool, batch_email):
+        with self._server_slot(), self._session(pool) as connection:
+            return self._send_batch_email(connection, batch_email)
+
+    def _send_batch_email(self, connection, batch_email):
+        if not isinstance(batch_email, BatchEmail):
+            batch_email = BatchEmail(*batch_email)
+        try:
+            from_email_address, destination_email_addresses = self._resolve(
+                batch_email.from_email_address, batch_email.destination_email_addresses
+            )
+            # Not cached, since each e-mail in a batch is usually different.
+            with self._phase("render"):
+                rendered_message = render_message(
+                    batch_email.email_body, batch_email.email_subject, from_email_address, self.compress_threshold
+                )
+            send_result = self._deliver(
+                connection, rendered_message, batch_email.email_body, batch_email.email_subject, from_email_address,
+                destination_email_addresses, SendResult(destination_email_addresses)
+            )
+        except (_smtplib.SMTPException, OSError, TypeError, ValueError) as error:
+            return BatchResult(batch_email, {}, error)
+        return BatchResult(batch_email, send_result, None)
+
+    def _send_parallel(self, email_body, email_subject, from_email_address, destination_email_addresses):
+        with self._phase("render"):
+            rendered_message = self._templates.get(email_body, email_subject, from_email_address)
+        if self.single_transaction:
+            units = list(self._transactions(destination_email_addresses))
+            to_headers = [_UNDISCLOSED_RECIPIENTS]
+        else:
+            units = [[email_address] for email_address in destination_email_addresses]
+            to_headers = destination_email_addresses
+
+        send_result = SendResult(destination_email_addresses)
+        # The workers keep to the deadline of the thread that called send_email.
+        expires_at, deadline = getattr(self._deadlines, "current", None) or (None, None)
+
+        def send_unit(connection, rendered_messages, recipients):
+            to_header = _UNDISCLOSED_RECIPIENTS if self.single_transaction else recipients[0]
+            start = time.perf_counter()
+            for part in rendered_messages:
+                try:
+                    refused = self._send_transaction(
+                        connection,
+                        part.for_recipient(to_header),
+                        from_email_address,
+                        recipients,
+                        send_result
+                    )
+                except (_smtplib.SMTPException, OSError) as error:
+                    send_result.fail(recipients, error, time.perf_counter() - start)
+                    return
+                if refused and not self.single_transaction:
+                    return
+
+        def send_group(group):
+            attempted = 0
+            try:
+                with self._deadline_scope(expires_at=expires_at, length=deadline), self._server_slot(), self._session(self._pool) as connection:
+                    rendered_messages = self._fit_to_server(
+                        connection, rendered_message, email_body, email_subject, from_email_address, to_headers
+                    )
+                    for recipients in group:
+                        attempted += 1
+                        send_unit(connection, rendered_messages, recipients)
+            except (_smtplib.SMTPException, OSError) as error:
+                for recipients in group[attempted:]:
+                    send_result.fail(recipients, error)
+
+        from concurrent.futures import ThreadPoolExecutor
+        worker_count = min(self.parallel_connections, len(units))
+        groups = [units[index::worker_count] for index in range(worker_count)]
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            list(executor.map(send_group, groups))
+        self._observe_result(send_result)
+        return send_result
+
+    def _fit_to_server(self, connection, rendered_message, email_body, email_subject, from_email_address, to_headers):
+        """
+        Returns the rendered messages to send in place of rendered_message:
+        itself if it fits within the SIZE limit the server advertises, or the
+        numbered parts it splits into if oversize_policy is "split".
+        """
+        with self._in_time(connection):
+            limit = _server_size_limit(connection.ensure_server())
+        if not limit:
+            return [rendered_message]
+        size = max(rendered_message.size_for(to_header) for to_header in to_headers)
+        if size <= limit:
+            return [rendered_message]
+        if self.oversize_policy == "split":
+            return render_split_messages(email_body, email_subject, from_email_address, limit, self.compress_threshold)
+        raise _errors.MessageTooLargeError(size, limit)
+
+    def _send_transaction(self, connection, msg_bytes, from_email_address, recipients, send_result=None):
+        """
+        Sends one message to recipients, within the rate limits. Recipients
+        that are deferred with a transient (4xx) reply are sent to again, up
+        to deferral_retries more times, with exponential backoff. Returns the
+        recipients that were refused in the end, and records the outcome for
+        each recipient in send_result, if it is provided.
+        """
+        start = time.perf_counter()
+        refused = {}
+        attempt = 0
+        while True:
+            self._wait_turn(from_email_address)
+            try:
+                outcome = self._call(connection, lambda server: _sendmail(
+                    server, from_email_address, recipients, msg_bytes, self.pipelining
+                ), len(msg_bytes))
+            except _smtplib.SMTPRecipientsRefused as srr:
+                outcome = srr.recipients
+            except (_smtplib.SMTPSenderRefused, _smtplib.SMTPDataError) as error:
+                if not is_transient(error.smtp_code) or attempt >= self.deferral_retries:
+                    raise
+                outcome = {email_address: (error.smtp_code, error.smtp_error) for email_address in recipients}
+            refused.update(outcome)
+            deferred = [email_address for email_address, (code, _) in outcome.items() if is_transient(code)]
+            if self._throttle is not None:
+                if deferred:
+                    self._throttle.slow_down()
+                else:
+                    self._throttle.speed_up()
+            if not deferred or attempt >= self.deferral_retries:
+                if send_result is not None:
+                    send_result.record(recipients, outcome, time.perf_counter() - start, attempt)
+                return refused
+            if send_result is not None:
+                settled = [email_address for email_address in recipients if email_address not in deferred]
+                send_result.record(settled, outcome, time.perf_counter() - start, attempt)
+            for email_address in deferred:
+                del refused[email_address]
+            delay = self.deferral_retry_delay * 2 ** attempt
+            remaining = self._remaining()
+            if remaining is not None and remaining < delay:
+                raise self._deadline_error()
+            time.sleep(delay)
+            recipients = deferred
+            attempt += 1
+
+    def _call(self, connection, function, size=None):
+        """
+        connection.call(function), within send_timeout and the deadline, with
+        the time it takes, and whether the connection failed, recorded
+        against the relay it is connected to. function sends one message, of
+        size bytes, or of as many bytes as size counts if it is a
+        _ByteCounter.
+        """
+        relay = self._relay_of.get(connection.ensure_server()) if self._relays is not None else None
+        start = time.perf_counter()
+        try:
+            with self._in_time(connection):
+                if relay is None:
+                    result = connection.call(function)
+                else:
+                    with self._relays.track(relay):
+                        try:
+                            result = connection.call(function)
+                        except (_smtplib.SMTPServerDisconnected, OSError):
+                            self._relays.record_failure(relay)
+                            raise
+        except _smtplib.SMTPRecipientsRefused:
+            # The server answered, but took none of the recipients.
+            self._observe_send(relay, time.perf_counter() - start, None)
+            raise
+        elapsed = time.perf_counter() - start
+        if relay is not None:
+            self._relays.record_latency(relay, elapsed)
+        self._observe_send(relay, elapsed, size)
+        return result
+
+    def _observe_send(self, relay, elapsed, size):
+        if self.observer is None:
+            return
+        server = _server_name(relay.host, relay.port) if relay is not None else self._server_name
+        self.observer.phase("send", elapsed, server)
+        if size is not None:
+            self.observer.message_sent(size.bytes if isinstance(size, _ByteCounter) else size, server)
+
+    @contextlib.contextmanager
+    def _in_time(self, connection):
+        """
+        Bounds the with block by send_timeout and the deadline, and raises
+        SendTimeoutError if it runs out of time, or if a command timed out.
+        """
+        remaining = self._remaining()
+        if remaining is None and self.send_timeout is None:
+            try:
+                yield
+            except _errors.SendTimeoutError:
+                raise
+            except (_smtplib.SMTPException, OSError) as error:
+                if self.command_timeout is not None and _errors._caused_by_timeout(error):
+                    raise _errors.SendTimeoutError("command", self.command_timeout) from error
+                raise
+            return
+        if remaining is not None and remaining <= 0:
+            raise self._deadline_error()
+        if remaining is None or (self.send_timeout is not None and self.send_timeout < remaining):
+            phase, limit, seconds = "send", self.send_timeout, self.send_timeout
+        else:
+            phase, limit, seconds = "deadline", self._deadlines.current[1], remaining
+        expires_at = time.monotonic() + seconds
+        # Within the scope, a reconnect after the watchdog has shut the
+        # connection down fails at once instead of sending again.
+        with self._deadline_scope(expires_at=expires_at, length=limit), \
+                _timeouts.Watchdog(connection, expires_at) as watchdog:
+            try:
+                yield
+            except _errors.SendTimeoutError:
+                raise
+            except (_smtplib.SMTPException, OSError) as error:
+                if watchdog.expired:
+                    raise _errors.SendTimeoutError(phase, limit) from error
+                if self.command_timeout is not None and _errors._caused_by_timeout(error):
+                    raise _errors.SendTimeoutError("command", self.command_timeout) from error
+                raise
+
+    @contextlib.contextmanager
+    def _deadline_scope(self, seconds=None, expires_at=None, length=None):
+        """
+        Within the with block, everything this thread does for this
+        EmailSender must finish within seconds (or by the time.monotonic()
+        time expires_at), or within the deadline already in force, whichever
+        is sooner.
+        """
+        previous = getattr(self._deadlines, "current", None)
+        if seconds is not None:
+            expires_at, length = time.monotonic() + seconds, seconds
+        current = previous
+        if expires_at is not None and (previous is None or expires_at < previous[0]):
+            current = (expires_at, length)
+        self._deadlines.current = current
+        try:
+            yield
+        finally:
+            self._deadlines.current = previous
+
+    def _remaining(self):
+        current = getattr(self._deadlines, "current", None)
+        if current is None:
+            return None
+        return current[0] - time.monotonic()
+
+    def _deadline_error(self):
+        return _errors.SendTimeoutError("deadline", self._deadlines.current[1])
+
+    def _resolve(self, from_email_address, destination_email_addresses):
+        from_email_address, destination_email_addresses = \
+            _resolve_addresses(self, from_email_address, destination_email_addresses)
+        if self.preprocess_recipients:
+            destination_email_addresses = _recipients.prepare_recipients(destination_email_addresses)
+        return from_email_address, destination_email_addresses
+
+    def _transactions(self, destination_email_addresses):
+        """
+        Splits destination_email_addresses into the recipients of each
+        transaction in single transaction mode, one domain to each if the
+        recipients are preprocessed.
+        """
+        if self.preprocess_recipients:
+            return _recipients.domain_batches(destination_email_addresses, self.max_recipients_per_transaction)
+        return _chunked(destination_email_addresses, self.max_recipients_per_transaction)
+
+    def _wait_turn(self, from_email_address):
+        if self._throttle is not None:
+            remaining = self._remaining()
+            waited = self._throttle.wait(from_email_address, remaining)
+            if waited is None:
+                raise self._deadline_error()
+            if self.observer is not None:
+                self.observer.phase("throttle", waited)
+
+    @contextlib.contextmanager
+    def _phase(self, name, server=None):
+        """
+        Tells the observer how long the with block took, if it finishes.
+        """
+        if self.observer is None:
+            yield
+            return
+        start = time.perf_counter()
+        yield
+        self.observer.phase(name, time.perf_counter() - start, server)
+
+    def _observe_result(self, send_result):
+        if self.observer is not None:
+            for result in send_result.recipients.values():
+                self.observer.recipient(result)
+
+    @property
+    def _server_name(self):
+        if self.transport is not None:
+            return self.transport.name
+        return _server_name(self.server_host, self.port)
+
+    @contextlib.contextmanager
+    def _server_slot(self):
+        if self._slots is None:
+            yield
+            return
+        with self._slots:
+            yield
+
+    @staticmethod
+    def _server_slots_for(server_key, max_connections):
+        """
+        Returns the semaphore shared by every EmailSender in the process that
+        connects to server_key. Raises ValueError if it was made for a
+        different max_connections, since both could not be kept to.
+        """
+        with EmailSender._server_slots_lock:
+            existing = EmailSender._server_slots.get(server_key)
+            if existing is None:
+                existing = EmailSender._server_slots[server_key] = \
+                    (max_connections, threading.BoundedSemaphore(max_connections))
+            elif existing[0] != max_connections:
+                raise ValueError("{!r} is already limited to max_connections_per_server={!r}.".format(
+                    server_key, existing[0]
+                ))
+            return existing[1]
+
+    @contextlib.contextmanager
+    def _session(self, pool):
+        if pool is not None:
+            remaining = self._remaining()
+            if remaining is not None and remaining <= 0:
+                raise self._deadline_error()
+            start = time.perf_counter()
+            with pool.connection(remaining) as pooled_connection:
+                if self.observer is not None:
+                    self.observer.phase("pool_wait", time.perf_counter() - start)
+                    if pooled_connection.reused:
+                        self.observer.connection_reused(self._connected_name(pooled_connection.server))
+                yield pooled_connection
+        elif self._relays is not None or self.transport is not None:
+            from wmul_emailer.pool import _close_quietly
+            server = self._connect()
+            try:
+                yield _SingleUseConnection(server)
+            finally:
+                _close_quietly(server)
+        else:
+            options = self._smtp_options()
+            start = time.perf_counter()
+            try:
+                smtp = self._new_smtp(self.server_host, self.port, options)
+            except (_smtplib.SMTPServerDisconnected, OSError) as error:
+                # A greeting that never comes is reported as a disconnect.
+                if "timeout" in options and _errors._caused_by_timeout(error):
+                    raise self._connect_timeout_error(options) from error
+                raise
+            with smtp as server:
+                self._opened(self._server_name, start)
+                self._set_command_timeout(server)
+                self._secure(server, self.server_host, self.port, self._server_name)
+                self._login(server, self._server_name)
+                yield _SingleUseConnection(server)
+
+    def _make_pool(self, size):
+        from wmul_emailer.pool import SMTPConnectionPool
+        return SMTPConnectionPool(
+            self._connect,
+            max_size=size,
+            idle_timeout=self.pool_idle_timeout,
+            max_messages_per_connection=self.pool_max_messages_per_connection
+        )
+
+    def _connect(self):
+        if self.transport is not None:
+            start = time.perf_counter()
+            server = self.transport.open()
+            self._opened(self._server_name, start)
+            return server
+        if self._relays is None:
+            return self._open(self.server_host, self.port)
+        tried = []
+        last_error = None
+        while True:
+            relay = self._relays.choose(exclude=tried)
+            if relay is None:
+                if last_error is not None:
+                    raise _errors.NoRelayAvailableError(
+                        "Every smtp relay failed. The last error was: {}".format(last_error)
+                    )
+                raise _errors.NoRelayAvailableError("Every smtp relay is being skipped after failing.")
+            tried.append(relay)
+            start = time.perf_counter()
+            try:
+                server = self._open(relay.host, relay.port)
+            except _errors.SendTimeoutError as error:
+                if error.phase == "deadline":
+                    self._relays.abandon_probe(relay)
+                    raise
+                self._relays.record_failure(relay)
+                last_error = error
+                continue
+            except (_smtplib.SMTPException, OSError) as error:
+                self._relays.record_failure(relay)
+                last_error = error
+                continue
+            except BaseException:
+                self._relays.abandon_probe(relay)
+                raise
+            self._relays.record_success(relay, time.perf_counter() - start)
+            self._relay_of[server] = relay
+            return server
+
+    def _open(self, host, port):
+        options = self._smtp_options()
+        start = time.perf_counter()
+        try:
+            server = self._new_smtp(host, port, options)
+        except (_smtplib.SMTPServerDisconnected, OSError) as error:
+            if "timeout" in options and _errors._caused_by_timeout(error):
+                raise self._connect_timeout_error(options) from error
+            raise
+        try:
+            self._opened(_server_name(host, port), start)
+            self._set_command_timeout(server)
+            self._secure(server, host, port, _server_name(host, port))
+            self._login(server, _server_name(host, port))
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    def _new_smtp(self, host, port, options):
+        if self.tls == "implicit":
+            session = self._tls_sessions.get(host, port) if self._tls_sessions is not None else None
+            return _tls.SMTPS(host, port=port, context=self.ssl_context, session=session, **options)
+        # Looked up on the package, where it can be patched.
+        return wmul_emailer.SMTP(host, port=port, **options)
+
+    def _secure(self, server, host, port, server_name):
+        """
+        Starts TLS, if it is not already started, and keeps the TLS session
+        to resume the next time.
+        """
+        if self.tls is None:
+            return
+        if self.tls == "starttls":
+            session = self._tls_sessions.get(host, port) if self._tls_sessions is not None else None
+            seconds = _tls.starttls(server, self.ssl_context, session)
+        else:
+            seconds = server.handshake_seconds
+        if self.observer is not None:
+            self.observer.phase("tls", seconds, server_name)
+            self.observer.tls_handshake(server_name, _tls.session_reused(server))
+        if self._tls_sessions is not None:
+            # With TLS 1.3, the session is only sent after the handshake, so
+            # read the reply to EHLO, which is needed anyway, first.
+            server.ehlo_or_helo_if_needed()
+            self._tls_sessions.put(host, port, _tls.session_of(server))
+
+    def _smtp_options(self):
+        timeouts = [self.connect_timeout]
+        remaining = self._remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                raise self._deadline_error()
+            timeouts.append(remaining)
+        timeouts = [timeout for timeout in timeouts if timeout is not None]
+        if not timeouts:
+            return {}
+        return {"timeout": min(timeouts)}
+
+    def _connect_timeout_error(self, options):
+        if self.connect_timeout is not None and options["timeout"] == self.connect_timeout:
+            return _errors.SendTimeoutError("connect", self.connect_timeout)
+        return self._deadline_error()
+
+    def _set_command_timeout(self, server):
+        # The socket still has the timeout it was connected with, which may
+        # have been shortened to fit the deadline of this send.
+        if server.sock is not None:
+            server.sock.settimeout(self.command_timeout if self.command_timeout is not None else self.connect_timeout)
+
+    def _run_health_checks(self, interval):
+        while not self._health_checks_stopped.wait(interval):
+            self.check_relays()
+
+    def _is_repeat(self, email_body, email_subject, from_email_address, destination_email_addresses):
+        return self._coalescer is not None and \
+            not self._coalescer.offer(email_body, email_subject, from_email_address, destination_email_addresses)
+
+    @contextlib.contextmanager
+    def _coalesced(self, email_body, email_subject, from_email_address, destination_email_addresses):
+        """
+        Yields a list for the SendResult of sending an e-mail that the
+        coalescer let through. Unless it was delivered to someone, the
+        coalescer forgets the e-mail, so that its repeats are sent.
+        """
+        sent = []
+        try:
+            yield sent
+        finally:
+            if self._coalescer is not None and not (sent and sent[0].delivered):
+                self._coalescer.forget(email_body, email_subject, from_email_address, destination_email_addresses)
+
+    def _run_digests(self, interval):
+        while not self._digests_stopped.wait(interval):
+            self.send_digests()
+
+    def _login(self, server, server_name):
+        if self.user_name:
+            with self._phase("login", server_name):
+                server.login(user=self.user_name, password=self.password)
+
+    def _opened(self, server_name, start):
+        if self.observer is not None:
+            self.observer.phase("connect", time.perf_counter() - start, server_name)
+            self.observer.connection_opened(server_name)
+
+    def _connected_name(self, server):
+        relay = self._relay_of.get(server) if self._relays is not None and server is not None else None
+        if relay is None:
+            return self._server_name
+        return _server_name(relay.host, relay.port)
+
+
+class _SingleUseConnection:
+    __slots__ = ("server",)
+
+    def __init__(self, server):
+        self.server = server
+
+    def call(self, function):
+        return function(self.server)
+
+    def ensure_server(self):
+        return self.server
+
+
+_UNDISCLOSED_RECIPIENTS = "undisclosed-recipients:;"
+
+
+def _sendmail(server, from_email_address, recipients, msg_bytes, pipelining=True):
+    mail_options = []
+    if not all(_is_ascii(address) for address in recipients) or not _is_ascii(from_email_address):
+        mail_options = ["SMTPUTF8", "BODY=8BITMIME"]
+    if pipelining and _pipelining.supports_pipelining(server):
+        return _pipelining.sendmail(server, from_email_address, recipients, msg_bytes, mail_options)
+    if mail_options:
+        return server.sendmail(from_email_address, recipients, msg_bytes, mail_options=mail_options)
+    return server.sendmail(from_email_address, recipients, msg_bytes)
+
+
+def _send_streamed_to(server, from_email_address, recipients, chunks, size=None, pipelining=True):
+    if isinstance(server, _transports.LocalTransport):
+        return server.send_chunks(from_email_address, recipients, chunks) or {}
+    from wmul_emailer.streaming import send_streamed
+    return send_streamed(server, from_email_address, recipients, chunks, size, pipelining)
+
+
+class _ByteCounter:
+    """
+    Counts the bytes of the chunks that pass through count.
+    """
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0
+
+    def count(self, chunks):
+        for chunk in chunks:
+            self.bytes += len(chunk)
+            yield chunk
+
+
+def _server_name(host, port):
+    return "{}:{}".format(host, port)
+
+
+def _server_size_limit(server):
+    """
+    Returns the largest message, in bytes, that the server advertises it will
+    accept with the SIZE extension, or 0 if it does not advertise a limit.
+    """
+    server.ehlo_or_helo_if_needed()
+    try:
+        return int(server.esmtp_features.get("size", 0))
+    except ValueError:
+        return 0
+
+
+def _is_ascii(text):
+    try:
+        text.encode("ascii")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _chunked(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
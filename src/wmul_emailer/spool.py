@@ -0,0 +1,346 @@
+"""
+@Author = 'Mike Stanley'
+
+A durable on-disk spool of outbound e-mails, so that e-mails that could not be
+sent (for example, because the smtp server is down) survive a crash or a
+restart and can be delivered later.
+
+The spool directory holds two append-only files:
+    messages.dat  The e-mails themselves, one JSON record after another.
+    index.log     One line per event. "E <id> <offset> <length>" when an e-mail
+                  is spooled, "R <id> <attempts> <next_attempt>" when a
+                  delivery attempt fails and will be retried, "D <id>" when it
+                  is delivered, "F <id>" when it has failed permanently, and
+                  "S <id>" when it was delivered to some of its recipients,
+                  and the others were spooled again as a new e-mail.
+
+Opening a spool only reads index.log, not the messages. Writes are buffered
+and fsync'd in batches, every sync_every records or every sync_interval
+seconds, whichever comes first, rather than once per e-mail. A timer syncs
+records that are still waiting when sync_interval has passed, even if nothing
+else is written. If the process
+crashes, at most the records since the last sync are lost. Once every spooled
+e-mail has been delivered or has failed, both files are truncated.
+
+Only one process may have a spool open at a time. On platforms that have
+fcntl, this is enforced with a lock on index.log.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              drain reads the recipients that deliver did not deliver to from
+              what it returns, and spools the deferred ones again.
+              Records are synced after sync_interval even if nothing else is
+              written.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from smtplib import SMTPRecipientsRefused, SMTPResponseException
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_logger = logging.getLogger(__name__)
+
+SpooledEmail = namedtuple(
+    "SpooledEmail",
+    ["email_id", "email_body", "email_subject", "from_email_address", "destination_email_addresses", "attempts",
+     "next_attempt"]
+)
+
+DrainResult = namedtuple("DrainResult", ["delivered", "deferred", "failed"])
+
+_MESSAGES_FILE_NAME = "messages.dat"
+_INDEX_FILE_NAME = "index.log"
+
+
+class SpoolLockedError(RuntimeError):
+    pass
+
+
+class Spool:
+
+    def __init__(self, directory, sync_every=100, sync_interval=1.0, max_attempts=10, retry_base_delay=30.0,
+                 retry_max_delay=3600.0):
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._lock = threading.RLock()
+        self._pending = {}
+        self._next_id = 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._sync_timer = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._index_file = open(os.path.join(directory, _INDEX_FILE_NAME), "a+b")
+        try:
+            _lock_file(self._index_file)
+            self._messages_file = open(os.path.join(directory, _MESSAGES_FILE_NAME), "a+b")
+        except BaseException:
+            self._index_file.close()
+            raise
+        self._recover()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        with self._lock:
+            if self._index_file.closed:
+                return
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self.sync()
+            self._messages_file.close()
+            self._index_file.close()
+
+    def put(self, email_body, email_subject, from_email_address, destination_email_addresses):
+        return self._put(email_body, email_subject, from_email_address, destination_email_addresses)
+
+    def _put(self, email_body, email_subject, from_email_address, destination_email_addresses, attempts=0,
+             next_attempt=0.0):
+        record = json.dumps({
+            "body": email_body,
+            "subject": email_subject,
+            "from": from_email_address,
+            "to": list(destination_email_addresses)
+        }).encode("utf-8") + b"\n"
+        with self._lock:
+            self._messages_file.seek(0, os.SEEK_END)
+            offset = self._messages_file.tell()
+            self._messages_file.write(record)
+            email_id = self._next_id
+            self._next_id += 1
+            self._pending[email_id] = [offset, len(record), attempts, next_attempt]
+            self._append_index("E {} {} {}".format(email_id, offset, len(record)))
+            if attempts:
+                self._append_index("R {} {} {}".format(email_id, attempts, next_attempt))
+        return email_id
+
+    def pending(self):
+        with self._lock:
+            email_ids = sorted(self._pending)
+        for email_id in email_ids:
+            spooled_email = self._read(email_id)
+            if spooled_email is not None:
+                yield spooled_email
+
+    def drain(self, deliver, now=None):
+        """
+        Calls deliver(spooled_email) for every spooled e-mail that is due.
+        deliver may return a dict of the recipients that it did not deliver
+        to, mapped to the server's (code, message) reply or to the exception
+        that stopped delivery, as send_email does. Failures are retried with
+        exponential backoff, except for permanent (5xx) smtp errors and
+        e-mails that have used up max_attempts. If only some recipients
+        failed, the e-mail is spooled again for the ones to retry.
+        """
+        delivered = deferred = failed = 0
+        now = time.time() if now is None else now
+        with self._lock:
+            due = sorted(email_id for email_id, entry in self._pending.items() if entry[3] <= now)
+        for email_id in due:
+            spooled_email = self._read(email_id)
+            if spooled_email is None:
+                continue
+            attempts = spooled_email.attempts + 1
+            next_attempt = now + min(self.retry_base_delay * 2 ** (attempts - 1), self.retry_max_delay)
+            try:
+                outcome = deliver(spooled_email)
+            except Exception as error:
+                if _is_permanent(error) or attempts >= self.max_attempts:
+                    _logger.error("Giving up on spooled e-mail %s after %s attempts: %s", email_id, attempts, error)
+                    self._finish(email_id, "F")
+                    failed += 1
+                else:
+                    self._defer(email_id, attempts, next_attempt)
+                    deferred += 1
+                continue
+            undelivered = dict(outcome or {})
+            # Recipients that a SendResult never got to.
+            for address in getattr(outcome, "pending", None) or []:
+                undelivered.setdefault(address, None)
+            retry = [
+                address for address, outcome in undelivered.items()
+                if not _is_permanent_outcome(outcome) and attempts < self.max_attempts
+            ]
+            given_up = [address for address in undelivered if address not in retry]
+            if given_up:
+                _logger.error("Giving up on %s of the recipients of spooled e-mail %s after %s attempts: %s",
+                              ", ".join(given_up), email_id, attempts,
+                              "; ".join("{}: {}".format(address, undelivered[address]) for address in given_up))
+            if not undelivered:
+                self._finish(email_id, "D")
+                delivered += 1
+            elif len(retry) == len(spooled_email.destination_email_addresses):
+                self._defer(email_id, attempts, next_attempt)
+                deferred += 1
+            elif retry:
+                self._split(spooled_email, retry, attempts, next_attempt)
+                deferred += 1
+            else:
+                self._finish(email_id, "F")
+                failed += 1
+        with self._lock:
+            if not self._pending:
+                self._compact()
+            else:
+                self.sync()
+        return DrainResult(delivered, deferred, failed)
+
+    def sync(self):
+        with self._lock:
+            self._messages_file.flush()
+            os.fsync(self._messages_file.fileno())
+            self._index_file.flush()
+            os.fsync(self._index_file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def _read(self, email_id):
+        with self._lock:
+            entry = self._pending.get(email_id)
+            if entry is None:
+                return None
+            offset, length, attempts, next_attempt = entry
+            self._messages_file.flush()
+            self._messages_file.seek(offset)
+            record = json.loads(self._messages_file.read(length).decode("utf-8"))
+        return SpooledEmail(email_id, record["body"], record["subject"], record["from"], record["to"], attempts,
+                            next_attempt)
+
+    def _defer(self, email_id, attempts, next_attempt):
+        with self._lock:
+            entry = self._pending[email_id]
+            entry[2] = attempts
+            entry[3] = next_attempt
+            self._append_index("R {} {} {}".format(email_id, attempts, next_attempt))
+
+    def _split(self, spooled_email, recipients, attempts, next_attempt):
+        with self._lock:
+            # The new e-mail is recorded first, so that a crash in between
+            # sends to the delivered recipients again rather than losing the
+            # others.
+            self._put(spooled_email.email_body, spooled_email.email_subject, spooled_email.from_email_address,
+                      recipients, attempts, next_attempt)
+            self._finish(spooled_email.email_id, "S")
+
+    def _finish(self, email_id, event):
+        with self._lock:
+            del self._pending[email_id]
+            self._append_index("{} {}".format(event, email_id))
+
+    def _append_index(self, line):
+        self._index_file.write(line.encode("ascii") + b"\n")
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+        elif self._sync_timer is None:
+            self._sync_timer = threading.Timer(self.sync_interval, self._sync_when_due)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+
+    def _sync_when_due(self):
+        with self._lock:
+            self._sync_timer = None
+            if not self._index_file.closed and self._unsynced:
+                self.sync()
+
+    def _compact(self):
+        self._messages_file.truncate(0)
+        self._index_file.truncate(0)
+        self.sync()
+
+    def _recover(self):
+        self._messages_file.seek(0, os.SEEK_END)
+        messages_size = self._messages_file.tell()
+        self._index_file.seek(0)
+        complete_size = 0
+        for line in self._index_file:
+            if not line.endswith(b"\n"):
+                # A partially written line from a crash. It is truncated so
+                # that the next line is not appended to it.
+                self._index_file.truncate(complete_size)
+                break
+            complete_size += len(line)
+            fields = line.split()
+            try:
+                email_id = int(fields[1])
+                if fields[0] == b"E":
+                    offset, length = int(fields[2]), int(fields[3])
+                    # The message was written, but not fsync'd, before a
+                    # crash.
+                    if offset + length <= messages_size:
+                        self._pending[email_id] = [offset, length, 0, 0.0]
+                elif fields[0] == b"R":
+                    if email_id in self._pending:
+                        self._pending[email_id][2:] = [int(fields[2]), float(fields[3])]
+                elif fields[0] in (b"D", b"F", b"S"):
+                    self._pending.pop(email_id, None)
+                self._next_id = max(self._next_id, email_id + 1)
+            except (IndexError, ValueError):
+                continue
+        self._index_file.seek(0, os.SEEK_END)
+
+
+def _is_permanent(error):
+    if isinstance(error, SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def _is_permanent_outcome(outcome):
+    """
+    outcome is what a recipient is mapped to in the dict that deliver
+    returns.
+    """
+    if isinstance(outcome, BaseException):
+        return _is_permanent(outcome)
+    if isinstance(outcome, tuple) and outcome:
+        return outcome[0] >= 500
+    return False
+
+
+def _lock_file(file):
+    if fcntl is None:
+        return
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        raise SpoolLockedError("The spool at {} is open in another process.".format(os.path.dirname(file.name)))
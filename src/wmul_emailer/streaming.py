@@ -0,0 +1,349 @@
+"""
+@Author = 'Mike Stanley'
+
+Streaming of large e-mail bodies and attachments, so that the whole message
+never has to be held in memory.
+
+The body and the attachments may come from a file path or from an iterable of
+bytes (or str) chunks. iter_message generates the message in wire format, a
+block at a time, and send_streamed writes those blocks straight to the DATA
+phase of an smtp conversation. Files are read through a memory map, and every
+part is base64-encoded a block at a time, so peak memory does not grow with
+the size of the files. A file can be sent again (to the next recipient, for
+example) by generating the message again. An iterable can only be sent once.
+
+If compress_threshold is provided, a body or attachment file larger than that
+many bytes is gzip-compressed, once, into a temporary file, and that is
+attached instead. size gives the exact size of the message for a To
+header, without generating it, so that it can be checked against the
+server's SIZE limit before it is sent. The Date, Message-ID, and MIME
+boundary are chosen once for each StreamedMessage, so that every recipient
+gets the same message and its size is known.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Added compress_threshold and size_estimate.
+              The envelope is pipelined when the server supports it.
+              size_estimate is replaced by size, which is exact.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import base64
+import mimetypes
+import mmap
+import os
+import re
+import tempfile
+import uuid
+import zlib
+from email.header import Header
+from email.utils import encode_rfc2231, formatdate, make_msgid
+from smtplib import SMTPDataError
+from wmul_emailer.pipelining import start_data
+
+# base64 turns every 57 bytes into one 76 character line, so blocks that are a
+# multiple of 57 bytes encode to whole lines.
+_BASE64_LINE_BYTES = 57
+_BLOCK_SIZE = _BASE64_LINE_BYTES * 4096
+
+_CRLF = b"\r\n"
+
+_COMPRESSED_BODY_FILENAME = "message.txt.gz"
+
+_TEXT_TYPE = "text/plain; charset=\"utf-8\""
+
+
+class Attachment:
+
+    def __init__(self, source, filename=None, content_type=None):
+        self.source = source
+        if filename is None and _is_path(source):
+            filename = os.path.basename(os.fspath(source))
+        self.filename = filename or "attachment"
+        if content_type is None:
+            content_type = mimetypes.guess_type(self.filename)[0] or "application/octet-stream"
+        self.content_type = content_type
+
+
+class _Part:
+    __slots__ = ("content_type", "disposition", "_source", "_used")
+
+    def __init__(self, source, content_type, disposition=None):
+        self.content_type = content_type
+        self.disposition = disposition
+        self._source = source
+        self._used = False
+
+    @property
+    def reusable(self):
+        return isinstance(self._source, bytes) or _is_path(self._source) or _is_file(self._source)
+
+    @property
+    def size(self):
+        if isinstance(self._source, bytes):
+            return len(self._source)
+        if _is_path(self._source):
+            return os.path.getsize(self._source)
+        if _is_file(self._source):
+            return os.fstat(self._source.fileno()).st_size
+        return None
+
+    def blocks(self):
+        if isinstance(self._source, bytes):
+            yield self._source
+        elif _is_path(self._source):
+            with open(self._source, "rb") as source_file:
+                yield from _iter_file(source_file)
+        elif _is_file(self._source):
+            yield from _iter_file(self._source)
+        else:
+            if self._used:
+                raise RuntimeError("An iterable body or attachment can only be sent once.")
+            self._used = True
+            for chunk in self._source:
+                yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+    def compressed(self):
+        compressed_file = tempfile.TemporaryFile()
+        compressor = zlib.compressobj(wbits=31)
+        for block in self.blocks():
+            compressed_file.write(compressor.compress(block))
+        compressed_file.write(compressor.flush())
+        compressed_file.flush()
+        return compressed_file
+
+
+class StreamedMessage:
+
+    def __init__(self, email_subject, from_email_address, email_body=None, body_source=None, attachments=(),
+                 compress_threshold=None):
+        if email_body is not None and body_source is not None:
+            raise ValueError("Only one of email_body and body_source may be provided.")
+        body = email_body.encode("utf-8") if email_body is not None else body_source
+        self.email_subject = email_subject
+        self.from_email_address = from_email_address
+        self.date = formatdate(localtime=True)
+        self.message_id = make_msgid()
+        self._boundary = "===============" + uuid.uuid4().hex + "=="
+        self.parts = []
+        self._temporary_files = []
+        try:
+            if body is not None:
+                body_part = _Part(body, _TEXT_TYPE)
+                if self._should_compress(body_part, compress_threshold):
+                    self.parts.append(_Part(
+                        "The body of this e-mail was {} bytes, so it has been compressed and attached as {}."
+                        .format(body_part.size, _COMPRESSED_BODY_FILENAME).encode("utf-8"),
+                        _TEXT_TYPE
+                    ))
+                    self.parts.append(self._compress(body_part, _COMPRESSED_BODY_FILENAME))
+                else:
+                    self.parts.append(body_part)
+            for attachment in attachments:
+                if not isinstance(attachment, Attachment):
+                    attachment = Attachment(attachment)
+                part = _Part(attachment.source, attachment.content_type, _content_disposition(attachment.filename))
+                if self._should_compress(part, compress_threshold):
+                    part = self._compress(part, attachment.filename + ".gz")
+                self.parts.append(part)
+        except BaseException:
+            self.close()
+            raise
+        if not self.parts:
+            self.parts.append(_Part(b"", _TEXT_TYPE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        for temporary_file in self._temporary_files:
+            temporary_file.close()
+        self._temporary_files = []
+
+    @property
+    def reusable(self):
+        return all(part.reusable for part in self.parts)
+
+    def size(self, to_header):
+        """
+        Returns the number of bytes that iter_message(to_header) generates,
+        or None if a part comes from an iterable, whose size is not known.
+        """
+        sizes = [part.size for part in self.parts]
+        if None in sizes:
+            return None
+        size = len(self._message_headers(to_header))
+        if not self._multipart:
+            return size + len(_part_headers(self.parts[0])) + _base64_size(sizes[0])
+        size += len(self._multipart_headers()) + len(self._closing_delimiter())
+        for part, part_size in zip(self.parts, sizes):
+            size += len(self._delimiter()) + len(_part_headers(part)) + _base64_size(part_size)
+        return size
+
+    def iter_message(self, to_header):
+        yield self._message_headers(to_header)
+        if not self._multipart:
+            yield from _iter_part(self.parts[0])
+            return
+        yield self._multipart_headers()
+        for part in self.parts:
+            yield self._delimiter()
+            yield from _iter_part(part)
+        yield self._closing_delimiter()
+
+    @property
+    def _multipart(self):
+        return len(self.parts) > 1 or self.parts[0].disposition is not None
+
+    def _message_headers(self, to_header):
+        return _header_block([
+            ("Subject", self.email_subject),
+            ("From", self.from_email_address),
+            ("To", to_header),
+            ("Date", self.date),
+            ("Message-ID", self.message_id),
+            ("MIME-Version", "1.0"),
+        ])
+
+    def _multipart_headers(self):
+        return _header_block([("Content-Type", "multipart/mixed; boundary=\"{}\"".format(self._boundary))]) + _CRLF
+
+    def _delimiter(self):
+        return "--{}\r\n".format(self._boundary).encode("ascii")
+
+    def _closing_delimiter(self):
+        return "--{}--\r\n".format(self._boundary).encode("ascii")
+
+    def _should_compress(self, part, compress_threshold):
+        if compress_threshold is None or not part.reusable:
+            return False
+        return part.size > compress_threshold
+
+    def _compress(self, part, filename):
+        compressed_file = part.compressed()
+        self._temporary_files.append(compressed_file)
+        return _Part(compressed_file, "application/gzip", _content_disposition(filename))
+
+
+def send_streamed(server, from_addr, to_addrs, chunks, size=None, pipelining=True):
+    """
+    Sends one message, generated by the chunks iterable, to to_addrs over an
+    smtplib.SMTP connection. Returns the refused recipients, the same as
+    SMTP.sendmail.
+    """
+    server.ehlo_or_helo_if_needed()
+    mail_options = []
+    if size is not None and server.has_extn("size"):
+        mail_options.append("size={}".format(size))
+    refused = start_data(server, from_addr, to_addrs, mail_options, pipelining)
+    at_line_start = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        server.send(_quote_periods(chunk, at_line_start))
+        at_line_start = chunk.endswith(b"\n")
+    server.send(b".\r\n" if at_line_start else b"\r\n.\r\n")
+    code, response = server.getreply()
+    if code != 250:
+        _rset_quietly(server)
+        raise SMTPDataError(code, response)
+    return refused
+
+
+def _iter_part(part):
+    yield _part_headers(part)
+    pending = b""
+    for block in part.blocks():
+        if pending:
+            block = pending + block
+        usable = len(block) - len(block) % _BASE64_LINE_BYTES
+        pending = block[usable:]
+        if usable:
+            yield base64.encodebytes(block[:usable]).replace(b"\n", _CRLF)
+    if pending:
+        yield base64.encodebytes(pending).replace(b"\n", _CRLF)
+
+
+def _part_headers(part):
+    lines = [("Content-Type", part.content_type), ("Content-Transfer-Encoding", "base64")]
+    if part.disposition is not None:
+        lines.append(("Content-Disposition", part.disposition))
+    return _header_block(lines) + _CRLF
+
+
+def _iter_file(source_file):
+    size = os.fstat(source_file.fileno()).st_size
+    if size == 0:
+        return
+    with mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for start in range(0, size, _BLOCK_SIZE):
+            yield mapped[start:start + _BLOCK_SIZE]
+
+
+def _base64_size(size):
+    lines = -(-size // _BASE64_LINE_BYTES)
+    return 4 * -(-size // 3) + 2 * lines
+
+
+def _header_block(headers):
+    return b"".join(_header_line(name, value) + _CRLF for name, value in headers)
+
+
+def _header_line(name, value):
+    if "\r" in value or "\n" in value:
+        raise ValueError("Header values may not contain line breaks.")
+    try:
+        encoded = value.encode("ascii")
+    except UnicodeEncodeError:
+        encoded = Header(value, header_name=name).encode(linesep="\r\n").encode("ascii")
+    return name.encode("ascii") + b": " + encoded
+
+
+def _content_disposition(filename):
+    try:
+        filename.encode("ascii")
+    except UnicodeEncodeError:
+        return "attachment; filename*={}".format(encode_rfc2231(filename, "utf-8"))
+    return "attachment; filename=\"{}\"".format(filename.replace("\\", "\\\\").replace("\"", "\\\""))
+
+
+def _quote_periods(chunk, at_line_start):
+    quoted = re.sub(br"(?m)^\.", b"..", chunk)
+    if not at_line_start and chunk.startswith(b"."):
+        # The chunk continues a line from the previous chunk, so its first
+        # period is not at the start of a line.
+        quoted = quoted[1:]
+    return quoted
+
+
+def _is_file(source):
+    return hasattr(source, "fileno") and hasattr(source, "read")
+
+
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike)) and not isinstance(source, bytes)
+
+
+def _rset_quietly(server):
+    try:
+        server.rset()
+    except Exception:
+        pass
@@ -0,0 +1,197 @@
+"""
+@Author = 'Mike Stanley'
+
+Pre-rendered messages, so that the body of an e-mail is encoded once and
+reused for every recipient rather than being re-encoded for each of them.
+
+render_message builds the MIMEText for the body, subject, and from address
+and flattens it to wire format (CRLF line endings) once. Only the To header
+differs between recipients, and RenderedMessage.for_recipient inserts it
+into the already rendered bytes.
+
+RenderedMessageCache keeps the most recently rendered messages, up to
+max_entries messages and max_bytes bytes, so that repeated e-mails (the
+same alert sent again and again, for example) are not rendered again. The
+bytes counted include the body, subject, and from address that each message
+is cached under, since the cache keeps them too.
+
+If compress_threshold is provided, bodies larger than that many bytes are
+gzip-compressed and attached, with a short note as the body.
+render_split_messages splits a body that is too large for the smtp server
+into numbered parts.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Added compression of large bodies, and render_split_messages.
+              The email package is imported when the first message is
+              rendered.
+              max_bytes counts the strings that messages are cached under.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import io
+import sys
+import threading
+from collections import OrderedDict
+
+_CRLF = b"\r\n"
+_END_OF_HEADERS = b"\r\n\r\n"
+
+COMPRESSED_BODY_FILENAME = "message.txt.gz"
+
+# Room left in each split part for the To header, which is added later.
+_TO_HEADER_ALLOWANCE = 1024
+
+
+class RenderedMessage:
+    __slots__ = ("_head", "_tail", "size")
+
+    def __init__(self, rendered):
+        head, separator, tail = rendered.partition(_END_OF_HEADERS)
+        self._head = head
+        self._tail = separator + tail
+        self.size = len(rendered)
+
+    def for_recipient(self, to_header):
+        return b"".join([self._head, _CRLF, _to_header_line(to_header), self._tail])
+
+    def size_for(self, to_header):
+        return self.size + len(_CRLF) + len(_to_header_line(to_header))
+
+
+class RenderedMessageCache:
+
+    def __init__(self, max_entries=32, max_bytes=64 * 1024 * 1024, compress_threshold=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, email_body, email_subject, from_email_address):
+        key = (email_body, email_subject, from_email_address)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        rendered_message = render_message(email_body, email_subject, from_email_address, self.compress_threshold)
+        size = rendered_message.size + sum(sys.getsizeof(part) for part in key)
+        if size > self.max_bytes or self.max_entries < 1:
+            return rendered_message
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (rendered_message, size)
+                self._bytes += size
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self._bytes -= evicted_size
+        return rendered_message
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+def render_message(email_body, email_subject, from_email_address, compress_threshold=None):
+    # Imported here, so that constructing an EmailSender does not import the
+    # email package until the first message is rendered.
+    import gzip
+    from email.generator import BytesGenerator
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    encoded_body = email_body.encode("utf-8")
+    if compress_threshold is not None and len(encoded_body) > compress_threshold:
+        msg = MIMEMultipart()
+        msg.attach(MIMEText(
+            "The body of this e-mail was {} bytes, so it has been compressed and attached as {}."
+            .format(len(encoded_body), COMPRESSED_BODY_FILENAME)
+        ))
+        attachment = MIMEApplication(gzip.compress(encoded_body), "gzip")
+        attachment.add_header("Content-Disposition", "attachment", filename=COMPRESSED_BODY_FILENAME)
+        msg.attach(attachment)
+    else:
+        msg = MIMEText(email_body)
+    msg['Subject'] = email_subject
+    msg['From'] = from_email_address
+    with io.BytesIO() as rendered:
+        BytesGenerator(rendered).flatten(msg, linesep="\r\n")
+        return RenderedMessage(rendered.getvalue())
+
+
+def render_split_messages(email_body, email_subject, from_email_address, limit, compress_threshold=None):
+    """
+    Splits email_body, on line breaks where possible, into as few numbered
+    parts as it takes for each rendered part to fit within limit bytes.
+    """
+    allowed = limit - _TO_HEADER_ALLOWANCE
+    whole = render_message(email_body, email_subject, from_email_address, compress_threshold)
+    part_count = max(2, -(-whole.size // max(allowed, 1)))
+    while part_count <= max(len(email_body), 1):
+        bodies = _split_text(email_body, part_count)
+        rendered_messages = [
+            render_message(
+                body,
+                "{} (part {} of {})".format(email_subject, index, len(bodies)),
+                from_email_address,
+                compress_threshold
+            )
+            for index, body in enumerate(bodies, start=1)
+        ]
+        if all(rendered_message.size <= allowed for rendered_message in rendered_messages):
+            return rendered_messages
+        part_count *= 2
+    raise ValueError("The message cannot be split into parts of {} bytes.".format(limit))
+
+
+def _split_text(text, part_count):
+    target = -(-len(text) // part_count)
+    parts = []
+    start = 0
+    while start < len(text):
+        end = min(start + target, len(text))
+        if end < len(text):
+            line_break = text.rfind("\n", start, end)
+            if line_break > start:
+                end = line_break + 1
+        parts.append(text[start:end])
+        start = end
+    return parts
+
+
+def _to_header_line(to_header):
+    if "\r" in to_header or "\n" in to_header:
+        raise ValueError("E-mail addresses may not contain line breaks.")
+    try:
+        encoded = to_header.encode("ascii")
+    except UnicodeEncodeError:
+        from email.header import Header
+        encoded = Header(to_header, header_name="To").encode(linesep="\r\n").encode("ascii")
+    return b"To: " + encoded
@@ -0,0 +1,462 @@
+"""
+@Author = 'Mike Stanley'
+
+A small, in-process stand-in SMTP server for tests. It runs in background
+threads, accepts every message it is sent, and keeps them in memory so that
+tests can check what was delivered without a real mail server.
+
+    with LocalSMTPServer() as server:
+        emailer = EmailSender(server.host, server.port, ...)
+        emailer.send_email(...)
+        assert server.messages[0].rcpt_tos == ["foo@example.com"]
+
+latency adds a delay, in seconds, to every round trip: it is slept before the
+replies to a group of commands are sent, so a client that pipelines its
+commands (RFC 2920) pays it once per group instead of once per command.
+refused_recipients is a collection of addresses that RCPT TO will refuse with
+550. deferred_recipients maps addresses to the number of times RCPT TO defers
+them with 451 before accepting them. If credentials is a (user_name, password)
+tuple, AUTH only succeeds with those credentials. If keep_data is False, the
+bodies of the messages are counted in received_bytes and then thrown away,
+rather than kept in memory. If extensions includes "SIZE <bytes>", larger
+messages are refused with 552 once they have been received. failure_rate is
+the fraction of messages, chosen at random, that are deferred with 451 once
+they have been received, and disconnect_rate is the fraction after which the
+connection is dropped without a reply. seed seeds that random choice.
+
+If tls_context is an ssl.SSLContext for the server side, STARTTLS is
+advertised and supported, or, if implicit_tls is True, every connection
+starts with TLS, the same as SMTPS. server_tls_context and
+client_tls_context return contexts that use, and trust, a self-signed
+certificate for localhost and 127.0.0.1 that is only fit for tests. It is
+made with the openssl command the first time it is needed, in a temporary
+directory that is removed when the process exits, so that no private key is
+shipped with the package.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Enforce the SIZE extension.
+              latency is paid once per round trip rather than once per
+              command, so that pipelining can be measured.
+              Added deferred_recipients.
+              Added failure_rate and disconnect_rate, to inject failures.
+              Added STARTTLS and implicit TLS.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import atexit
+import base64
+import os
+import random
+import select
+import shutil
+import socket
+import socketserver
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+
+__all__ = ["LocalSMTPServer", "ReceivedMessage", "client_tls_context", "server_tls_context"]
+
+
+ReceivedMessage = namedtuple("ReceivedMessage", ["mail_from", "rcpt_tos", "data"])
+
+
+_DEFAULT_EXTENSIONS = ("PIPELINING", "8BITMIME", "AUTH PLAIN LOGIN")
+
+_test_certificate = None
+_test_certificate_lock = threading.Lock()
+
+
+def server_tls_context():
+    certificate, key = _test_certificate_files()
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certificate, key)
+    return context
+
+
+def client_tls_context():
+    certificate, _ = _test_certificate_files()
+    return ssl.create_default_context(cafile=certificate)
+
+
+def _test_certificate_files():
+    """
+    Returns the paths of the test certificate and its private key, and makes
+    them the first time.
+    """
+    global _test_certificate
+    with _test_certificate_lock:
+        if _test_certificate is None:
+            directory = tempfile.mkdtemp(prefix="wmul_emailer_test_cert_")
+            atexit.register(shutil.rmtree, directory, ignore_errors=True)
+            certificate = os.path.join(directory, "cert.pem")
+            key = os.path.join(directory, "key.pem")
+            try:
+                subprocess.run(
+                    [
+                        "openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+                        "-nodes", "-keyout", key, "-out", certificate, "-days", "30", "-subj", "/CN=localhost",
+                        "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"
+                    ],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    check=True
+                )
+            except FileNotFoundError as error:
+                raise RuntimeError("The openssl command is needed to make the test certificate.") from error
+            _test_certificate = certificate, key
+        return _test_certificate
+
+
+class LocalSMTPServer:
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, refused_recipients=(), credentials=None,
+                 extensions=_DEFAULT_EXTENSIONS, keep_data=True, deferred_recipients=None, failure_rate=0.0,
+                 disconnect_rate=0.0, seed=None, tls_context=None, implicit_tls=False):
+        self.latency = latency
+        self.refused_recipients = set(refused_recipients)
+        self.deferred_recipients = dict(deferred_recipients or {})
+        self.credentials = credentials
+        self.extensions = list(extensions)
+        self.keep_data = keep_data
+        self.failure_rate = failure_rate
+        self.disconnect_rate = disconnect_rate
+        self._random = random.Random(seed)
+        self.tls_context = tls_context
+        self.implicit_tls = implicit_tls
+        self.tls_handshake_count = 0
+        self.tls_resumed_count = 0
+        self.messages = []
+        self.received_bytes = 0
+        self.connection_count = 0
+        self.command_count = 0
+        self._lock = threading.Lock()
+        self._server = _ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.stand_in = self
+        self._thread = None
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            args=(0.05,),
+            name="LocalSMTPServer",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    @property
+    def size_limit(self):
+        for extension in self.extensions:
+            keyword, _, limit = extension.partition(" ")
+            if keyword.upper() == "SIZE" and limit.isdigit():
+                return int(limit)
+        return 0
+
+    def _count_connection(self):
+        with self._lock:
+            self.connection_count += 1
+
+    def _count_bytes(self, size):
+        with self._lock:
+            self.received_bytes += size
+
+    def _take_deferral(self, recipient):
+        with self._lock:
+            remaining = self.deferred_recipients.get(recipient, 0)
+            if remaining:
+                self.deferred_recipients[recipient] = remaining - 1
+            return remaining > 0
+
+    def _injected_failure(self):
+        """
+        Returns "disconnect", "defer", or None, for what should happen to the
+        message that has just been received.
+        """
+        if not self.failure_rate and not self.disconnect_rate:
+            return None
+        with self._lock:
+            draw = self._random.random()
+        if draw < self.disconnect_rate:
+            return "disconnect"
+        if draw < self.disconnect_rate + self.failure_rate:
+            return "defer"
+        return None
+
+    def _count_handshake(self, resumed):
+        with self._lock:
+            self.tls_handshake_count += 1
+            if resumed:
+                self.tls_resumed_count += 1
+
+    def _count_command(self):
+        with self._lock:
+            self.command_count += 1
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        # Replies are written as soon as they are ready, as a real server
+        # would, rather than held back by Nagle's algorithm.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stand_in = self.server.stand_in
+        self.mail_from = None
+        self.rcpt_tos = []
+        self._input = bytearray()
+        self._position = 0
+        self._replies = []
+        self.tls = False
+
+    def handle(self):
+        self.stand_in._count_connection()
+        if self.stand_in.implicit_tls and not self._start_tls():
+            return
+        self.reply(220, "localhost wmul_emailer stand-in ESMTP")
+        try:
+            while True:
+                if not self._input_pending():
+                    # The client is waiting for these replies before it sends
+                    # anything else, so this is the end of a round trip.
+                    self.flush_replies()
+                line = self._read_raw_line()
+                if not line:
+                    return
+                command, _, argument = line.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+                self.stand_in._count_command()
+                method = getattr(self, "smtp_" + command.upper(), None)
+                if method is None:
+                    self.reply(500, "Command not recognized")
+                elif method(argument) is False:
+                    return
+        finally:
+            self.flush_replies()
+
+    def reply(self, code, *lines):
+        lines = lines or ("OK",)
+        self._replies.append("".join(
+            "{}{}{}\r\n".format(code, " " if index == len(lines) - 1 else "-", text)
+            for index, text in enumerate(lines)
+        ).encode("utf-8"))
+
+    def flush_replies(self):
+        if not self._replies:
+            return
+        if self.stand_in.latency:
+            time.sleep(self.stand_in.latency)
+        replies, self._replies = self._replies, []
+        try:
+            self.wfile.write(b"".join(replies))
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def read_line(self):
+        self.flush_replies()
+        return self._read_raw_line().decode("utf-8", "replace").rstrip("\r\n")
+
+    def _input_pending(self):
+        if self._input.find(b"\n", self._position) >= 0:
+            return True
+        if self.tls and self.connection.pending():
+            return True
+        readable, _, _ = select.select([self.connection], [], [], 0)
+        return bool(readable)
+
+    def _read_raw_line(self):
+        while True:
+            end = self._input.find(b"\n", self._position)
+            if end >= 0:
+                line = bytes(self._input[self._position:end + 1])
+                self._position = end + 1
+                return line
+            del self._input[:self._position]
+            self._position = 0
+            try:
+                chunk = self.connection.recv(65536)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                line = bytes(self._input)
+                self._input.clear()
+                return line
+            self._input += chunk
+
+    def smtp_HELO(self, argument):
+        self.reply(250, "localhost")
+
+    def smtp_EHLO(self, argument):
+        extensions = self.stand_in.extensions
+        if self.stand_in.tls_context is not None and not self.tls:
+            extensions = extensions + ["STARTTLS"]
+        self.reply(250, "localhost", *extensions)
+
+    def smtp_STARTTLS(self, argument):
+        if self.stand_in.tls_context is None or self.tls:
+            self.reply(502, "Command not implemented")
+            return
+        self.reply(220, "Ready to start TLS")
+        self.flush_replies()
+        if not self._start_tls():
+            return False
+        self.mail_from = None
+        self.rcpt_tos = []
+
+    def _start_tls(self):
+        del self._input[:]
+        self._position = 0
+        try:
+            self.connection = self.stand_in.tls_context.wrap_socket(self.connection, server_side=True)
+        except (ssl.SSLError, OSError):
+            return False
+        self.tls = True
+        self.wfile = self.connection.makefile("wb")
+        self.stand_in._count_handshake(self.connection.session_reused)
+        return True
+
+    def smtp_AUTH(self, argument):
+        mechanism, _, initial_response = argument.partition(" ")
+        mechanism = mechanism.upper()
+        if mechanism == "PLAIN":
+            if not initial_response:
+                self.reply(334, "")
+                initial_response = self.read_line()
+            _, user_name, password = _b64decode(initial_response).split("\0")
+        elif mechanism == "LOGIN":
+            if initial_response:
+                user_name = _b64decode(initial_response)
+            else:
+                self.reply(334, "VXNlcm5hbWU6")
+                user_name = _b64decode(self.read_line())
+            self.reply(334, "UGFzc3dvcmQ6")
+            password = _b64decode(self.read_line())
+        else:
+            self.reply(504, "Unrecognized authentication type")
+            return
+        if self.stand_in.credentials is None or self.stand_in.credentials == (user_name, password):
+            self.reply(235, "Authentication successful")
+        else:
+            self.reply(535, "Authentication credentials invalid")
+
+    def smtp_MAIL(self, argument):
+        self.mail_from = _path(argument)
+        self.rcpt_tos = []
+        self.reply(250)
+
+    def smtp_RCPT(self, argument):
+        if self.mail_from is None:
+            self.reply(503, "Bad sequence of commands")
+            return
+        recipient = _path(argument)
+        if recipient in self.stand_in.refused_recipients:
+            self.reply(550, "No such user")
+        elif self.stand_in._take_deferral(recipient):
+            self.reply(451, "Try again later")
+        else:
+            self.rcpt_tos.append(recipient)
+            self.reply(250)
+
+    def smtp_DATA(self, argument):
+        if not self.rcpt_tos:
+            self.reply(503, "Bad sequence of commands")
+            return
+        self.reply(354, "End data with <CR><LF>.<CR><LF>")
+        self.flush_replies()
+        data = []
+        size = 0
+        while True:
+            line = self._read_raw_line()
+            if not line or line == b".\r\n":
+                break
+            if line.startswith(b"."):
+                line = line[1:]
+            size += len(line)
+            if self.stand_in.keep_data:
+                data.append(line)
+        self.stand_in._count_bytes(size)
+        limit = self.stand_in.size_limit
+        if limit and size > limit:
+            self.mail_from = None
+            self.rcpt_tos = []
+            self.reply(552, "Message size exceeds fixed maximum message size")
+            return
+        failure = self.stand_in._injected_failure()
+        if failure == "disconnect":
+            self._replies = []
+            return False
+        if failure == "defer":
+            self.mail_from = None
+            self.rcpt_tos = []
+            self.reply(451, "Requested action aborted: local error in processing")
+            return
+        self.stand_in.messages.append(ReceivedMessage(self.mail_from, self.rcpt_tos, b"".join(data)))
+        self.mail_from = None
+        self.rcpt_tos = []
+        self.reply(250)
+
+    def smtp_RSET(self, argument):
+        self.mail_from = None
+        self.rcpt_tos = []
+        self.reply(250)
+
+    def smtp_NOOP(self, argument):
+        self.reply(250)
+
+    def smtp_QUIT(self, argument):
+        self.reply(221, "Bye")
+        return False
+
+
+def _path(argument):
+    _, _, address = argument.partition(":")
+    address = address.strip().split(" ")[0]
+    return address.strip("<>")
+
+
+def _b64decode(text):
+    return base64.b64decode(text).decode("utf-8")
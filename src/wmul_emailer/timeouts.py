@@ -0,0 +1,137 @@
+"""
+@Author = 'Mike Stanley'
+
+Enforcement of the overall deadline and of the time allowed for each message.
+
+Socket timeouts bound each connect and each command, but not a whole message,
+which is many commands and many writes. A Watchdog bounds the whole of a with
+block instead: if the block is still running when the time runs out, the
+watchdog shuts down the socket of the connection it is watching, so that
+whatever the block is blocked on fails right away, and expired is set so
+that the failure can be reported as a timeout.
+
+Every Watchdog in the process is run by one background thread, which sleeps
+until the earliest expiry, so that arming one costs a heap push rather than a
+new thread for every message.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+              Watchdogs share one thread instead of each starting a Timer.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import heapq
+import itertools
+import os
+import socket
+import threading
+import time
+
+
+class Watchdog:
+    __slots__ = ("connection", "expires_at", "expired", "armed")
+
+    def __init__(self, connection, expires_at):
+        """
+        connection is anything with a server attribute that is an
+        smtplib.SMTP, such as a pooled connection. expires_at is a
+        time.monotonic() time.
+        """
+        self.connection = connection
+        self.expires_at = expires_at
+        self.expired = False
+        self.armed = False
+
+    def __enter__(self):
+        _scheduler.arm(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _scheduler.disarm(self)
+
+    def _expire(self):
+        self.expired = True
+        sock = getattr(self.connection.server, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _Scheduler:
+    """
+    Expires the armed watchdogs, in order, from one daemon thread that is
+    started the first time one is armed.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._disarmed = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def arm(self, watchdog):
+        with self._condition:
+            watchdog.armed = True
+            heapq.heappush(self._heap, (watchdog.expires_at, next(self._sequence), watchdog))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="wmul_emailer watchdogs", daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is watchdog:
+                self._condition.notify()
+
+    def disarm(self, watchdog):
+        with self._condition:
+            if not watchdog.armed:
+                return
+            watchdog.armed = False
+            # Disarmed watchdogs are left in the heap, and dropped when they
+            # reach the top, unless they come to outnumber the armed ones.
+            self._disarmed += 1
+            if self._disarmed > 64 and self._disarmed * 2 > len(self._heap):
+                self._heap = [entry for entry in self._heap if entry[2].armed]
+                heapq.heapify(self._heap)
+                self._disarmed = 0
+
+    def _run(self):
+        with self._condition:
+            while True:
+                while self._heap and not self._heap[0][2].armed:
+                    heapq.heappop(self._heap)
+                    self._disarmed -= 1
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                _, _, watchdog = heapq.heappop(self._heap)
+                watchdog.armed = False
+                watchdog._expire()
+
+    def _reset(self):
+        self.__init__()
+
+
+_scheduler = _Scheduler()
+if hasattr(os, "register_at_fork"):
+    # The thread does not survive a fork, and its lock may be held.
+    os.register_at_fork(after_in_child=_scheduler._reset)
@@ -0,0 +1,158 @@
+"""
+@Author = 'Mike Stanley'
+
+TLS for the smtp connections, by STARTTLS or implicitly (SMTPS, usually on
+port 465), with the cost of the handshakes kept down.
+
+Building an SSLContext loads the system's certificate authorities, which
+takes far longer than a handshake, so default_context builds one, once, and
+every EmailSender that is not given its own context shares it. A full
+handshake costs round trips and public key operations; session_cache keeps
+the last TLS session of each server, for each context, and the next
+connection to that server offers it, so that the server can resume it with an
+abbreviated handshake instead.
+
+starttls is smtplib.SMTP.starttls, except that it offers a session to resume,
+and SMTPS is smtplib.SMTP_SSL, except that it does the same, and records how
+long the handshake took.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import ssl
+import threading
+import time
+import weakref
+from smtplib import SMTP, SMTP_SSL, SMTPNotSupportedError, SMTPResponseException
+
+MODES = ("starttls", "implicit")
+
+_default_context = None
+_default_context_lock = threading.Lock()
+
+_session_caches = weakref.WeakKeyDictionary()
+_session_caches_lock = threading.Lock()
+
+
+def default_context():
+    """
+    The SSLContext shared by everything that is not given its own, with the
+    default settings of ssl.create_default_context.
+    """
+    global _default_context
+    if _default_context is None:
+        with _default_context_lock:
+            if _default_context is None:
+                _default_context = ssl.create_default_context()
+    return _default_context
+
+
+class SessionCache:
+    """
+    The most recent TLS session of each (host, port), for one SSLContext.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, host, port):
+        with self._lock:
+            return self._sessions.get((host, port))
+
+    def put(self, host, port, session):
+        if session is None:
+            return
+        with self._lock:
+            self._sessions[(host, port)] = session
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+def session_cache(context):
+    """
+    The SessionCache for context. A session can only be resumed by the
+    context that made it.
+    """
+    with _session_caches_lock:
+        cache = _session_caches.get(context)
+        if cache is None:
+            cache = _session_caches[context] = SessionCache()
+        return cache
+
+
+def starttls(server, context, session=None):
+    """
+    Upgrades server, an smtplib.SMTP, to TLS with STARTTLS, offering session
+    to resume. Returns how long the handshake took, in seconds.
+    """
+    server.ehlo_or_helo_if_needed()
+    if not server.has_extn("starttls"):
+        raise SMTPNotSupportedError("STARTTLS extension not supported by server.")
+    code, reply = server.docmd("STARTTLS")
+    if code != 220:
+        raise SMTPResponseException(code, reply)
+    start = time.perf_counter()
+    server.sock = context.wrap_socket(server.sock, server_hostname=server._host, session=session)
+    seconds = time.perf_counter() - start
+    # What the server said before TLS cannot be trusted, so forget it, the
+    # same as smtplib does.
+    server.file = None
+    server.helo_resp = None
+    server.ehlo_resp = None
+    server.esmtp_features = {}
+    server.does_esmtp = False
+    return seconds
+
+
+class SMTPS(SMTP_SSL):
+    """
+    smtplib.SMTP_SSL, offering session to resume. handshake_seconds is how
+    long the handshake took.
+    """
+
+    def __init__(self, host="", port=0, context=None, session=None, **kwargs):
+        self._session = session
+        self.handshake_seconds = None
+        super().__init__(host, port, context=context or default_context(), **kwargs)
+
+    def _get_socket(self, host, port, timeout):
+        new_socket = SMTP._get_socket(self, host, port, timeout)
+        start = time.perf_counter()
+        try:
+            tls_socket = self.context.wrap_socket(new_socket, server_hostname=self._host, session=self._session)
+        except BaseException:
+            new_socket.close()
+            raise
+        self.handshake_seconds = time.perf_counter() - start
+        return tls_socket
+
+
+def session_of(server):
+    """
+    The TLS session of server's connection, or None if it is not using TLS.
+    """
+    return getattr(server.sock, "session", None)
+
+
+def session_reused(server):
+    return bool(getattr(server.sock, "session_reused", False))
@@ -0,0 +1,238 @@
+"""
+@Author = 'Mike Stanley'
+
+Transports that deliver the e-mails of an EmailSender without an smtp server.
+
+By default, EmailSender sends over smtp to server_host and port. An
+EmailSender given a transport hands its messages to the transport instead:
+
+    SendmailTransport   Pipes each message to the local sendmail program,
+                        so that the local mail server delivers it.
+    MaildirTransport    Writes each message as a file in a Maildir.
+    MemoryTransport     Keeps each message in a list, for tests and
+                        benchmarks.
+
+A transport stands in for the smtplib.SMTP connection of an EmailSender, so
+pooling, rate limits, retries of deferred messages, continue_on_error, and
+SendResult work as they do with smtp, without any network round trips. It has
+the parts of the smtplib.SMTP interface that EmailSender uses, and never
+advertises any ESMTP extensions, so it is never asked to pipeline or to check
+the size of a message. A transport is shared by every thread that sends with
+it, so send_chunks must be thread-safe.
+
+To write another transport, subclass LocalTransport and override send_chunks,
+which delivers one message, given as an iterable of bytes, to a list of
+recipients, and raises an SMTPException, such as SMTPDataError with a 4xx
+code for a failure that may pass, if it cannot.
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import itertools
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from smtplib import SMTPDataError
+
+DeliveredMessage = namedtuple("DeliveredMessage", ["mail_from", "rcpt_tos", "data"])
+
+# The exit status with which sendmail reports a failure that may pass, from
+# sysexits.h.
+_EX_TEMPFAIL = 75
+
+
+class LocalTransport:
+    """
+    name is what the observer is told is the server.
+    """
+    name = "local"
+    sock = None
+    does_esmtp = False
+
+    def __init__(self):
+        self.esmtp_features = {}
+
+    def open(self):
+        """
+        Returns the connection to send with, in place of an smtplib.SMTP.
+        """
+        return self
+
+    def send_chunks(self, from_addr, to_addrs, chunks):
+        raise NotImplementedError
+
+    def sendmail(self, from_addr, to_addrs, msg, mail_options=(), rcpt_options=()):
+        if isinstance(to_addrs, str):
+            to_addrs = [to_addrs]
+        if isinstance(msg, str):
+            msg = msg.encode("utf-8")
+        self.send_chunks(from_addr, list(to_addrs), [msg])
+        return {}
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def has_extn(self, opt):
+        return False
+
+    def noop(self):
+        return 250, b"OK"
+
+    def rset(self):
+        return 250, b"OK"
+
+    def quit(self):
+        return 221, b"Bye"
+
+    def close(self):
+        pass
+
+
+class SendmailTransport(LocalTransport):
+    """
+    command is the sendmail program and its options. The envelope sender is
+    passed with -f, and the recipients as arguments. With -i, a line with a
+    single period does not end the message.
+    """
+    name = "sendmail"
+
+    def __init__(self, command=("/usr/sbin/sendmail", "-i")):
+        super().__init__()
+        self.command = list(command)
+
+    def send_chunks(self, from_addr, to_addrs, chunks):
+        # A file rather than a pipe, so that sendmail cannot block on a full
+        # pipe while this is still writing the message.
+        with tempfile.TemporaryFile() as errors:
+            process = subprocess.Popen(
+                self.command + ["-f", from_addr, "--"] + list(to_addrs),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=errors
+            )
+            try:
+                for chunk in _local_line_endings(chunks):
+                    process.stdin.write(chunk)
+                process.stdin.close()
+            except BrokenPipeError:
+                # sendmail has exited, and its status says why.
+                pass
+            finally:
+                status = process.wait()
+            if status == 0:
+                return
+            errors.seek(0)
+            message = errors.read().decode("utf-8", "replace").strip() or \
+                "sendmail exited with status {}.".format(status)
+        raise SMTPDataError(451 if status == _EX_TEMPFAIL else 554, message)
+
+
+class MaildirTransport(LocalTransport):
+    """
+    Writes each message to the new directory of the Maildir at directory,
+    with Return-Path and Delivered-To headers for the envelope sender and
+    recipients. If sync is True, each message is fsync'd before it is moved
+    into new, so that it survives a crash once it has been delivered.
+    """
+    name = "maildir"
+
+    def __init__(self, directory, sync=True):
+        super().__init__()
+        self.directory = directory
+        self.sync = sync
+        for subdirectory in ("tmp", "new", "cur"):
+            os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+        self._host = socket.gethostname().replace("/", "\\057").replace(":", "\\072")
+        self._sequence = itertools.count()
+        self._sequence_lock = threading.Lock()
+
+    def send_chunks(self, from_addr, to_addrs, chunks):
+        file_name = self._unique_name()
+        temporary_path = os.path.join(self.directory, "tmp", file_name)
+        try:
+            with open(temporary_path, "xb") as message_file:
+                message_file.write("Return-Path: <{}>\n".format(from_addr).encode("utf-8"))
+                for to_addr in to_addrs:
+                    message_file.write("Delivered-To: {}\n".format(to_addr).encode("utf-8"))
+                for chunk in _local_line_endings(chunks):
+                    message_file.write(chunk)
+                if self.sync:
+                    message_file.flush()
+                    os.fsync(message_file.fileno())
+            os.rename(temporary_path, os.path.join(self.directory, "new", file_name))
+        except BaseException:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            raise
+
+    def _unique_name(self):
+        with self._sequence_lock:
+            sequence = next(self._sequence)
+        now = time.time()
+        return "{}.M{}P{}Q{}.{}".format(int(now), int(now % 1 * 1000000), os.getpid(), sequence, self._host)
+
+
+class MemoryTransport(LocalTransport):
+    """
+    Keeps each message in messages, as a DeliveredMessage, the same as the
+    messages of wmul_emailer.testing.LocalSMTPServer. If max_messages is
+    given, only the most recent max_messages are kept, so that millions can
+    be sent in a fixed amount of memory. message_count counts them all.
+    """
+    name = "memory"
+
+    def __init__(self, max_messages=None):
+        super().__init__()
+        self.messages = deque(maxlen=max_messages)
+        self.message_count = 0
+        self._lock = threading.Lock()
+
+    def send_chunks(self, from_addr, to_addrs, chunks):
+        message = DeliveredMessage(from_addr, list(to_addrs), b"".join(chunks))
+        with self._lock:
+            self.messages.append(message)
+            self.message_count += 1
+
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+            self.message_count = 0
+
+
+def _local_line_endings(chunks):
+    """
+    Yields chunks with each CRLF, as sent over smtp, replaced by LF.
+    """
+    carried_cr = False
+    for chunk in chunks:
+        if carried_cr:
+            chunk = b"\r" + chunk
+        carried_cr = chunk.endswith(b"\r")
+        if carried_cr:
+            chunk = chunk[:-1]
+        yield chunk.replace(b"\r\n", b"\n")
+    if carried_cr:
+        yield b"\r"
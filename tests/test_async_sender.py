@@ -0,0 +1,201 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import email
+import pytest
+import wmul_emailer
+from smtplib import SMTPAuthenticationError, SMTPNotSupportedError, SMTPRecipientsRefused
+from wmul_emailer.testing import LocalSMTPServer
+from wmul_test_utils import make_namedtuple
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture(scope="function")
+def setup_async_sender():
+    mock_destination_email_addresses = [
+        "address_{}@example.com".format(index) for index in range(6)
+    ]
+
+    with LocalSMTPServer(
+        credentials=("mock_username", "mock_password")
+    ) as server:
+        emailer = wmul_emailer.AsyncEmailSender(
+            server_host=server.host,
+            port=server.port,
+            user_name="mock_username",
+            password="mock_password",
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=mock_destination_email_addresses,
+            max_concurrency=3
+        )
+        yield make_namedtuple(
+            "setup_async_sender",
+            server=server,
+            emailer=emailer,
+            mock_destination_email_addresses=mock_destination_email_addresses
+        )
+
+
+def test_send_email_delivers_to_each_recipient(setup_async_sender):
+    async def send():
+        async with setup_async_sender.emailer as emailer:
+            await emailer.send_email(".mock_body", "mock_subject")
+            await emailer.send_email("mock_body", "mock_subject")
+
+    run(send())
+
+    server = setup_async_sender.server
+    assert len(server.messages) == 12
+    delivered_to = sorted(
+        recipient
+        for message in server.messages[:6]
+        for recipient in message.rcpt_tos
+    )
+    assert delivered_to == \
+        sorted(setup_async_sender.mock_destination_email_addresses)
+
+    for message in server.messages:
+        assert message.mail_from == "mock_from@example.com"
+        parsed = email.message_from_bytes(message.data)
+        assert parsed["Subject"] == "mock_subject"
+        assert parsed["To"] == message.rcpt_tos[0]
+    assert email.message_from_bytes(server.messages[0].data)\
+        .get_payload().rstrip() == ".mock_body"
+
+    assert server.connection_count <= 3
+
+
+def test_send_email_different_from_and_destination_address(
+        setup_async_sender
+    ):
+    async def send():
+        async with setup_async_sender.emailer as emailer:
+            await emailer.send_email(
+                "mock_body",
+                "mock_subject",
+                from_email_address="new_from@example.com",
+                destination_email_addresses="new_destination@example.com"
+            )
+
+    run(send())
+
+    assert setup_async_sender.server.messages == [
+        setup_async_sender.server.messages[0]._replace(
+            mail_from="new_from@example.com",
+            rcpt_tos=["new_destination@example.com"]
+        )
+    ]
+
+
+def test_send_email_refused_recipient_raises_after_others_delivered(
+        setup_async_sender
+    ):
+    setup_async_sender.server.refused_recipients.add("address_2@example.com")
+
+    async def send():
+        async with setup_async_sender.emailer as emailer:
+            await emailer.send_email("mock_body", "mock_subject")
+
+    with pytest.raises(SMTPRecipientsRefused):
+        run(send())
+
+    assert len(setup_async_sender.server.messages) == 5
+
+
+def test_send_email_bad_credentials(setup_async_sender):
+    setup_async_sender.server.credentials = ("other", "credentials")
+
+    async def send():
+        async with setup_async_sender.emailer as emailer:
+            await emailer.send_email("mock_body", "mock_subject")
+
+    with pytest.raises(SMTPAuthenticationError):
+        run(send())
+
+    assert setup_async_sender.server.messages == []
+
+
+def test_send_email_without_auth_support(setup_async_sender):
+    setup_async_sender.server.extensions = ("PIPELINING", "8BITMIME")
+
+    async def send():
+        async with setup_async_sender.emailer as emailer:
+            await emailer.send_email("mock_body", "mock_subject")
+
+    with pytest.raises(SMTPNotSupportedError):
+        run(send())
+
+    assert setup_async_sender.server.messages == []
+
+
+def test_send_email_validation_matches_email_sender():
+    with pytest.raises(TypeError):
+        wmul_emailer.AsyncEmailSender(
+            server_host="mock_host",
+            port="mock_port",
+            destination_email_addresses=object()
+        )
+
+    emailer = wmul_emailer.AsyncEmailSender(
+        server_host="mock_host",
+        port="mock_port",
+        destination_email_addresses="foo@example.com"
+    )
+    with pytest.raises(ValueError):
+        run(emailer.send_email("mock_body", "mock_subject"))
+
+
+def test_close_does_not_wait_forever_for_quit():
+    async def serve(reader, writer):
+        writer.write(b"220 localhost ready\r\n")
+        await reader.readline()
+        writer.write(b"250 localhost\r\n")
+        # Every later command, QUIT included, goes unanswered.
+        while await reader.readline():
+            pass
+        writer.close()
+
+    async def open_and_close():
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        try:
+            emailer = wmul_emailer.AsyncEmailSender(
+                server_host="127.0.0.1",
+                port=server.sockets[0].getsockname()[1],
+                quit_timeout=0.1
+            )
+            connection = await emailer._pool.acquire()
+            emailer._pool.release(connection)
+            await asyncio.wait_for(emailer.close(), 5)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    run(open_and_close())
@@ -0,0 +1,111 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import email
+from smtplib import SMTPRecipientsRefused
+import wmul_emailer
+from wmul_emailer.testing import LocalSMTPServer
+
+
+def personalized_emails(count, pulled):
+    for index in range(count):
+        pulled.append(index)
+        yield (
+            "Report {}".format(index),
+            "Body {}".format(index),
+            "user_{}@example.com".format(index)
+        )
+
+
+def test_send_many_uses_one_session():
+    pulled = []
+
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com"
+        )
+        results = emailer.send_many(personalized_emails(50, pulled))
+        assert pulled == []
+        first = next(results)
+        assert pulled == [0]
+        results = [first] + list(results)
+
+    assert server.connection_count == 1
+    assert len(server.messages) == 50
+    for index, (result, message) in enumerate(zip(results, server.messages)):
+        assert result.error is None
+        assert result.refused == {}
+        assert result.email.email_subject == "Report {}".format(index)
+        parsed = email.message_from_bytes(message.data)
+        assert message.rcpt_tos == ["user_{}@example.com".format(index)]
+        assert parsed["Subject"] == "Report {}".format(index)
+        assert parsed.get_payload().rstrip() == "Body {}".format(index)
+
+
+def test_send_many_reports_errors_per_email():
+    emails = [
+        wmul_emailer.BatchEmail("subject", "body", "good@example.com"),
+        wmul_emailer.BatchEmail("subject", "body", "bad@example.com"),
+        wmul_emailer.BatchEmail("subject", "body"),
+        wmul_emailer.BatchEmail("subject", "body", "good@example.com", "other_from@example.com"),
+    ]
+
+    with LocalSMTPServer(refused_recipients=["bad@example.com"]) as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com"
+        )
+        results = list(emailer.send_many(emails))
+
+    assert [result.email for result in results] == emails
+    assert results[0].error is None
+    assert isinstance(results[1].error, SMTPRecipientsRefused)
+    assert isinstance(results[2].error, ValueError)
+    assert results[3].error is None
+    assert [message.mail_from for message in server.messages] == \
+        ["mock_from@example.com", "other_from@example.com"]
+
+
+def test_send_many_parallel_keeps_order():
+    pulled = []
+
+    with LocalSMTPServer(latency=0.001) as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            parallel_connections=3
+        )
+        results = emailer.send_many(personalized_emails(30, pulled))
+        first = next(results)
+        assert len(pulled) <= 6
+        results = [first] + list(results)
+
+    assert [result.email.email_subject for result in results] == \
+        ["Report {}".format(index) for index in range(30)]
+    assert all(result.error is None for result in results)
+    assert len(server.messages) == 30
+    assert server.connection_count <= 3
@@ -0,0 +1,148 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import pytest
+from click.testing import CliRunner
+from wmul_emailer import batchjob, cli
+from wmul_emailer.testing import LocalSMTPServer
+
+
+def sender_options(server):
+    return {
+        "server_host": server.host,
+        "port": server.port,
+        "from_email_address": "bar@example.com",
+        "pool_size": 2,
+        "parallel_connections": 2,
+        "continue_on_error": True,
+    }
+
+
+def write_jsonl(path, count):
+    with open(path, "w", encoding="utf-8") as records_file:
+        for index in range(count):
+            records_file.write(json.dumps({
+                "email_subject": "Subject {}".format(index),
+                "email_body": "Body {}".format(index),
+                "destination_email_addresses": ["one{}@example.com".format(index), "two{}@example.com".format(index)],
+            }) + "\n")
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as output_file:
+        return [json.loads(line) for line in output_file]
+
+
+def test_run_job_sends_every_email(tmpdir):
+    input_path = str(tmpdir.join("emails.jsonl"))
+    output_path = str(tmpdir.join("results.jsonl"))
+    write_jsonl(input_path, 25)
+
+    with LocalSMTPServer(refused_recipients=["two3@example.com"]) as server:
+        progress = batchjob.run_job(input_path, output_path, sender_options(server), processes=2, chunk_size=4)
+
+    assert len(server.messages) == 49
+    assert progress.emails == 25
+    assert progress.delivered == 49
+    assert progress.failed == 1
+    results = sorted(read_results(output_path), key=lambda result: result["index"])
+    assert [result["index"] for result in results] == list(range(25))
+    assert results[3]["recipients"] == [
+        {"address": "one3@example.com", "status": "delivered", "code": 250, "error": None},
+        {"address": "two3@example.com", "status": "refused", "code": 550, "error": None},
+    ]
+
+
+def test_run_job_reads_csv_and_records_bad_records(tmpdir):
+    input_path = str(tmpdir.join("emails.csv"))
+    output_path = str(tmpdir.join("results.jsonl"))
+    with open(input_path, "w", encoding="utf-8", newline="") as records_file:
+        records_file.write(
+            "email_subject,email_body,destination_email_addresses,from_email_address\r\n"
+            "Hello,\"Line one\nLine two\",one@example.com; two@example.com,\r\n"
+            "No recipients,Body,,\r\n"
+            "Other sender,Body,three@example.com,other@example.com\r\n"
+        )
+
+    with LocalSMTPServer() as server:
+        batchjob.run_job(input_path, output_path, sender_options(server), processes=1)
+
+    results = sorted(read_results(output_path), key=lambda result: result["index"])
+    assert results[1] == {"index": 1, "error": "The record is missing destination_email_addresses.", "recipients": []}
+    received = sorted((message.mail_from, message.rcpt_tos) for message in server.messages)
+    assert received == [
+        ("bar@example.com", ["one@example.com"]),
+        ("bar@example.com", ["two@example.com"]),
+        ("other@example.com", ["three@example.com"]),
+    ]
+
+
+def test_resume_skips_completed_emails(tmpdir):
+    input_path = str(tmpdir.join("emails.jsonl"))
+    output_path = str(tmpdir.join("results.jsonl"))
+    write_jsonl(input_path, 10)
+    with open(output_path, "w", encoding="utf-8") as output_file:
+        for index in (0, 1, 2, 5):
+            output_file.write(json.dumps({"index": index, "error": None, "recipients": []}) + "\n")
+        # Cut off when the job was interrupted.
+        output_file.write("{\"index\": 7, \"err")
+
+    with LocalSMTPServer() as server:
+        with pytest.raises(FileExistsError):
+            batchjob.run_job(input_path, output_path, sender_options(server))
+        progress = batchjob.run_job(input_path, output_path, sender_options(server), processes=2, chunk_size=2,
+                                    resume=True)
+
+    assert progress.skipped == 4
+    assert progress.emails == 6
+    assert sorted(message.rcpt_tos[0] for message in server.messages if message.rcpt_tos[0].startswith("one")) == [
+        "one{}@example.com".format(index) for index in (3, 4, 6, 7, 8, 9)
+    ]
+    assert sorted(result["index"] for result in read_results(output_path)) == list(range(10))
+
+
+def test_bad_sender_options_are_found_before_starting(tmpdir):
+    input_path = str(tmpdir.join("emails.jsonl"))
+    write_jsonl(input_path, 1)
+
+    with pytest.raises(ValueError):
+        batchjob.run_job(input_path, str(tmpdir.join("results.jsonl")),
+                         {"server_host": "localhost", "port": 25, "parallel_connections": 0})
+
+
+def test_cli(tmpdir):
+    input_path = str(tmpdir.join("emails.jsonl"))
+    output_path = str(tmpdir.join("results.jsonl"))
+    write_jsonl(input_path, 3)
+    runner = CliRunner()
+
+    with LocalSMTPServer() as server:
+        result = runner.invoke(cli.batch, [
+            input_path, output_path, "--server", server.host, "--port", str(server.port),
+            "--from_address", "bar@example.com", "--processes", "2", "--connections", "1",
+        ])
+
+    assert result.exit_code == 0, result.output
+    assert "Sent 3 e-mail(s), skipped 0 already sent. Recipients delivered: 6, not delivered: 0." in result.output
+    assert len(read_results(output_path)) == 3
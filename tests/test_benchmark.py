@@ -0,0 +1,164 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+from click.testing import CliRunner
+from smtplib import SMTPDataError, SMTPServerDisconnected
+import wmul_emailer
+from wmul_emailer import benchmark, cli
+from wmul_emailer.testing import LocalSMTPServer
+
+TINY_SCENARIO = benchmark.Scenario("tiny", messages=3, recipients=2, body_size=100, parallel_connections=2)
+
+
+def test_server_injects_failures():
+    with LocalSMTPServer(failure_rate=1.0) as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                           destination_email_addresses="foo@example.com", deferral_retries=1,
+                                           deferral_retry_delay=0.001)
+        with pytest.raises(SMTPDataError) as raised:
+            emailer.send_email("Body", "Subject")
+    assert raised.value.smtp_code == 451
+    assert not server.messages
+
+    with LocalSMTPServer(disconnect_rate=1.0) as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                           destination_email_addresses="foo@example.com")
+        with pytest.raises(SMTPServerDisconnected):
+            emailer.send_email("Body", "Subject")
+    assert not server.messages
+
+
+def test_run_scenario():
+    result = benchmark.run_scenario(TINY_SCENARIO)
+
+    assert result["scenario"]["name"] == "tiny"
+    assert result["delivered"] == 6
+    assert result["failed"] == 0
+    assert result["emails_per_second"] > 0
+    assert 0 < result["latency"]["p50"] <= result["latency"]["p90"] <= result["latency"]["p99"] <= \
+        result["latency"]["max"]
+    assert result["peak_memory_bytes"] > 0
+
+
+def test_run_scenario_with_the_memory_transport():
+    result = benchmark.run_scenario(TINY_SCENARIO._replace(name="memory", transport="memory"))
+
+    assert result["delivered"] == 6
+    assert result["tls_handshakes"] == 0
+    assert result["emails_per_second"] > 0
+
+
+def test_compare_reports_regressions():
+    baseline = {"results": [{
+        "scenario": {"name": "tiny"},
+        "emails_per_second": 100.0,
+        "latency": {"p50": 0.01, "p99": 0.02},
+        "peak_memory_bytes": 1000,
+    }]}
+    current = {"results": [
+        {
+            "scenario": {"name": "tiny"},
+            "emails_per_second": 50.0,
+            "latency": {"p50": 0.011, "p99": 0.05},
+            "peak_memory_bytes": 1000,
+        },
+        {
+            "scenario": {"name": "new"},
+            "emails_per_second": 1.0,
+            "latency": {"p50": 1.0, "p99": 1.0},
+            "peak_memory_bytes": 1,
+        },
+    ]}
+
+    regressions = benchmark.compare(baseline, current)
+
+    assert regressions == [
+        "tiny: e-mails per second went from 100 to 50 (-50%).",
+        "tiny: p99 latency went from 0.02 to 0.05 (+150%).",
+    ]
+    assert benchmark.compare(baseline, baseline) == []
+
+
+def test_cli_saves_and_compares(tmpdir, mocker):
+    mocker.patch("wmul_emailer.benchmark.QUICK_SCENARIOS", [TINY_SCENARIO])
+    output = str(tmpdir.join("results.json"))
+    runner = CliRunner()
+
+    result = runner.invoke(cli.benchmark, ["--quick", "--output", output])
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith("tiny ")
+    saved = benchmark.load(output)
+    assert saved["format"] == benchmark.RESULTS_FORMAT
+    assert saved["wmul_emailer"] == wmul_emailer.__version__
+    assert [result["scenario"]["name"] for result in saved["results"]] == ["tiny"]
+
+    # A baseline that is impossibly fast.
+    saved["results"][0]["emails_per_second"] *= 1000
+    benchmark.save(saved, output)
+    result = runner.invoke(cli.benchmark, ["--quick", "--baseline", output])
+    assert result.exit_code == 1
+    assert "tiny: e-mails per second went from" in result.output
+
+
+def test_importing_wmul_emailer_defers_sending():
+    measured = benchmark.import_time(runs=1)
+
+    assert measured["module"] == "wmul_emailer"
+    assert measured["seconds"] > 0
+    assert "wmul_emailer" in measured["modules"]
+    assert not {"smtplib", "email.mime.text", "asyncio", "ssl", "click", "wmul_emailer.sender"} & \
+        set(measured["modules"])
+
+
+def test_constructing_an_email_sender_defers_sending():
+    measured = benchmark.import_time(runs=1, statement=benchmark.CONSTRUCT_STATEMENT)
+
+    assert measured["statement"] == benchmark.CONSTRUCT_STATEMENT
+    assert "wmul_emailer.sender" in measured["modules"]
+    assert not {"smtplib", "ssl", "email.mime.text", "concurrent.futures", "wmul_emailer.spool",
+                "wmul_emailer.streaming", "wmul_emailer.tls", "wmul_emailer.transports"} & set(measured["modules"])
+
+
+def test_names_are_imported_when_first_used():
+    assert "EmailSender" in dir(wmul_emailer)
+    assert wmul_emailer.EmailSender.__module__ == "wmul_emailer.sender"
+    with pytest.raises(AttributeError):
+        wmul_emailer.NoSuchName
+
+
+def test_compare_reports_import_time_regressions():
+    baseline = {"results": [], "import_time": {"module": "wmul_emailer", "seconds": 0.002, "modules": ["a", "b"]}}
+    current = {"results": [], "import_time": {"module": "wmul_emailer", "seconds": 0.1, "modules": ["a", "b", "c"]}}
+
+    assert benchmark.compare(baseline, current) == [
+        "import wmul_emailer: import time went from 0.002 to 0.1 (+4900%).",
+        "import wmul_emailer: modules imported went from 2 to 3 (+50%).",
+    ]
+    assert benchmark.compare({"results": []}, current) == []
+
+    constructed = dict(current["import_time"], statement=benchmark.CONSTRUCT_STATEMENT)
+    assert benchmark.compare({"results": [], "construct_time": baseline["import_time"]},
+                             {"results": [], "construct_time": constructed})[0] == \
+        'import wmul_emailer; wmul_emailer.EmailSender("localhost"): import time went from 0.002 to 0.1 (+4900%).'
+
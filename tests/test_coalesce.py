@@ -0,0 +1,172 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import socket
+import time
+import pytest
+import wmul_emailer
+from wmul_emailer.coalesce import Coalescer
+from wmul_emailer.testing import LocalSMTPServer
+
+
+class _Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _offer(coalescer, body="Body", subject="Subject", recipients=("foo@example.com",)):
+    return coalescer.offer(body, subject, "bar@example.com", list(recipients))
+
+
+def test_repeats_within_the_window_are_suppressed():
+    clock = _Clock()
+    coalescer = Coalescer(60, clock=clock)
+
+    assert _offer(coalescer)
+    assert not _offer(coalescer)
+    assert _offer(coalescer, body="Other body")
+    assert _offer(coalescer, recipients=["baz@example.com"])
+    clock.now = 61
+    assert _offer(coalescer)
+    assert coalescer.suppressed == 1
+
+
+def test_digests_count_the_repeats_for_each_audience():
+    coalescer = Coalescer(60, clock=_Clock())
+    for _ in range(5):
+        _offer(coalescer, subject="Disk full")
+    for _ in range(3):
+        _offer(coalescer, subject="Backup failed")
+    _offer(coalescer, subject="Disk full", recipients=["baz@example.com"])
+
+    digests = coalescer.take_digests()
+
+    assert len(digests) == 1
+    digest = digests[0]
+    assert digest.from_email_address == "bar@example.com"
+    assert digest.destination_email_addresses == ["foo@example.com"]
+    assert digest.email_subject == "6 repeats of 2 e-mails were not sent"
+    assert "4 more time(s): Disk full" in digest.email_body
+    assert "2 more time(s): Backup failed" in digest.email_body
+    assert coalescer.take_digests() == []
+
+
+def test_memory_is_bounded_and_evicted_repeats_are_kept_for_the_digest():
+    coalescer = Coalescer(60, max_entries=2, clock=_Clock())
+    _offer(coalescer, subject="First")
+    _offer(coalescer, subject="First")
+    _offer(coalescer, subject="Second")
+    _offer(coalescer, subject="Third")
+
+    assert len(coalescer) == 2
+    assert _offer(coalescer, subject="First")
+    [digest] = coalescer.take_digests()
+    assert digest.email_subject == "Repeated 1 more time(s): First"
+
+
+def test_forgotten_emails_are_sent_again():
+    coalescer = Coalescer(60, clock=_Clock())
+    assert _offer(coalescer)
+    assert not _offer(coalescer)
+
+    coalescer.forget("Body", "Subject", "bar@example.com", ["foo@example.com"])
+
+    assert _offer(coalescer)
+    [digest] = coalescer.take_digests()
+    assert digest.email_subject == "Repeated 1 more time(s): Subject"
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        Coalescer(0)
+    with pytest.raises(ValueError):
+        Coalescer(60, max_entries=0)
+
+
+def test_send_email_suppresses_repeats_and_sends_a_digest_on_close():
+    with LocalSMTPServer() as server:
+        with wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                      destination_email_addresses=["foo@example.com"],
+                                      coalesce_window=3600) as emailer:
+            first = emailer.send_email("The disk is full.", "Disk full")
+            for _ in range(99):
+                repeat = emailer.send_email("The disk is full.", "Disk full")
+
+            assert first.ok
+            assert not repeat.ok
+            assert repeat.suppressed == ["foo@example.com"]
+            assert len(server.messages) == 1
+
+    assert len(server.messages) == 2
+    assert b"Repeated 99 more time(s): Disk full" in server.messages[1].data
+
+
+def test_digests_are_sent_periodically():
+    with LocalSMTPServer() as server:
+        with wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                      destination_email_addresses=["foo@example.com"],
+                                      coalesce_window=3600, coalesce_digest_interval=0.05) as emailer:
+            emailer.send_email("The disk is full.", "Disk full")
+            emailer.send_email("The disk is full.", "Disk full")
+            give_up_at = time.monotonic() + 5
+            while len(server.messages) < 2 and time.monotonic() < give_up_at:
+                time.sleep(0.01)
+
+            assert len(server.messages) == 2
+            assert emailer.send_digests() == 0
+
+    assert len(server.messages) == 2
+
+
+def test_repeat_is_sent_when_the_first_send_fails():
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        closed_port = unused.getsockname()[1]
+    emailer = wmul_emailer.EmailSender("127.0.0.1", port=closed_port, from_email_address="bar@example.com",
+                                       destination_email_addresses=["foo@example.com"], coalesce_window=3600)
+    with pytest.raises(OSError):
+        emailer.send_email("The disk is full.", "Disk full")
+
+    with LocalSMTPServer() as server:
+        emailer.server_host, emailer.port = server.host, server.port
+        result = emailer.send_email("The disk is full.", "Disk full")
+        emailer.close()
+
+    assert result.ok
+    assert len(server.messages) == 1
+
+
+def test_repeat_is_sent_when_every_recipient_was_refused():
+    with LocalSMTPServer(refused_recipients=["foo@example.com"]) as server:
+        with wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                      destination_email_addresses=["foo@example.com"],
+                                      coalesce_window=3600, continue_on_error=True) as emailer:
+            first = emailer.send_email("The disk is full.", "Disk full")
+            repeat = emailer.send_email("The disk is full.", "Disk full")
+
+    assert not first.ok
+    assert not repeat.suppressed
@@ -2,6 +2,10 @@
 @Author = 'Mike Stanley'
 
 ============ Change Log ============
+2026-Oct-18 = Added tests for single transaction mode. MIMEText is no longer
+              mocked; the tests check the rendered bytes passed to sendmail,
+              now that the message is rendered once per call.
+
 2023-Jan-17 = Refactor to reduce unnecessary code duplication. Change license
               from GPLv2 to GPLv3.
 
@@ -32,8 +36,12 @@ You should have received a copy of the GNU General Public License along with
 wmul_emailer. If not, see <https://www.gnu.org/licenses/>. 
 """
 import contextlib
+import io
 import pytest
 import wmul_emailer
+from email.generator import BytesGenerator
+from email.mime.text import MIMEText
+from smtplib import SMTPRecipientsRefused
 from wmul_test_utils import make_namedtuple, \
     generate_true_false_matrix_from_list_of_strings, assert_has_only_these_calls
 
@@ -49,6 +57,8 @@ setup_send_email_params, setup_send_email_ids = \
 def setup_send_email(mocker, request):
     use_tuple_of_addresses = request.param.use_tuple_of_addresses
     mock_server = mocker.Mock()
+    mock_server.esmtp_features = {}
+    mock_server.sendmail.return_value = {}
 
     @contextlib.contextmanager
     def mock_server_function(host, port):
@@ -57,16 +67,6 @@ def setup_send_email(mocker, request):
     mock_smtp = mocker.Mock(side_effect=mock_server_function)
     mocker.patch("wmul_emailer.SMTP", mock_smtp)
 
-    def mock_mimetext_function(data):
-        mimetext_contents = {"Body": data}
-        return mimetext_contents
-
-    mock_mimetext = mocker.Mock(side_effect=mock_mimetext_function)
-    mocker.patch(
-        "wmul_emailer.MIMEText",
-        mock_mimetext
-    )
-
     mock_body = "mock_body"
     mock_subject = "mock_subject"
 
@@ -91,8 +91,7 @@ def setup_send_email(mocker, request):
         mock_password=mock_password, 
         mock_from_address=mock_from_address,
         mock_body=mock_body,
-        mock_subject=mock_subject,
-        mock_mimetext=mock_mimetext
+        mock_subject=mock_subject
     )
 
 
@@ -113,9 +112,8 @@ def test_send_email_dest_addresses_not_a_list_tuple_or_str(setup_send_email):
 def confirm_mocks_not_called(mocks_not_called_args):
     mocks_not_called_args.mock_smtp.assert_not_called()
     mocks_not_called_args.mock_server.assert_not_called()
-    mocks_not_called_args.mock_mimetext.assert_not_called()
     mocks_not_called_args.mock_server.login.assert_not_called()
-    mocks_not_called_args.mock_server.send_message.assert_not_called()
+    mocks_not_called_args.mock_server.sendmail.assert_not_called()
 
 
 @pytest.fixture(scope="function")
@@ -179,26 +177,40 @@ def confirm_mocks_called_correctly(correct_call_args):
         password=correct_call_args.mock_password
     )
 
-    expected_send_message_calls = []
+    expected_sendmail_calls = []
 
     for this_email_address in \
                             correct_call_args.mock_destination_email_addresses:
-        this_message = {
-            "Body": correct_call_args.mock_body,
-            "Subject": correct_call_args.mock_subject,
-            "From": correct_call_args.mock_from_address,
-            "To": this_email_address
-        }
-        expected_send_message_calls.append(
-            correct_call_args.mocker.call(this_message)
+        this_message = expected_message_bytes(
+            correct_call_args.mock_body,
+            correct_call_args.mock_subject,
+            correct_call_args.mock_from_address,
+            this_email_address
+        )
+        expected_sendmail_calls.append(
+            correct_call_args.mocker.call(
+                correct_call_args.mock_from_address,
+                [this_email_address],
+                this_message
+            )
         )
 
     assert_has_only_these_calls(
-        correct_call_args.mock_server.send_message,
-        expected_send_message_calls
+        correct_call_args.mock_server.sendmail,
+        expected_sendmail_calls
     )
 
 
+def expected_message_bytes(body, subject, from_address, to_header):
+    msg = MIMEText(body)
+    msg["Subject"] = subject
+    msg["From"] = from_address
+    msg["To"] = to_header
+    with io.BytesIO() as rendered:
+        BytesGenerator(rendered).flatten(msg, linesep="\r\n")
+        return rendered.getvalue()
+
+
 def test_send_email_called_correctly_different_from_address(
         mocker, 
         setup_send_email_correctly_created
@@ -400,3 +412,93 @@ def test_send_email_no_from_and_no_destination_email_address(setup_send_email):
             "send_email function." in str(ve)
 
     confirm_mocks_not_called(setup_send_email)
+
+
+@pytest.fixture(scope="function")
+def setup_single_transaction(setup_send_email):
+    emailer = wmul_emailer.EmailSender(
+        destination_email_addresses=[
+            "foo@example.com", 
+            "bar@example.com", 
+            "baz@example.com"
+        ],
+        server_host=setup_send_email.mock_host,
+        port=setup_send_email.mock_port,
+        user_name=setup_send_email.mock_username,
+        password=setup_send_email.mock_password,
+        from_email_address=setup_send_email.mock_from_address,
+        single_transaction=True,
+        max_recipients_per_transaction=2
+    )
+
+    return make_namedtuple(
+        "setup_single_transaction",
+        emailer=emailer,
+        setup_send_email=setup_send_email
+    )
+
+
+def test_send_email_single_transaction_chunks_recipients(
+        mocker,
+        setup_single_transaction
+    ):
+    setup_send_email = setup_single_transaction.setup_send_email
+    setup_send_email.mock_server.sendmail.return_value = {}
+
+    refused = setup_single_transaction.emailer.send_email(
+        setup_send_email.mock_body,
+        setup_send_email.mock_subject
+    )
+
+    assert refused == {}
+    expected_message = expected_message_bytes(
+        setup_send_email.mock_body,
+        setup_send_email.mock_subject,
+        setup_send_email.mock_from_address,
+        "undisclosed-recipients:;"
+    )
+    assert_has_only_these_calls(
+        setup_send_email.mock_server.sendmail,
+        [
+            mocker.call(
+                setup_send_email.mock_from_address,
+                ["foo@example.com", "bar@example.com"],
+                expected_message
+            ),
+            mocker.call(
+                setup_send_email.mock_from_address,
+                ["baz@example.com"],
+                expected_message
+            )
+        ]
+    )
+
+
+def test_send_email_single_transaction_reports_refused(
+        setup_single_transaction
+    ):
+    setup_send_email = setup_single_transaction.setup_send_email
+    setup_send_email.mock_server.sendmail.side_effect = [
+        {"bar@example.com": (550, b"No such user")},
+        SMTPRecipientsRefused({"baz@example.com": (550, b"No such user")})
+    ]
+
+    refused = setup_single_transaction.emailer.send_email(
+        setup_send_email.mock_body,
+        setup_send_email.mock_subject
+    )
+
+    assert refused == {
+        "bar@example.com": (550, b"No such user"),
+        "baz@example.com": (550, b"No such user")
+    }
+
+
+def test_max_recipients_per_transaction_must_be_positive():
+    with pytest.raises(ValueError):
+        wmul_emailer.EmailSender(
+            server_host="mock_host",
+            port="mock_port",
+            single_transaction=True,
+            max_recipients_per_transaction=0
+        )
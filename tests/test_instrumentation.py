@@ -0,0 +1,127 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import wmul_emailer
+from wmul_emailer.instrumentation import Histogram
+from wmul_emailer.testing import LocalSMTPServer
+
+
+def test_metrics_of_pooled_sends():
+    metrics = wmul_emailer.Metrics()
+    with LocalSMTPServer() as server:
+        with wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                      pool_size=1, observer=metrics) as emailer:
+            for _ in range(2):
+                emailer.send_email("Body", "Subject", destination_email_addresses=[
+                    "one@example.com", "two@example.com"
+                ])
+
+    server_name = "{}:{}".format(server.host, server.port)
+    snapshot = metrics.snapshot()
+    assert snapshot["connections_opened"] == {server_name: 1}
+    assert snapshot["connections_reused"] == {server_name: 1}
+    assert snapshot["messages_sent"] == {server_name: 4}
+    # smtplib ends each message with a line break, which the server counts.
+    assert snapshot["bytes_sent"][server_name] == server.received_bytes - 4 * len(b"\r\n")
+    assert snapshot["recipients"] == {"delivered": 4}
+    counts = {(phase["phase"], phase["server"]): phase["count"] for phase in snapshot["phases"]}
+    assert counts == {
+        ("connect", server_name): 1,
+        ("pool_wait", None): 2,
+        ("render", None): 2,
+        ("send", server_name): 4,
+    }
+    json.dumps(snapshot)
+
+
+def test_observer_sees_each_recipient_and_login():
+    class Recorder(wmul_emailer.Observer):
+
+        def __init__(self):
+            self.recipients = []
+            self.phases = []
+
+        def phase(self, name, seconds, server=None):
+            self.phases.append(name)
+
+        def recipient(self, result):
+            self.recipients.append((result.address, result.status))
+
+    recorder = Recorder()
+    with LocalSMTPServer(refused_recipients=["two@example.com"]) as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, user_name="user", password="password",
+                                           from_email_address="bar@example.com", continue_on_error=True,
+                                           observer=recorder)
+        emailer.send_email("Body", "Subject", destination_email_addresses=["one@example.com", "two@example.com"])
+
+    assert recorder.recipients == [("one@example.com", "delivered"), ("two@example.com", "refused")]
+    assert recorder.phases == ["render", "connect", "login", "send", "send"]
+
+
+def test_streamed_bytes_are_counted():
+    metrics = wmul_emailer.Metrics()
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                           destination_email_addresses="foo@example.com", observer=metrics)
+        emailer.send_streamed_email("Subject", body_source=[b"a" * 1000, b"b" * 1000])
+
+    server_name = "{}:{}".format(server.host, server.port)
+    snapshot = metrics.snapshot()
+    assert snapshot["messages_sent"] == {server_name: 1}
+    assert snapshot["bytes_sent"][server_name] == server.received_bytes
+    assert snapshot["recipients"] == {"delivered": 1}
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [(0.1, 1), (1.0, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+    assert histogram.sum == 6.25
+
+
+def test_prometheus_text():
+    metrics = wmul_emailer.Metrics(buckets=(0.1, 1.0))
+    metrics.connection_opened("smtp.example.com:25")
+    metrics.message_sent(100, "smtp.example.com:25")
+    metrics.phase("send", 0.5, "smtp.example.com:25")
+    metrics.phase("render", 0.05)
+
+    text = metrics.prometheus()
+
+    assert "# TYPE wmul_emailer_connections_opened_total counter\n" \
+           "wmul_emailer_connections_opened_total{server=\"smtp.example.com:25\"} 1\n" in text
+    assert "wmul_emailer_bytes_sent_total{server=\"smtp.example.com:25\"} 100\n" in text
+    assert "# TYPE wmul_emailer_phase_seconds histogram\n" \
+           "wmul_emailer_phase_seconds_bucket{phase=\"render\",le=\"0.1\"} 1\n" \
+           "wmul_emailer_phase_seconds_bucket{phase=\"render\",le=\"1.0\"} 1\n" \
+           "wmul_emailer_phase_seconds_bucket{phase=\"render\",le=\"+Inf\"} 1\n" \
+           "wmul_emailer_phase_seconds_sum{phase=\"render\"} 0.05\n" \
+           "wmul_emailer_phase_seconds_count{phase=\"render\"} 1\n" in text
+    assert "wmul_emailer_phase_seconds_bucket{phase=\"send\",server=\"smtp.example.com:25\",le=\"0.1\"} 0\n" in text
+
+    metrics.reset()
+    assert metrics.snapshot()["phases"] == []
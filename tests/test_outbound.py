@@ -0,0 +1,176 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+import queue
+import threading
+import wmul_emailer
+from wmul_emailer.outbound import OutboundQueue
+from wmul_emailer.testing import LocalSMTPServer
+from wmul_test_utils import make_namedtuple
+
+
+@pytest.fixture(scope="function")
+def setup_blocked_queue(request):
+    release = threading.Event()
+    started = threading.Event()
+    delivered = []
+
+    def deliver(item):
+        started.set()
+        release.wait(5)
+        delivered.append(item)
+
+    outbound_queue = OutboundQueue(
+        deliver,
+        max_size=2,
+        full_policy=request.param
+    )
+    outbound_queue.put("first")
+    # Wait for the background thread to take the first item, so that the
+    # queue itself is empty.
+    started.wait(5)
+
+    yield make_namedtuple(
+        "setup_blocked_queue",
+        outbound_queue=outbound_queue,
+        release=release,
+        delivered=delivered
+    )
+
+    release.set()
+    outbound_queue.close()
+
+
+@pytest.mark.parametrize("setup_blocked_queue", ["raise"], indirect=True)
+def test_raise_policy(setup_blocked_queue):
+    setup_blocked_queue.outbound_queue.put("second")
+    setup_blocked_queue.outbound_queue.put("third")
+
+    with pytest.raises(queue.Full):
+        setup_blocked_queue.outbound_queue.put("fourth")
+
+    assert setup_blocked_queue.outbound_queue.flush(timeout=0.01) is False
+    setup_blocked_queue.release.set()
+    assert setup_blocked_queue.outbound_queue.flush(timeout=5) is True
+    assert setup_blocked_queue.delivered == ["first", "second", "third"]
+
+
+@pytest.mark.parametrize("setup_blocked_queue", ["drop_oldest"], indirect=True)
+def test_drop_oldest_policy(setup_blocked_queue):
+    for item in ["second", "third", "fourth", "fifth"]:
+        setup_blocked_queue.outbound_queue.put(item)
+
+    setup_blocked_queue.release.set()
+    assert setup_blocked_queue.outbound_queue.flush(timeout=5) is True
+    assert setup_blocked_queue.delivered == ["first", "fourth", "fifth"]
+    assert setup_blocked_queue.outbound_queue.dropped == 2
+
+
+@pytest.mark.parametrize("setup_blocked_queue", ["block"], indirect=True)
+def test_block_policy(setup_blocked_queue):
+    setup_blocked_queue.outbound_queue.put("second")
+    setup_blocked_queue.outbound_queue.put("third")
+
+    putter = threading.Thread(
+        target=setup_blocked_queue.outbound_queue.put,
+        args=("fourth",)
+    )
+    putter.start()
+    putter.join(0.05)
+    assert putter.is_alive()
+
+    setup_blocked_queue.release.set()
+    putter.join(5)
+    assert setup_blocked_queue.outbound_queue.flush(timeout=5) is True
+    assert setup_blocked_queue.delivered == \
+        ["first", "second", "third", "fourth"]
+
+
+def test_close_drains_queue():
+    delivered = []
+    outbound_queue = OutboundQueue(delivered.append)
+    for item in range(50):
+        outbound_queue.put(item)
+
+    outbound_queue.close()
+
+    assert delivered == list(range(50))
+    with pytest.raises(RuntimeError):
+        outbound_queue.put("late")
+
+
+def test_failed_delivery_does_not_stop_queue():
+    delivered = []
+
+    def deliver(item):
+        if item == "bad":
+            raise ValueError()
+        delivered.append(item)
+
+    outbound_queue = OutboundQueue(deliver)
+    for item in ["good", "bad", "also good"]:
+        outbound_queue.put(item)
+
+    assert outbound_queue.flush(timeout=5) is True
+    assert delivered == ["good", "also good"]
+    assert outbound_queue.failed == 1
+    outbound_queue.close()
+
+
+def test_unknown_full_policy():
+    with pytest.raises(ValueError):
+        OutboundQueue(print, full_policy="unknown")
+    with pytest.raises(ValueError):
+        wmul_emailer.EmailSender(
+            server_host="mock_host",
+            port="mock_port",
+            queue_full_policy="unknown"
+        )
+
+
+def test_enqueue_email_reuses_one_connection():
+    with LocalSMTPServer() as server:
+        with wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com", "bar@example.com"]
+        ) as emailer:
+            for index in range(5):
+                emailer.enqueue_email("mock_body", "subject {}".format(index))
+            assert emailer.flush(timeout=5) is True
+
+        assert len(server.messages) == 10
+        assert server.connection_count == 1
+
+
+def test_enqueue_email_validates_immediately():
+    emailer = wmul_emailer.EmailSender(
+        server_host="mock_host",
+        port="mock_port",
+        destination_email_addresses="foo@example.com"
+    )
+    with pytest.raises(ValueError):
+        emailer.enqueue_email("mock_body", "mock_subject")
+    assert emailer.flush(timeout=0) is True
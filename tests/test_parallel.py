@@ -0,0 +1,144 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+import socket
+import wmul_emailer
+from wmul_emailer.testing import LocalSMTPServer
+from wmul_test_utils import make_namedtuple
+
+
+@pytest.fixture(scope="function")
+def setup_parallel():
+    mock_destination_email_addresses = [
+        "address_{}@example.com".format(index) for index in range(7)
+    ]
+    with LocalSMTPServer() as server:
+        yield make_namedtuple(
+            "setup_parallel",
+            server=server,
+            mock_destination_email_addresses=mock_destination_email_addresses
+        )
+
+
+def make_emailer(server, mock_destination_email_addresses, **kwargs):
+    return wmul_emailer.EmailSender(
+        server_host=server.host,
+        port=server.port,
+        from_email_address="mock_from@example.com",
+        destination_email_addresses=mock_destination_email_addresses,
+        **kwargs
+    )
+
+
+def test_parallel_delivers_over_several_connections(setup_parallel):
+    emailer = make_emailer(
+        setup_parallel.server,
+        setup_parallel.mock_destination_email_addresses,
+        parallel_connections=3
+    )
+
+    failures = emailer.send_email("mock_body", "mock_subject")
+
+    assert failures == {}
+    assert setup_parallel.server.connection_count == 3
+    delivered_to = sorted(
+        message.rcpt_tos[0] for message in setup_parallel.server.messages
+    )
+    assert delivered_to == sorted(
+        setup_parallel.mock_destination_email_addresses
+    )
+
+
+def test_parallel_single_transaction(setup_parallel):
+    emailer = make_emailer(
+        setup_parallel.server,
+        setup_parallel.mock_destination_email_addresses,
+        parallel_connections=2,
+        single_transaction=True,
+        max_recipients_per_transaction=3,
+        max_connections_per_server=1
+    )
+
+    failures = emailer.send_email("mock_body", "mock_subject")
+
+    assert failures == {}
+    assert sorted(
+        len(message.rcpt_tos) for message in setup_parallel.server.messages
+    ) == [1, 3, 3]
+
+
+def test_parallel_aggregates_refused_recipients(setup_parallel):
+    setup_parallel.server.refused_recipients.update(
+        ["address_1@example.com", "address_4@example.com"]
+    )
+    emailer = make_emailer(
+        setup_parallel.server,
+        setup_parallel.mock_destination_email_addresses,
+        parallel_connections=3
+    )
+
+    failures = emailer.send_email("mock_body", "mock_subject")
+
+    assert sorted(failures) == ["address_1@example.com", "address_4@example.com"]
+    assert failures["address_1@example.com"][0] == 550
+    assert len(setup_parallel.server.messages) == 5
+
+
+def test_parallel_aggregates_connection_errors(setup_parallel):
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        closed_port = unused.getsockname()[1]
+
+    emailer = wmul_emailer.EmailSender(
+        server_host="127.0.0.1",
+        port=closed_port,
+        from_email_address="mock_from@example.com",
+        destination_email_addresses=\
+            setup_parallel.mock_destination_email_addresses,
+        parallel_connections=3
+    )
+
+    failures = emailer.send_email("mock_body", "mock_subject")
+
+    assert sorted(failures) == \
+        sorted(setup_parallel.mock_destination_email_addresses)
+    assert all(isinstance(error, OSError) for error in failures.values())
+
+
+def test_parallel_connections_must_be_positive():
+    with pytest.raises(ValueError):
+        wmul_emailer.EmailSender(
+            server_host="mock_host",
+            port="mock_port",
+            parallel_connections=0
+        )
+
+
+def test_senders_to_one_server_must_ask_for_the_same_connection_limit():
+    first = wmul_emailer.EmailSender("mock_host_with_slots", port=25, max_connections_per_server=2)
+    second = wmul_emailer.EmailSender("mock_host_with_slots", port=25, max_connections_per_server=2)
+
+    assert second._slots is first._slots
+    with pytest.raises(ValueError):
+        wmul_emailer.EmailSender("mock_host_with_slots", port=25, max_connections_per_server=5)
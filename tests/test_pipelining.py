@@ -0,0 +1,138 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import email
+import pytest
+import time
+from smtplib import SMTPRecipientsRefused
+import wmul_emailer
+from wmul_emailer.testing import LocalSMTPServer
+
+
+def send_and_time(server, pipelining, email_count):
+    with wmul_emailer.EmailSender(
+        server_host=server.host,
+        port=server.port,
+        from_email_address="mock_from@example.com",
+        destination_email_addresses=["foo@example.com", "bar@example.com"],
+        pool_size=1,
+        single_transaction=True,
+        pipelining=pipelining
+    ) as emailer:
+        emailer.send_email("warm up", "mock_subject")
+        start = time.perf_counter()
+        for _ in range(email_count):
+            emailer.send_email("mock_body", "mock_subject")
+        return time.perf_counter() - start
+
+
+def test_pipelining_saves_round_trips():
+    with LocalSMTPServer(latency=0.05) as server:
+        in_turn = send_and_time(server, pipelining=False, email_count=4)
+        pipelined = send_and_time(server, pipelining=True, email_count=4)
+
+    assert len(server.messages) == 10
+    # Five round trips per message in turn (MAIL, RCPT, RCPT, DATA, and the
+    # end of the data), against two when pipelined.
+    assert pipelined < in_turn * 0.75
+
+
+def test_pipelined_refused_recipients():
+    with LocalSMTPServer(refused_recipients=["bad@example.com"]) as server:
+        with wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            pool_size=1,
+            single_transaction=True
+        ) as emailer:
+            refused = emailer.send_email(
+                "mock_body", "mock_subject",
+                destination_email_addresses=["foo@example.com", "bad@example.com"]
+            )
+            assert list(refused) == ["bad@example.com"]
+            assert refused["bad@example.com"][0] == 550
+
+            emailer.single_transaction = False
+            with pytest.raises(SMTPRecipientsRefused):
+                emailer.send_email(
+                    "mock_body", "mock_subject",
+                    destination_email_addresses="bad@example.com"
+                )
+
+            emailer.send_email(
+                "second_body", "mock_subject",
+                destination_email_addresses="foo@example.com"
+            )
+
+    assert [message.rcpt_tos for message in server.messages] == \
+        [["foo@example.com"], ["foo@example.com"]]
+    parsed = email.message_from_bytes(server.messages[1].data)
+    assert parsed.get_payload().rstrip() == "second_body"
+
+
+@pytest.mark.parametrize("extensions", [("PIPELINING",), ("8BITMIME",)])
+def test_non_ascii_and_periods_with_and_without_pipelining(extensions):
+    body = "first line\n.\n..second line"
+
+    with LocalSMTPServer(extensions=extensions + ("SMTPUTF8",)) as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses="jürgen@example.com"
+        )
+        emailer.send_email(body, "mock_subject")
+
+    message, = server.messages
+    assert message.rcpt_tos == ["jürgen@example.com"]
+    parsed = email.message_from_bytes(message.data)
+    assert parsed.get_payload().replace("\r\n", "\n").rstrip() == body
+
+
+@pytest.mark.parametrize("extensions", [("PIPELINING",), ()])
+def test_async_sender_with_and_without_pipelining(extensions):
+    async def send():
+        async with wmul_emailer.AsyncEmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com", "bar@example.com"]
+        ) as emailer:
+            await emailer.send_email("mock_body", "mock_subject")
+            with pytest.raises(SMTPRecipientsRefused):
+                await emailer.send_email(
+                    "mock_body", "mock_subject",
+                    destination_email_addresses="bad@example.com"
+                )
+
+    with LocalSMTPServer(extensions=extensions, refused_recipients=["bad@example.com"]) as server:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(send())
+        finally:
+            loop.close()
+
+    assert sorted(message.rcpt_tos[0] for message in server.messages) == \
+        ["bar@example.com", "foo@example.com"]
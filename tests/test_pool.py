@@ -0,0 +1,165 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+from smtplib import SMTPServerDisconnected
+import wmul_emailer
+from wmul_test_utils import make_namedtuple
+
+
+@pytest.fixture(scope="function")
+def setup_pool(mocker):
+    mock_servers = []
+
+    def mock_connect_function():
+        mock_server = mocker.Mock()
+        mock_server.esmtp_features = {}
+        mock_server.sendmail.return_value = {}
+        mock_server.noop.return_value = (250, b"OK")
+        mock_servers.append(mock_server)
+        return mock_server
+
+    mock_connect = mocker.Mock(side_effect=mock_connect_function)
+
+    pool = wmul_emailer.SMTPConnectionPool(
+        mock_connect,
+        max_size=2,
+        idle_timeout=60.0,
+        max_messages_per_connection=3,
+        health_check_after=0.0
+    )
+
+    return make_namedtuple(
+        "setup_pool",
+        pool=pool,
+        mock_connect=mock_connect,
+        mock_servers=mock_servers
+    )
+
+
+def test_connection_is_reused(setup_pool):
+    for _ in range(2):
+        with setup_pool.pool.connection() as pooled_connection:
+            pooled_connection.call(lambda server: server.send_message("msg"))
+
+    setup_pool.mock_connect.assert_called_once_with()
+    assert setup_pool.mock_servers[0].send_message.call_count == 2
+    setup_pool.mock_servers[0].noop.assert_called_once_with()
+
+
+def test_dead_idle_connection_is_replaced(setup_pool):
+    with setup_pool.pool.connection() as pooled_connection:
+        pooled_connection.call(lambda server: server.send_message("msg"))
+
+    setup_pool.mock_servers[0].noop.side_effect = SMTPServerDisconnected()
+
+    with setup_pool.pool.connection() as pooled_connection:
+        pooled_connection.call(lambda server: server.send_message("msg"))
+
+    assert setup_pool.mock_connect.call_count == 2
+    setup_pool.mock_servers[1].send_message.assert_called_once_with("msg")
+
+
+def test_expired_idle_connection_is_closed(setup_pool):
+    setup_pool.pool.idle_timeout = -1
+
+    with setup_pool.pool.connection() as pooled_connection:
+        pooled_connection.call(lambda server: server.send_message("msg"))
+    with setup_pool.pool.connection() as pooled_connection:
+        pooled_connection.call(lambda server: server.send_message("msg"))
+
+    assert setup_pool.mock_connect.call_count == 2
+    setup_pool.mock_servers[0].quit.assert_called_once_with()
+    setup_pool.mock_servers[0].noop.assert_not_called()
+
+
+def test_connection_recycled_after_max_messages(setup_pool):
+    with setup_pool.pool.connection() as pooled_connection:
+        for _ in range(4):
+            pooled_connection.call(lambda server: server.send_message("msg"))
+
+    assert setup_pool.mock_connect.call_count == 2
+    assert setup_pool.mock_servers[0].send_message.call_count == 3
+    setup_pool.mock_servers[0].quit.assert_called_once_with()
+    assert setup_pool.mock_servers[1].send_message.call_count == 1
+
+
+def test_reconnects_when_server_drops_session(setup_pool):
+    with setup_pool.pool.connection() as pooled_connection:
+        pooled_connection.call(lambda server: None)
+        setup_pool.mock_servers[0].send_message.side_effect = \
+            SMTPServerDisconnected()
+        pooled_connection.call(lambda server: server.send_message("msg"))
+
+    assert setup_pool.mock_connect.call_count == 2
+    setup_pool.mock_servers[1].send_message.assert_called_once_with("msg")
+
+
+def test_connection_discarded_on_error(setup_pool):
+    with pytest.raises(KeyError):
+        with setup_pool.pool.connection() as pooled_connection:
+            pooled_connection.call(lambda server: None)
+            raise KeyError()
+
+    assert setup_pool.pool.idle_count == 0
+    setup_pool.mock_servers[0].quit.assert_called_once_with()
+
+
+def test_close_quits_idle_connections(setup_pool):
+    with setup_pool.pool.connection():
+        pass
+
+    setup_pool.pool.close()
+
+    setup_pool.mock_servers[0].quit.assert_called_once_with()
+    with pytest.raises(RuntimeError):
+        setup_pool.pool.acquire()
+
+
+def test_email_sender_pool_reused_across_calls(mocker):
+    mock_server = mocker.Mock()
+    mock_server.esmtp_features = {}
+    mock_server.sendmail.return_value = {}
+    mock_smtp = mocker.Mock(return_value=mock_server)
+    mocker.patch("wmul_emailer.SMTP", mock_smtp)
+
+    with wmul_emailer.EmailSender(
+        server_host="mock_host",
+        port="mock_port",
+        user_name="mock_username",
+        password="mock_password",
+        from_email_address="mock_from_email_address",
+        destination_email_addresses=["foo@example.com", "bar@example.com"],
+        pool_size=2
+    ) as emailer:
+        emailer.send_email("mock_body", "mock_subject")
+        emailer.send_email("mock_body", "mock_subject")
+        mock_server.quit.assert_not_called()
+
+    mock_smtp.assert_called_once_with("mock_host", port="mock_port")
+    mock_server.login.assert_called_once_with(
+        user="mock_username",
+        password="mock_password"
+    )
+    assert mock_server.sendmail.call_count == 4
+    mock_server.quit.assert_called_once_with()
@@ -0,0 +1,169 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+import time
+from smtplib import SMTPRecipientsRefused
+import wmul_emailer
+from wmul_emailer import ratelimit
+from wmul_emailer.testing import LocalSMTPServer
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_allows_burst_then_rate():
+    clock = FakeClock()
+    bucket = ratelimit.TokenBucket(rate=2.0, burst=3, clock=clock)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now = 10.0
+    assert bucket.reserve() == 0.0
+
+
+def test_throttle_slows_down_and_recovers():
+    clock = FakeClock()
+    throttle = ratelimit.Throttle(server_rate=10.0, burst=1, clock=clock, sleep=clock.sleep)
+
+    throttle.wait("from@example.com")
+    throttle.wait("from@example.com")
+    assert clock.slept == [pytest.approx(0.1)]
+
+    throttle.slow_down()
+    throttle.slow_down()
+    assert throttle.factor == 0.25
+    clock.now += 10.0
+    throttle.wait("from@example.com")
+    throttle.wait("from@example.com")
+    assert clock.slept[-1] == pytest.approx(0.4)
+
+    for _ in range(20):
+        throttle.speed_up()
+    assert throttle.factor == 1.0
+
+
+def test_throttle_limits_each_sender():
+    clock = FakeClock()
+    throttle = ratelimit.Throttle(sender_rate=1.0, burst=1, clock=clock, sleep=clock.sleep)
+
+    throttle.wait("first@example.com")
+    throttle.wait("second@example.com")
+    assert clock.slept == []
+    throttle.wait("first@example.com")
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_throttle_does_not_wait_past_timeout():
+    clock = FakeClock()
+    throttle = ratelimit.Throttle(server_rate=1.0, burst=1, clock=clock, sleep=clock.sleep)
+
+    assert throttle.wait("first@example.com", timeout=0.5) == 0.0
+    assert throttle.wait("first@example.com", timeout=0.5) is None
+    assert throttle.wait("first@example.com", timeout=0.5) is None
+    assert clock.slept == []
+    # The waits that timed out did not take tokens.
+    assert throttle.wait("first@example.com") == pytest.approx(1.0)
+
+
+def test_server_rate_limit_spaces_out_messages():
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["address_{}@example.com".format(index) for index in range(6)],
+            server_rate_limit=20.0,
+            rate_limit_burst=1
+        )
+        start = time.perf_counter()
+        emailer.send_email("mock_body", "mock_subject")
+        elapsed = time.perf_counter() - start
+
+    assert len(server.messages) == 6
+    assert elapsed >= 0.2
+
+
+def test_senders_to_one_server_must_ask_for_the_same_limits():
+    server_key = ("mock_host_with_limits", 25)
+    first = wmul_emailer.EmailSender(server_key[0], port=server_key[1], server_rate_limit=100.0)
+    second = wmul_emailer.EmailSender(server_key[0], port=server_key[1], server_rate_limit=100.0)
+
+    assert second._throttle is first._throttle
+    with pytest.raises(ValueError):
+        wmul_emailer.EmailSender(server_key[0], port=server_key[1], server_rate_limit=1.0, sender_rate_limit=1.0)
+    with pytest.raises(ValueError):
+        ratelimit.server_throttle(server_key, 100.0, burst=5)
+
+
+def test_deferred_recipients_are_retried():
+    with LocalSMTPServer(deferred_recipients={"foo@example.com": 2}) as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com", "bar@example.com"],
+            deferral_retry_delay=0.01
+        )
+        emailer.send_email("mock_body", "mock_subject")
+
+        emailer.single_transaction = True
+        server.deferred_recipients["foo@example.com"] = 1
+        assert emailer.send_email("mock_body", "mock_subject") == {}
+
+    assert [message.rcpt_tos for message in server.messages] == [
+        ["foo@example.com"],
+        ["bar@example.com"],
+        ["bar@example.com"],
+        ["foo@example.com"],
+    ]
+
+
+def test_deferred_recipient_is_refused_once_retries_run_out():
+    with LocalSMTPServer(deferred_recipients={"foo@example.com": 5}) as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses="foo@example.com",
+            deferral_retries=1,
+            deferral_retry_delay=0.01
+        )
+        with pytest.raises(SMTPRecipientsRefused) as exc_info:
+            emailer.send_email("mock_body", "mock_subject")
+
+    assert exc_info.value.recipients["foo@example.com"][0] == 451
+    assert server.deferred_recipients["foo@example.com"] == 3
+    assert server.messages == []
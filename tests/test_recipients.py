@@ -0,0 +1,106 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+import wmul_emailer
+from wmul_emailer import recipients
+from wmul_emailer.testing import LocalSMTPServer
+
+
+def test_parse_address():
+    parsed = recipients.parse_address(" Jane Doe <Jane.Doe@Example.COM> ")
+
+    assert parsed.address == "Jane.Doe@example.com"
+    assert parsed.local_part == "Jane.Doe"
+    assert parsed.domain == "example.com"
+    assert parsed.key == recipients.parse_address("jane.doe@EXAMPLE.com").key
+    assert recipients.parse_address("用户@例子.广告").domain == "例子.广告"
+    assert recipients.parse_address("\"a@b\"@example.com").local_part == "\"a@b\""
+
+
+@pytest.mark.parametrize("address", [
+    "foo", "@example.com", "foo@", "foo bar@example.com", "foo@-example.com", "foo..bar@example.com",
+    "foo@example..com", "foo@exa_mple.com", "foo@example.com\r\nBcc: bar@example.com", "a" * 65 + "@example.com",
+    "a@b@example.com",
+])
+def test_invalid_addresses(address):
+    with pytest.raises(ValueError):
+        recipients.parse_address(address)
+
+
+def test_prepare_recipients_dedupes_and_groups_by_domain():
+    prepared = recipients.prepare_recipients([
+        "one@first.example", "two@Second.example", "ONE@first.example", "three@first.example",
+        "four@second.example", "two@second.example",
+    ])
+
+    assert prepared == ["one@first.example", "three@first.example", "two@second.example", "four@second.example"]
+
+
+def test_prepare_recipients_lists_every_invalid_address():
+    with pytest.raises(ValueError) as raised:
+        recipients.prepare_recipients(["good@example.com", "bad", "worse@"])
+
+    assert "'bad', 'worse@'" in str(raised.value)
+
+
+def test_domain_batches():
+    batches = list(recipients.domain_batches(
+        ["a@first.example", "b@first.example", "c@first.example", "d@second.example"], 2
+    ))
+
+    assert batches == [["a@first.example", "b@first.example"], ["c@first.example"], ["d@second.example"]]
+
+
+def test_send_email_preprocesses_recipients():
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                           single_transaction=True, preprocess_recipients=True)
+        send_result = emailer.send_email("Body", "Subject", destination_email_addresses=[
+            "one@first.example", "two@second.example", "One@First.Example", "three@first.example",
+        ])
+
+    assert send_result.ok
+    assert list(send_result.recipients) == ["one@first.example", "three@first.example", "two@second.example"]
+    assert [message.rcpt_tos for message in server.messages] == [
+        ["one@first.example", "three@first.example"],
+        ["two@second.example"],
+    ]
+
+
+def test_send_email_refuses_invalid_recipients_before_connecting():
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                           preprocess_recipients=True)
+        with pytest.raises(ValueError):
+            emailer.send_email("Body", "Subject", destination_email_addresses=["good@example.com", "bad"])
+
+    assert server.connection_count == 0
+
+
+def test_recipients_are_sent_as_given_by_default():
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com")
+        emailer.send_email("Body", "Subject", destination_email_addresses=["one@example.com", "one@example.com"])
+
+    assert len(server.messages) == 2
@@ -0,0 +1,154 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import contextlib
+import pytest
+import socket
+import wmul_emailer
+from wmul_emailer import relays
+from wmul_emailer.testing import LocalSMTPServer
+
+
+def closed_port():
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        return unused.getsockname()[1]
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    clock = FakeClock()
+    relay_set = relays.RelaySet([("first", 25), ("second", 25)], failure_threshold=2, reset_timeout=10.0,
+                                clock=clock)
+    first, second = relay_set.relays
+
+    relay_set.record_failure(first)
+    assert relay_set.state(first) == relays.CLOSED
+    relay_set.record_failure(first)
+    assert relay_set.state(first) == relays.OPEN
+    assert relay_set.choose() is second
+    assert relay_set.choose(exclude=[second]) is None
+
+    clock.now = 11.0
+    assert relay_set.state(first) == relays.HALF_OPEN
+    assert relay_set.choose(exclude=[second]) is first
+    # Only one connection at a time tests a half open relay.
+    assert relay_set.choose(exclude=[second]) is None
+    relay_set.record_failure(first)
+    assert relay_set.state(first) == relays.OPEN
+
+    clock.now = 22.0
+    assert relay_set.choose(exclude=[second]) is first
+    relay_set.record_success(first, 0.1)
+    assert relay_set.state(first) == relays.CLOSED
+
+
+def test_round_robin_follows_weights():
+    relay_set = relays.RelaySet([("heavy", 25, 3), ("light", 25, 1)], strategy="round_robin")
+
+    chosen = [relay_set.choose().host for _ in range(8)]
+
+    assert chosen.count("heavy") == 6
+    assert chosen.count("light") == 2
+    assert chosen[4:] == chosen[:4]
+
+
+def test_least_loaded_prefers_low_latency_and_little_outstanding_work():
+    relay_set = relays.RelaySet([("slow", 25), ("fast", 25, 2)])
+    slow, fast = relay_set.relays
+
+    assert relay_set.choose() is slow
+    relay_set.record_latency(slow, 0.5)
+    assert relay_set.choose() is fast
+    relay_set.record_latency(fast, 0.1)
+
+    with contextlib.ExitStack() as stack:
+        for _ in range(3):
+            stack.enter_context(relay_set.track(fast))
+        assert relay_set.choose() is fast
+        for _ in range(7):
+            stack.enter_context(relay_set.track(fast))
+        assert relay_set.choose() is slow
+    assert fast.outstanding == 0
+
+
+def test_send_email_fails_over_to_working_relay():
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=None,
+            port=None,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com", "bar@example.com"],
+            relays=[("127.0.0.1", closed_port()), (server.host, server.port)],
+            relay_failure_threshold=1,
+            connect_timeout=5.0
+        )
+        dead, live = emailer.relays
+
+        emailer.send_email("mock_body", "mock_subject")
+        assert emailer._relays.state(dead) == relays.OPEN
+        emailer.send_email("mock_body", "mock_subject")
+
+        assert emailer.check_relays() == {dead: False, live: True}
+
+    assert len(server.messages) == 4
+    assert live.latency is not None
+
+
+def test_no_relay_available():
+    emailer = wmul_emailer.EmailSender(
+        server_host=None,
+        port=None,
+        from_email_address="mock_from@example.com",
+        destination_email_addresses="foo@example.com",
+        relays=[("127.0.0.1", closed_port()), ("127.0.0.1", closed_port())]
+    )
+
+    with pytest.raises(wmul_emailer.NoRelayAvailableError):
+        emailer.send_email("mock_body", "mock_subject")
+
+
+def test_latency_moves_load_to_faster_relay():
+    with LocalSMTPServer(latency=0.03) as slow_server, LocalSMTPServer() as fast_server:
+        with wmul_emailer.EmailSender(
+            server_host=None,
+            port=None,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses="foo@example.com",
+            relays=[(slow_server.host, slow_server.port), (fast_server.host, fast_server.port)],
+            pool_size=1,
+            pool_max_messages_per_connection=1
+        ) as emailer:
+            for _ in range(10):
+                emailer.send_email("mock_body", "mock_subject")
+
+    assert len(slow_server.messages) + len(fast_server.messages) == 10
+    assert len(slow_server.messages) <= 2
@@ -0,0 +1,123 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+from smtplib import SMTPDataError, SMTPRecipientsRefused
+import wmul_emailer
+from wmul_emailer.testing import LocalSMTPServer
+
+
+@pytest.fixture(scope="function")
+def local_server():
+    with LocalSMTPServer(
+        refused_recipients=["bad@example.com"],
+        deferred_recipients={"slow@example.com": 1}
+    ) as server:
+        yield server
+
+
+def make_emailer(server, **kwargs):
+    return wmul_emailer.EmailSender(
+        server_host=server.host,
+        port=server.port,
+        from_email_address="mock_from@example.com",
+        destination_email_addresses=[
+            "foo@example.com", "bad@example.com", "slow@example.com", "bar@example.com"
+        ],
+        deferral_retry_delay=0.01,
+        **kwargs
+    )
+
+
+def test_continue_on_error_attempts_every_recipient(local_server):
+    emailer = make_emailer(local_server, continue_on_error=True)
+
+    result = emailer.send_email("mock_body", "mock_subject")
+
+    assert [message.rcpt_tos[0] for message in local_server.messages] == \
+        ["foo@example.com", "slow@example.com", "bar@example.com"]
+    assert result.delivered == ["foo@example.com", "slow@example.com", "bar@example.com"]
+    assert list(result) == ["bad@example.com"]
+    assert result["bad@example.com"][0] == 550
+    assert not result.ok
+
+    foo, bad, slow, bar = result.recipients.values()
+    assert (foo.status, foo.code, foo.retries) == ("delivered", 250, 0)
+    assert (bad.status, bad.code, bad.retries) == ("refused", 550, 0)
+    assert (slow.status, slow.code, slow.retries) == ("delivered", 250, 1)
+    assert slow.latency >= 0.01
+    assert all(recipient.latency is not None for recipient in result.recipients.values())
+
+
+def test_without_continue_on_error_first_refusal_raises(local_server):
+    emailer = make_emailer(local_server)
+
+    with pytest.raises(SMTPRecipientsRefused):
+        emailer.send_email("mock_body", "mock_subject")
+
+    assert [message.rcpt_tos[0] for message in local_server.messages] == ["foo@example.com"]
+
+
+def test_single_transaction_result(local_server):
+    emailer = make_emailer(local_server, single_transaction=True)
+
+    result = emailer.send_email("mock_body", "mock_subject")
+
+    assert result == {"bad@example.com": result["bad@example.com"]}
+    assert result.recipients["slow@example.com"].retries == 1
+    assert result.recipients["foo@example.com"].status == "delivered"
+    assert result.recipients["bad@example.com"].status == "refused"
+    assert [message.rcpt_tos for message in local_server.messages] == [
+        ["foo@example.com", "bar@example.com"],
+        ["slow@example.com"],
+    ]
+
+
+def test_errors_are_recorded_with_continue_on_error(mocker):
+    mock_server = mocker.Mock()
+    mock_server.esmtp_features = {}
+
+    def mock_sendmail(from_email_address, recipients, msg_bytes):
+        if recipients == ["bad@example.com"]:
+            raise SMTPDataError(554, b"Transaction failed")
+        return {}
+
+    mock_server.sendmail.side_effect = mock_sendmail
+    mock_server.__enter__ = mocker.Mock(return_value=mock_server)
+    mock_server.__exit__ = mocker.Mock(return_value=False)
+    mocker.patch("wmul_emailer.SMTP", mocker.Mock(return_value=mock_server))
+
+    emailer = wmul_emailer.EmailSender(
+        server_host="mock_host",
+        port="mock_port",
+        from_email_address="mock_from@example.com",
+        destination_email_addresses=["foo@example.com", "bad@example.com", "bar@example.com"],
+        continue_on_error=True
+    )
+    result = emailer.send_email("mock_body", "mock_subject")
+
+    assert mock_server.sendmail.call_count == 3
+    assert result.delivered == ["foo@example.com", "bar@example.com"]
+    bad = result.recipients["bad@example.com"]
+    assert (bad.status, bad.code) == ("failed", 554)
+    assert isinstance(result["bad@example.com"], SMTPDataError)
@@ -0,0 +1,253 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import time
+import pytest
+import wmul_emailer
+from click.testing import CliRunner
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+from wmul_emailer import cli
+from wmul_emailer.spool import fcntl
+from wmul_emailer.testing import LocalSMTPServer
+
+
+def fill_spool(spool_directory, count=3):
+    with wmul_emailer.Spool(spool_directory) as email_spool:
+        for index in range(count):
+            email_spool.put(
+                "body {}".format(index),
+                "subject {}".format(index),
+                "mock_from@example.com",
+                ["foo@example.com", "bar@example.com"]
+            )
+
+
+def test_spooled_emails_survive_reopen(tmpdir):
+    fill_spool(str(tmpdir))
+
+    with wmul_emailer.Spool(str(tmpdir)) as email_spool:
+        spooled_emails = list(email_spool.pending())
+
+    assert [spooled_email.email_id for spooled_email in spooled_emails] == \
+        [1, 2, 3]
+    assert spooled_emails[2].email_body == "body 2"
+    assert spooled_emails[2].email_subject == "subject 2"
+    assert spooled_emails[2].from_email_address == "mock_from@example.com"
+    assert spooled_emails[2].destination_email_addresses == \
+        ["foo@example.com", "bar@example.com"]
+
+
+def test_drain_delivers_and_compacts(tmpdir):
+    fill_spool(str(tmpdir))
+    delivered = []
+
+    with wmul_emailer.Spool(str(tmpdir)) as email_spool:
+        result = email_spool.drain(delivered.append)
+        assert len(email_spool) == 0
+
+    assert result == (3, 0, 0)
+    assert [spooled_email.email_id for spooled_email in delivered] == \
+        [1, 2, 3]
+    assert os.path.getsize(str(tmpdir.join("messages.dat"))) == 0
+    assert os.path.getsize(str(tmpdir.join("index.log"))) == 0
+
+
+def test_drain_retries_with_backoff(tmpdir):
+    fill_spool(str(tmpdir), count=1)
+
+    def deliver(spooled_email):
+        raise SMTPServerDisconnected()
+
+    with wmul_emailer.Spool(str(tmpdir), retry_base_delay=10) as email_spool:
+        assert email_spool.drain(deliver, now=1000) == (0, 1, 0)
+        assert email_spool.drain(deliver, now=1005) == (0, 0, 0)
+        assert email_spool.drain(deliver, now=1010) == (0, 1, 0)
+
+    with wmul_emailer.Spool(str(tmpdir)) as email_spool:
+        spooled_email, = email_spool.pending()
+        assert spooled_email.attempts == 2
+        assert spooled_email.next_attempt == 1030
+        assert email_spool.drain(lambda spooled_email: None, now=1029) == \
+            (0, 0, 0)
+        assert email_spool.drain(lambda spooled_email: None, now=1030) == \
+            (1, 0, 0)
+
+
+def test_drain_gives_up(tmpdir):
+    fill_spool(str(tmpdir), count=2)
+
+    def deliver(spooled_email):
+        if spooled_email.email_id == 1:
+            raise SMTPRecipientsRefused({"foo@example.com": (550, b"No")})
+        raise SMTPServerDisconnected()
+
+    with wmul_emailer.Spool(str(tmpdir), max_attempts=2,
+                            retry_base_delay=0) as email_spool:
+        assert email_spool.drain(deliver) == (0, 1, 1)
+        assert email_spool.drain(deliver) == (0, 0, 1)
+        assert len(email_spool) == 0
+
+
+def test_partial_records_from_crash_are_ignored(tmpdir):
+    fill_spool(str(tmpdir), count=2)
+    with open(str(tmpdir.join("index.log")), "ab") as index_file:
+        index_file.write(b"E 3 99999 10\nD 1")
+
+    with wmul_emailer.Spool(str(tmpdir)) as email_spool:
+        assert [
+            spooled_email.email_id 
+            for spooled_email in email_spool.pending()
+        ] == [1, 2]
+        assert email_spool.put("body", "subject", "from", ["to"]) == 4
+
+
+@pytest.mark.skipif(fcntl is None, reason="Spool locking requires fcntl.")
+def test_records_are_synced_after_sync_interval_without_more_writes(tmpdir, mocker):
+    with wmul_emailer.Spool(str(tmpdir), sync_interval=0.05) as email_spool:
+        sync = mocker.spy(email_spool, "sync")
+        email_spool.put("body", "subject", "mock_from@example.com", ["foo@example.com"])
+        assert sync.call_count == 0
+
+        give_up_at = time.monotonic() + 5
+        while not sync.call_count and time.monotonic() < give_up_at:
+            time.sleep(0.01)
+
+        assert sync.call_count == 1
+
+
+def test_spool_is_locked(tmpdir):
+    with wmul_emailer.Spool(str(tmpdir)):
+        with pytest.raises(wmul_emailer.SpoolLockedError):
+            wmul_emailer.Spool(str(tmpdir))
+
+
+def test_email_sender_spool_email_and_drain_spool(tmpdir):
+    with LocalSMTPServer() as server:
+        with wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com", "bar@example.com"],
+            spool_directory=str(tmpdir)
+        ) as emailer:
+            emailer.spool_email("mock_body", "mock_subject")
+            emailer.spool_email("mock_body", "mock_subject")
+            assert server.messages == []
+
+            assert emailer.drain_spool() == (2, 0, 0)
+
+        assert len(server.messages) == 4
+        assert server.connection_count == 1
+
+
+def test_drain_spool_keeps_deferred_recipients(tmpdir):
+    with LocalSMTPServer(deferred_recipients={"deferred@example.com": 1},
+                         refused_recipients=["refused@example.com"]) as server:
+        with wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com", "deferred@example.com", "refused@example.com"],
+            spool_directory=str(tmpdir),
+            single_transaction=True,
+            deferral_retries=0
+        ) as emailer:
+            emailer.spool_email("mock_body", "mock_subject")
+
+            assert emailer.drain_spool() == (0, 1, 0)
+            assert [message.rcpt_tos for message in server.messages] == [["foo@example.com"]]
+
+        with wmul_emailer.Spool(str(tmpdir)) as email_spool:
+            [respooled] = email_spool.pending()
+            assert respooled.destination_email_addresses == ["deferred@example.com"]
+            assert respooled.attempts == 1
+            assert email_spool.drain(lambda spooled_email: {}, now=respooled.next_attempt) == (1, 0, 0)
+            assert len(email_spool) == 0
+
+
+def test_drain_spool_tries_every_recipient_one_at_a_time(tmpdir):
+    with LocalSMTPServer(deferred_recipients={"b@example.com": 1},
+                         refused_recipients=["a@example.com"]) as server:
+        with wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["a@example.com", "b@example.com", "c@example.com"],
+            spool_directory=str(tmpdir),
+            deferral_retries=0
+        ) as emailer:
+            emailer.spool_email("mock_body", "mock_subject")
+
+            assert emailer.drain_spool() == (0, 1, 0)
+            assert [message.rcpt_tos for message in server.messages] == [["c@example.com"]]
+
+        with wmul_emailer.Spool(str(tmpdir)) as email_spool:
+            [respooled] = email_spool.pending()
+            assert respooled.destination_email_addresses == ["b@example.com"]
+
+
+def test_drain_fails_emails_refused_by_every_recipient(tmpdir):
+    fill_spool(str(tmpdir), count=1)
+
+    with wmul_emailer.Spool(str(tmpdir)) as email_spool:
+        result = email_spool.drain(lambda spooled_email: {
+            "foo@example.com": (550, b"No such user"), "bar@example.com": (553, b"Bad address")
+        })
+
+        assert result == (0, 0, 1)
+        assert len(email_spool) == 0
+
+
+def test_spool_email_requires_spool_directory():
+    emailer = wmul_emailer.EmailSender(
+        server_host="mock_host",
+        port="mock_port",
+        from_email_address="mock_from@example.com",
+        destination_email_addresses="foo@example.com"
+    )
+    with pytest.raises(ValueError):
+        emailer.spool_email("mock_body", "mock_subject")
+
+
+def test_cli_inspect_and_flush(tmpdir):
+    fill_spool(str(tmpdir), count=2)
+    runner = CliRunner()
+
+    result = runner.invoke(cli.spool, ["inspect", str(tmpdir)])
+    assert result.exit_code == 0
+    assert "subject 1" in result.output
+    assert "2 e-mail(s) in the spool." in result.output
+
+    with LocalSMTPServer() as server:
+        result = runner.invoke(
+            cli.spool,
+            [
+                "flush", str(tmpdir), 
+                "--server", server.host, 
+                "--port", str(server.port)
+            ]
+        )
+        assert result.exit_code == 0
+        assert "Delivered: 2, Deferred: 0, Failed: 0" in result.output
+        assert len(server.messages) == 4
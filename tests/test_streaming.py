@@ -0,0 +1,213 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import email
+import gzip
+import os
+import pytest
+import tracemalloc
+import wmul_emailer
+from wmul_emailer import streaming
+from wmul_emailer.testing import LocalSMTPServer
+from wmul_test_utils import make_namedtuple
+
+
+@pytest.fixture(scope="function")
+def setup_streaming(tmpdir):
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com", "bar@example.com"]
+        )
+        yield make_namedtuple(
+            "setup_streaming",
+            server=server,
+            emailer=emailer,
+            tmpdir=tmpdir
+        )
+
+
+def test_body_and_file_attachments(setup_streaming):
+    attachment_contents = os.urandom(100000)
+    attachment_path = setup_streaming.tmpdir.join("report.csv")
+    attachment_path.write_binary(attachment_contents)
+    empty_path = setup_streaming.tmpdir.join("empty.log")
+    empty_path.write_binary(b"")
+
+    setup_streaming.emailer.send_streamed_email(
+        "mock_subject",
+        email_body="mock_body\n.\nwith a period",
+        attachments=[
+            str(attachment_path),
+            wmul_emailer.Attachment(str(empty_path), filename="Bericht ü.log")
+        ]
+    )
+
+    assert len(setup_streaming.server.messages) == 2
+    for message in setup_streaming.server.messages:
+        parsed = email.message_from_bytes(message.data)
+        assert parsed["To"] == message.rcpt_tos[0]
+        assert parsed["Subject"] == "mock_subject"
+        body, attachment, empty = parsed.get_payload()
+        assert body.get_payload(decode=True) == \
+            b"mock_body\n.\nwith a period"
+        assert attachment.get_filename() == "report.csv"
+        assert attachment.get_content_type() == "text/csv"
+        assert attachment.get_payload(decode=True) == attachment_contents
+        assert empty.get_filename() == "Bericht ü.log"
+        assert empty.get_payload(decode=True) == b""
+
+
+def test_body_from_iterable(setup_streaming):
+    chunks = ["line {}\n".format(index) for index in range(1000)]
+
+    setup_streaming.emailer.send_streamed_email(
+        "mock_subject",
+        body_source=iter(chunks),
+        destination_email_addresses="foo@example.com"
+    )
+
+    message, = setup_streaming.server.messages
+    parsed = email.message_from_bytes(message.data)
+    assert parsed.get_payload(decode=True).decode("utf-8") == "".join(chunks)
+
+
+def test_iterable_cannot_be_sent_twice(setup_streaming):
+    with pytest.raises(ValueError):
+        setup_streaming.emailer.send_streamed_email(
+            "mock_subject",
+            body_source=iter([b"chunk"])
+        )
+    assert setup_streaming.server.messages == []
+
+    setup_streaming.emailer.single_transaction = True
+    setup_streaming.emailer.send_streamed_email(
+        "mock_subject",
+        body_source=iter([b"chunk"])
+    )
+    message, = setup_streaming.server.messages
+    assert message.rcpt_tos == ["foo@example.com", "bar@example.com"]
+
+
+def test_large_file_is_not_held_in_memory(setup_streaming):
+    setup_streaming.server.keep_data = False
+    attachment_path = setup_streaming.tmpdir.join("large.bin")
+    with open(str(attachment_path), "wb") as attachment_file:
+        for _ in range(12):
+            attachment_file.write(os.urandom(1024 * 1024))
+
+    tracemalloc.start()
+    try:
+        setup_streaming.emailer.send_streamed_email(
+            "mock_subject",
+            email_body="See attached.",
+            attachments=[str(attachment_path)],
+            destination_email_addresses="foo@example.com"
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 4 * 1024 * 1024
+    assert setup_streaming.server.received_bytes > 12 * 1024 * 1024
+
+
+def test_quote_periods_across_chunks():
+    assert streaming._quote_periods(b".a\r\n.b\r\n", True) == \
+        b"..a\r\n..b\r\n"
+    assert streaming._quote_periods(b".a\r\n.b\r\n", False) == \
+        b".a\r\n..b\r\n"
+
+
+def test_large_attachment_is_compressed(setup_streaming):
+    attachment_contents = b"log line\n" * 100000
+    attachment_path = setup_streaming.tmpdir.join("server.log")
+    attachment_path.write_binary(attachment_contents)
+    setup_streaming.emailer.compress_threshold = 10000
+
+    setup_streaming.emailer.send_streamed_email(
+        "mock_subject",
+        email_body="mock_body",
+        attachments=[str(attachment_path)]
+    )
+
+    assert len(setup_streaming.server.messages) == 2
+    for message in setup_streaming.server.messages:
+        parsed = email.message_from_bytes(message.data)
+        body, attachment = parsed.get_payload()
+        assert body.get_payload(decode=True) == b"mock_body"
+        assert attachment.get_filename() == "server.log.gz"
+        assert attachment.get_content_type() == "application/gzip"
+        assert gzip.decompress(attachment.get_payload(decode=True)) == \
+            attachment_contents
+    assert setup_streaming.server.received_bytes < 2 * 100000
+
+
+def test_oversize_streamed_message_is_refused_before_upload(setup_streaming):
+    attachment_path = setup_streaming.tmpdir.join("report.bin")
+    attachment_path.write_binary(os.urandom(100000))
+    setup_streaming.server.extensions.append("SIZE 50000")
+
+    with pytest.raises(wmul_emailer.MessageTooLargeError):
+        setup_streaming.emailer.send_streamed_email(
+            "mock_subject",
+            email_body="mock_body",
+            attachments=[str(attachment_path)]
+        )
+
+    assert setup_streaming.server.received_bytes == 0
+
+
+@pytest.mark.parametrize("attachment_sizes", [(), (0,), (1, 56, 57, 58), (100000,)])
+def test_size_is_exact(tmpdir, attachment_sizes):
+    attachments = []
+    for index, size in enumerate(attachment_sizes):
+        path = tmpdir.join("attachment_{}.bin".format(index))
+        path.write_binary(os.urandom(size))
+        attachments.append(streaming.Attachment(str(path), filename="r\u00e9sum\u00e9_{}.bin".format(index)))
+
+    with streaming.StreamedMessage("Subject \u2713", "mock_from@example.com", email_body="x" * 1000,
+                                   attachments=attachments) as message:
+        for to_header in ("foo@example.com", "Undisclosed recipients:;"):
+            assert message.size(to_header) == sum(len(chunk) for chunk in message.iter_message(to_header))
+
+
+def test_message_just_within_the_size_limit_is_sent(setup_streaming):
+    attachment_path = setup_streaming.tmpdir.join("report.bin")
+    attachment_path.write_binary(os.urandom(100000))
+    with streaming.StreamedMessage("mock_subject", "mock_from@example.com", email_body="mock_body",
+                                   attachments=[str(attachment_path)]) as message:
+        largest = max(message.size(to_header) for to_header in ("foo@example.com", "bar@example.com"))
+    # Room for a Message-ID of a different length, which is far less than
+    # the old per-part allowance.
+    setup_streaming.server.extensions.append("SIZE {}".format(largest + 64))
+
+    setup_streaming.emailer.send_streamed_email(
+        "mock_subject",
+        email_body="mock_body",
+        attachments=[str(attachment_path)]
+    )
+
+    assert len(setup_streaming.server.messages) == 2
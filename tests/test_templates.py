@@ -0,0 +1,186 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import email
+import gzip
+import pytest
+import wmul_emailer
+from wmul_emailer import templates
+from wmul_emailer.testing import LocalSMTPServer
+
+
+def test_for_recipient_only_changes_to_header():
+    rendered_message = templates.render_message(
+        "mock_body", "mock_subject", "mock_from@example.com"
+    )
+
+    first = email.message_from_bytes(
+        rendered_message.for_recipient("foo@example.com")
+    )
+    second = email.message_from_bytes(
+        rendered_message.for_recipient("bar@example.com")
+    )
+
+    assert first["To"] == "foo@example.com"
+    assert second["To"] == "bar@example.com"
+    for parsed in [first, second]:
+        assert parsed["Subject"] == "mock_subject"
+        assert parsed["From"] == "mock_from@example.com"
+        assert parsed.get_payload() == "mock_body"
+
+
+def test_for_recipient_encodes_non_ascii_and_rejects_line_breaks():
+    rendered_message = templates.render_message(
+        "mock_body", "mock_subject", "mock_from@example.com"
+    )
+
+    msg_bytes = rendered_message.for_recipient("Jürgen <j@example.com>")
+    assert b"=?utf-8?" in msg_bytes
+
+    with pytest.raises(ValueError):
+        rendered_message.for_recipient("foo@example.com\r\nBcc: x@example.com")
+
+
+def test_cache_reuses_rendered_messages(mocker):
+    render_message = mocker.spy(templates, "render_message")
+    cache = templates.RenderedMessageCache(max_entries=2)
+
+    first = cache.get("body 1", "subject", "from@example.com")
+    assert cache.get("body 1", "subject", "from@example.com") is first
+    cache.get("body 2", "subject", "from@example.com")
+    cache.get("body 1", "subject", "from@example.com")
+    cache.get("body 3", "subject", "from@example.com")
+
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert render_message.call_count == 3
+    assert cache.get("body 1", "subject", "from@example.com") is first
+    cache.get("body 2", "subject", "from@example.com")
+    assert render_message.call_count == 4
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = templates.RenderedMessageCache(max_entries=10, max_bytes=1000)
+
+    cache.get("x" * 2000, "subject", "from@example.com")
+    assert len(cache) == 0
+
+    for index in range(5):
+        cache.get("{} {}".format(index, "x" * 50), "subject", "from")
+    assert len(cache) == 2
+
+
+def test_cache_counts_the_body_it_is_keyed_by():
+    cache = templates.RenderedMessageCache(max_entries=10, max_bytes=2000, compress_threshold=100)
+
+    rendered_message = cache.get("x" * 5000, "subject", "from@example.com")
+
+    assert rendered_message.size < 2000
+    assert len(cache) == 0
+
+
+def test_send_email_renders_once_per_call(mocker):
+    render_message = mocker.spy(templates, "render_message")
+
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=[
+                "address_{}@example.com".format(index) for index in range(5)
+            ]
+        )
+        emailer.send_email("mock_body", "mock_subject")
+        emailer.send_email("mock_body", "mock_subject")
+        emailer.send_email("other_body", "mock_subject")
+
+    assert render_message.call_count == 2
+    assert len(server.messages) == 15
+    for message in server.messages[:5]:
+        parsed = email.message_from_bytes(message.data)
+        assert parsed["To"] == message.rcpt_tos[0]
+        assert parsed.get_payload().rstrip() == "mock_body"
+
+
+def test_large_body_is_compressed():
+    body = "log line\n" * 10000
+    rendered_message = templates.render_message(
+        body, "mock_subject", "mock_from@example.com", compress_threshold=1000
+    )
+
+    parsed = email.message_from_bytes(
+        rendered_message.for_recipient("foo@example.com")
+    )
+    note, attachment = parsed.get_payload()
+    assert "compressed" in note.get_payload()
+    assert attachment.get_filename() == templates.COMPRESSED_BODY_FILENAME
+    assert gzip.decompress(attachment.get_payload(decode=True)).decode("utf-8") == body
+    assert rendered_message.size < len(body) // 10
+
+
+def test_oversize_message_is_refused_before_upload():
+    with LocalSMTPServer(extensions=["SIZE 5000"]) as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com"]
+        )
+        with pytest.raises(wmul_emailer.MessageTooLargeError) as exc_info:
+            emailer.send_email("x" * 10000, "mock_subject")
+
+    assert exc_info.value.limit == 5000
+    assert exc_info.value.size > 10000
+    assert server.received_bytes == 0
+    assert server.messages == []
+
+
+def test_oversize_message_is_split_into_parts():
+    body = "".join("line {}\n".format(index) for index in range(3000))
+
+    with LocalSMTPServer(extensions=["SIZE 10000"]) as server:
+        emailer = wmul_emailer.EmailSender(
+            server_host=server.host,
+            port=server.port,
+            from_email_address="mock_from@example.com",
+            destination_email_addresses=["foo@example.com", "bar@example.com"],
+            oversize_policy="split"
+        )
+        emailer.send_email(body, "mock_subject")
+
+    assert len(server.messages) % 2 == 0
+    part_count = len(server.messages) // 2
+    assert part_count > 1
+    for recipient in ["foo@example.com", "bar@example.com"]:
+        parts = [
+            email.message_from_bytes(message.data)
+            for message in server.messages
+            if message.rcpt_tos == [recipient]
+        ]
+        assert [parsed["Subject"] for parsed in parts] == [
+            "mock_subject (part {} of {})".format(index, part_count)
+            for index in range(1, part_count + 1)
+        ]
+        joined = "".join(parsed.get_payload() for parsed in parts)
+        assert joined.replace("\r\n", "\n") == body
@@ -0,0 +1,139 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+import socket
+import time
+import wmul_emailer
+from wmul_emailer.testing import LocalSMTPServer
+
+
+@pytest.fixture
+def silent_server():
+    """A server that accepts connections but never says anything."""
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(8)
+        yield listener.getsockname()
+
+
+def test_connect_timeout_when_greeting_never_comes(silent_server):
+    host, port = silent_server
+    emailer = wmul_emailer.EmailSender(host, port=port, destination_email_addresses="foo@example.com",
+                                       from_email_address="bar@example.com", connect_timeout=0.2)
+
+    start = time.monotonic()
+    with pytest.raises(wmul_emailer.SendTimeoutError) as raised:
+        emailer.send_email("Body", "Subject")
+
+    assert raised.value.phase == "connect"
+    assert raised.value.timeout == 0.2
+    assert isinstance(raised.value, TimeoutError)
+    assert time.monotonic() - start < 2
+
+
+def test_command_timeout():
+    with LocalSMTPServer(latency=0.5) as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port,
+                                           destination_email_addresses="foo@example.com",
+                                           from_email_address="bar@example.com", connect_timeout=2,
+                                           command_timeout=0.1)
+        with pytest.raises(wmul_emailer.SendTimeoutError) as raised:
+            emailer.send_email("Body", "Subject")
+
+    assert raised.value.phase == "command"
+    assert not server.messages
+
+
+def test_send_timeout_bounds_the_whole_message():
+    with LocalSMTPServer(latency=0.2) as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port,
+                                           destination_email_addresses="foo@example.com",
+                                           from_email_address="bar@example.com", send_timeout=0.3)
+        start = time.monotonic()
+        with pytest.raises(wmul_emailer.SendTimeoutError) as raised:
+            emailer.send_email("Body", "Subject")
+        elapsed = time.monotonic() - start
+
+    assert raised.value.phase == "send"
+    assert elapsed < 1.5
+
+
+def test_deadline_is_checked_before_retrying():
+    with LocalSMTPServer(deferred_recipients={"foo@example.com": 5}) as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port,
+                                           destination_email_addresses="foo@example.com",
+                                           from_email_address="bar@example.com", deferral_retry_delay=5.0)
+        start = time.monotonic()
+        with pytest.raises(wmul_emailer.SendTimeoutError) as raised:
+            emailer.send_email("Body", "Subject", deadline=1.0)
+
+    assert raised.value.phase == "deadline"
+    assert raised.value.timeout == 1.0
+    assert time.monotonic() - start < 1.0
+
+
+def test_deadline_with_pool_and_parallel_connections():
+    with LocalSMTPServer(latency=0.3) as server:
+        with wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                      pool_size=2, parallel_connections=2,
+                                      continue_on_error=True) as emailer:
+            start = time.monotonic()
+            result = emailer.send_email("Body", "Subject", destination_email_addresses=[
+                "one@example.com", "two@example.com", "three@example.com", "four@example.com"
+            ], deadline=0.5)
+            elapsed = time.monotonic() - start
+
+    assert elapsed < 2
+    assert not result.ok
+    errors = [recipient.error for recipient in result.recipients.values() if recipient.error is not None]
+    assert errors
+    assert all(isinstance(error, wmul_emailer.SendTimeoutError) for error in errors)
+
+
+def test_no_timeouts_by_default():
+    with LocalSMTPServer(latency=0.05) as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port,
+                                           destination_email_addresses="foo@example.com",
+                                           from_email_address="bar@example.com")
+        assert emailer.send_email("Body", "Subject").ok
+        emailer.send_email("Body", "Subject", deadline=5)
+
+    assert len(server.messages) == 2
+
+
+def test_deadline_while_probing_a_half_open_relay_lets_it_be_probed_again(silent_server):
+    host, port = silent_server
+    emailer = wmul_emailer.EmailSender(relays=[(host, port)], relay_failure_threshold=1, relay_reset_timeout=0.1,
+                                       destination_email_addresses="foo@example.com",
+                                       from_email_address="bar@example.com")
+    [relay] = emailer.relays
+    emailer._relays.record_failure(relay)
+    time.sleep(0.2)
+
+    with pytest.raises(wmul_emailer.SendTimeoutError) as raised:
+        emailer.send_email("Body", "Subject", deadline=0.3)
+
+    assert raised.value.phase == "deadline"
+    assert not relay.probing
+    assert emailer._relays.choose() is relay
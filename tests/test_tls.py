@@ -0,0 +1,112 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+import ssl
+from smtplib import SMTPNotSupportedError
+import wmul_emailer
+from wmul_emailer import tls
+from wmul_emailer.testing import LocalSMTPServer, client_tls_context, server_tls_context
+
+
+def send_three(server, **kwargs):
+    emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                       destination_email_addresses="foo@example.com", **kwargs)
+    for _ in range(3):
+        assert emailer.send_email("Body", "Subject").ok
+    return emailer
+
+
+@pytest.mark.parametrize("mode", ["starttls", "implicit"])
+def test_sessions_are_resumed(mode):
+    with LocalSMTPServer(tls_context=server_tls_context(), implicit_tls=mode == "implicit",
+                         credentials=("user", "password")) as server:
+        send_three(server, tls=mode, ssl_context=client_tls_context(), user_name="user", password="password")
+
+    assert len(server.messages) == 3
+    assert server.tls_handshake_count == 3
+    assert server.tls_resumed_count == 2
+
+
+def test_session_resumption_can_be_turned_off():
+    with LocalSMTPServer(tls_context=server_tls_context()) as server:
+        send_three(server, tls="starttls", ssl_context=client_tls_context(), tls_session_resumption=False)
+
+    assert server.tls_handshake_count == 3
+    assert server.tls_resumed_count == 0
+
+
+def test_pooled_connection_only_does_the_handshake_once():
+    with LocalSMTPServer(tls_context=server_tls_context()) as server:
+        with send_three(server, tls="starttls", ssl_context=client_tls_context(), pool_size=1):
+            pass
+
+    assert server.tls_handshake_count == 1
+
+
+def test_observer_sees_handshakes():
+    metrics = wmul_emailer.Metrics()
+    with LocalSMTPServer(tls_context=server_tls_context()) as server:
+        send_three(server, tls="starttls", ssl_context=client_tls_context(), observer=metrics)
+
+    server_name = "{}:{}".format(server.host, server.port)
+    snapshot = metrics.snapshot()
+    assert snapshot["tls_handshakes"] == {server_name: 3}
+    assert snapshot["tls_resumed"] == {server_name: 2}
+    assert [phase["count"] for phase in snapshot["phases"] if phase["phase"] == "tls"] == [3]
+
+
+def test_starttls_not_supported():
+    with LocalSMTPServer() as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                           destination_email_addresses="foo@example.com", tls="starttls",
+                                           ssl_context=client_tls_context(), user_name="user",
+                                           password="password")
+        with pytest.raises(SMTPNotSupportedError):
+            emailer.send_email("Body", "Subject")
+
+    assert not server.messages
+
+
+def test_certificate_is_verified():
+    with LocalSMTPServer(tls_context=server_tls_context()) as server:
+        emailer = wmul_emailer.EmailSender(server.host, port=server.port, from_email_address="bar@example.com",
+                                           destination_email_addresses="foo@example.com", tls="starttls")
+        with pytest.raises(ssl.SSLError):
+            emailer.send_email("Body", "Subject")
+
+    assert not server.messages
+
+
+def test_default_context_is_shared():
+    first = wmul_emailer.EmailSender("localhost", 25, tls="starttls")
+    second = wmul_emailer.EmailSender("localhost", 25, tls="implicit")
+
+    assert first.ssl_context is second.ssl_context is tls.default_context()
+    assert tls.session_cache(first.ssl_context) is tls.session_cache(second.ssl_context)
+    assert wmul_emailer.EmailSender("localhost", 25).ssl_context is None
+
+
+def test_bad_tls_mode():
+    with pytest.raises(ValueError):
+        wmul_emailer.EmailSender("localhost", 25, tls="ssl")
@@ -0,0 +1,144 @@
+"""
+@Author = 'Mike Stanley'
+
+============ Change Log ============
+2026-Oct-18 = Created.
+
+============ License ============
+Copyright (c) 2026 Michael Stanley
+
+This file is part of wmul_emailer.
+
+wmul_emailer is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+wmul_emailer is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+wmul_emailer. If not, see <https://www.gnu.org/licenses/>.
+"""
+import email
+import os
+import sys
+import pytest
+from smtplib import SMTPDataError
+import wmul_emailer
+from wmul_emailer.instrumentation import Metrics
+
+# Stands in for sendmail. It saves its arguments and the message, and exits
+# with the status in the environment.
+FAKE_SENDMAIL = """
+import json, os, sys
+with open(os.environ["FAKE_SENDMAIL_OUTPUT"], "ab") as output:
+    output.write(json.dumps(sys.argv[1:]).encode("utf-8") + b"\\n")
+    output.write(sys.stdin.buffer.read())
+status = int(os.environ.get("FAKE_SENDMAIL_STATUS", "0"))
+if status:
+    sys.stderr.write("Cannot deliver.")
+sys.exit(status)
+"""
+
+
+@pytest.fixture
+def fake_sendmail(tmpdir, monkeypatch):
+    script = tmpdir.join("sendmail.py")
+    script.write(FAKE_SENDMAIL)
+    output = tmpdir.join("output")
+    monkeypatch.setenv("FAKE_SENDMAIL_OUTPUT", str(output))
+    return wmul_emailer.SendmailTransport(command=(sys.executable, str(script), "-i")), output
+
+
+def _emailer(transport, **options):
+    return wmul_emailer.EmailSender(transport=transport, from_email_address="bar@example.com",
+                                    destination_email_addresses=["foo@example.com", "baz@example.com"], **options)
+
+
+def test_memory_transport():
+    transport = wmul_emailer.MemoryTransport()
+    metrics = Metrics()
+    with _emailer(transport, observer=metrics) as emailer:
+        send_result = emailer.send_email("Body", "Subject")
+
+    assert send_result.ok
+    assert send_result.delivered == ["foo@example.com", "baz@example.com"]
+    assert [message.rcpt_tos for message in transport.messages] == [["foo@example.com"], ["baz@example.com"]]
+    assert transport.messages[0].mail_from == "bar@example.com"
+    parsed = email.message_from_bytes(transport.messages[1].data)
+    assert parsed["To"] == "baz@example.com"
+    assert parsed["Subject"] == "Subject"
+    assert metrics.snapshot()["messages_sent"] == {"memory": 2}
+
+
+def test_memory_transport_keeps_the_most_recent_messages():
+    transport = wmul_emailer.MemoryTransport(max_messages=3)
+    with _emailer(transport, pool_size=1, single_transaction=True) as emailer:
+        for index in range(10):
+            emailer.send_email("Body {}".format(index), "Subject")
+
+    assert transport.message_count == 10
+    assert len(transport.messages) == 3
+    assert b"Body 9" in transport.messages[-1].data
+    assert transport.messages[-1].rcpt_tos == ["foo@example.com", "baz@example.com"]
+
+
+def test_streamed_email_over_a_local_transport():
+    transport = wmul_emailer.MemoryTransport()
+    with _emailer(transport) as emailer:
+        send_result = emailer.send_streamed_email(
+            "Subject", body_source=iter([b"Streamed ", b"body"]), destination_email_addresses="foo@example.com"
+        )
+
+    assert send_result.ok
+    parsed = email.message_from_bytes(transport.messages[0].data)
+    assert parsed.get_payload(decode=True) == b"Streamed body"
+
+
+def test_maildir_transport(tmpdir):
+    directory = str(tmpdir.join("Maildir"))
+    transport = wmul_emailer.MaildirTransport(directory)
+    with _emailer(transport, single_transaction=True) as emailer:
+        emailer.send_email("Line one\r\nLine two\r\n", "Subject")
+
+    assert os.listdir(os.path.join(directory, "tmp")) == []
+    [file_name] = os.listdir(os.path.join(directory, "new"))
+    with open(os.path.join(directory, "new", file_name), "rb") as message_file:
+        data = message_file.read()
+    assert b"\r\n" not in data
+    assert data.startswith(b"Return-Path: <bar@example.com>\nDelivered-To: foo@example.com\n"
+                           b"Delivered-To: baz@example.com\n")
+    assert b"Line one\nLine two\n" in data
+
+
+def test_sendmail_transport(fake_sendmail):
+    transport, output = fake_sendmail
+    with _emailer(transport, single_transaction=True) as emailer:
+        send_result = emailer.send_email("Body", "Subject")
+
+    assert send_result.ok
+    arguments, data = output.read_binary().split(b"\n", 1)
+    assert arguments == b'["-i", "-f", "bar@example.com", "--", "foo@example.com", "baz@example.com"]'
+    assert b"\r\n" not in data
+    assert b"Subject: Subject\n" in data
+
+
+@pytest.mark.parametrize("status, code", [(75, 451), (69, 554)])
+def test_sendmail_failures(fake_sendmail, monkeypatch, status, code):
+    transport, _ = fake_sendmail
+    monkeypatch.setenv("FAKE_SENDMAIL_STATUS", str(status))
+    with _emailer(transport, deferral_retries=1, deferral_retry_delay=0.001) as emailer:
+        with pytest.raises(SMTPDataError) as raised:
+            emailer.send_email("Body", "Subject")
+
+    assert raised.value.smtp_code == code
+    assert "Cannot deliver." in str(raised.value)
+
+
+def test_transport_is_not_used_with_relays_or_tls():
+    with pytest.raises(ValueError):
+        wmul_emailer.EmailSender(transport=wmul_emailer.MemoryTransport(), tls="starttls")
+    with pytest.raises(ValueError):
+        wmul_emailer.EmailSender(port=25)